@@ -41,11 +41,12 @@ def main():
     print(f"🔧 调试模式: {'开启' if debug else '关闭'}")
     print("\n按 Ctrl+C 停止服务\n")
     
-    # 启动应用
+    # 启动应用（是否使用重载器跟随配置的 DEBUG，与 create_app 判断后台线程在哪个进程启动一致）
     app.run(
         host=host,
         port=port,
         debug=debug,
+        use_reloader=app.debug,
         threaded=True
     )
 
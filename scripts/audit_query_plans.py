@@ -0,0 +1,258 @@
+#!/usr/bin/env python3
+"""
+SQL 查询计划审计
+
+在临时数据库里灌入合成数据，逐个调用各 API，收集每个接口实际执行的 SQL，
+再对每条语句做 EXPLAIN QUERY PLAN，报告全表扫描、临时 B 树排序和自动索引。
+与基线（scripts/query_plan_baseline.json）对比，出现基线之外的问题时以非零状态退出。
+
+用法：
+    python scripts/audit_query_plans.py                     # 审计并与基线对比
+    python scripts/audit_query_plans.py --verbose           # 同时打印每条有问题的 SQL
+    python scripts/audit_query_plans.py --update-baseline   # 以当前结果作为新基线
+"""
+import os
+import sys
+import json
+import random
+import sqlite3
+import argparse
+import tempfile
+
+# 审计时不启动后台入库线程，也不开分词进程池
+os.environ.setdefault('KOTOBA_INGESTION_WORKERS', '0')
+os.environ.setdefault('KOTOBA_SEGMENT_WORKERS', '0')
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.app import create_app
+from src.backend.config import TestingConfig
+from src.backend.models.database import Database, ConnectionPool
+from src.backend.services.segmenter import JapaneseSegmenter
+from src.backend.services.ingestion import bulk_ingest
+from benchmark import generate_corpus
+
+BASELINE_PATH = os.path.join(project_root, 'scripts', 'query_plan_baseline.json')
+
+# 查询计划中需要关注的步骤
+PLAN_ISSUES = ('SCAN ', 'USE TEMP B-TREE', 'AUTOMATIC')
+
+# 录入接口用的样例数据
+SAMPLE_ENTRY = {
+    'content_type': 'sentence',
+    'original_jp': '私は毎日日本語を勉強します。',
+    'hiragana': 'わたしはまいにちにほんごをべんきょうします。',
+    'chinese_meaning': '我每天学习日语。',
+    'tags': {'lesson': 'L1', 'grammar_points': ['ます形']}
+}
+SAMPLE_WORDS = [
+    {'word_jp': '私', 'hiragana': 'わたし', 'word_type': 'noun', 'position': 0, 'grammar_info': {}},
+    {'word_jp': '勉強します', 'hiragana': 'べんきょうします', 'word_type': 'verb', 'position': 1,
+     'grammar_info': {'prototype': '勉強する', 'prototype_reading': 'べんきょうする'}}
+]
+
+# 审计的接口：(名称, 方法, 路径, 请求体)
+# 提交后台任务（POST /api/jobs）需要运行中的入库线程，审计时不启动，不在此列
+ROUTES = [
+    ('entries.preview', 'POST', '/api/entries/preview', SAMPLE_ENTRY),
+    ('entries.confirm', 'POST', '/api/entries/audit/confirm?async=0',
+     {'entries': [{'original_data': SAMPLE_ENTRY, 'segmented_words': SAMPLE_WORDS, 'segmentation_source': 'ai'}]}),
+    ('entries.list', 'GET', '/api/entries?limit=20', None),
+    ('entries.list_page', 'GET', '/api/entries?limit=20&page=5', None),
+    ('entries.list_type', 'GET', '/api/entries?limit=20&content_type=sentence', None),
+    ('entries.list_id', 'GET', '/api/entries?limit=20&order_by=id&order=asc&with_total=false', None),
+    ('entries.list_tag', 'GET', '/api/entries?limit=20&lesson=L1', None),
+    ('entries.search', 'GET', '/api/entries?limit=20&search=ます。', None),
+    ('entries.search_relevance', 'GET', '/api/entries?limit=20&search=ます。&order_by=relevance', None),
+    ('entries.search_short', 'GET', '/api/entries?limit=20&search=は', None),
+    ('entries.detail', 'GET', '/api/entries/10', None),
+    ('entries.categories', 'GET', '/api/entries/categories/nouns', None),
+    ('entries.categories_adjectives', 'GET', '/api/entries/categories/adjectives', None),
+    ('phonetics.chart', 'GET', '/api/phonetics', None),
+    ('phonetics.search', 'GET', '/api/phonetics/か/entries', None),
+    ('phonetics.search_raw', 'GET', '/api/phonetics/か/entries?type=raw', None),
+    ('verbs.list', 'GET', '/api/verbs', None),
+    ('verbs.list_page', 'GET', '/api/verbs?limit=20&verb_class=二类动词', None),
+    ('verbs.detail', 'GET', '/api/verbs/1', None),
+    ('stats.overview', 'GET', '/api/stats/overview', None),
+    ('stats.segmenter_cache', 'GET', '/api/stats/segmenter-cache', None),
+    ('practice.daily', 'GET', '/api/practice/daily', None),
+    ('practice.daily_tag', 'GET', '/api/practice/daily?lesson=L2', None),
+    ('practice.daily_cached', 'GET', '/api/practice/daily?lesson=L2', None),
+    ('practice.prompt', 'POST', '/api/practice/prompt', {'questions': [{'type': 'translation_jp_to_cn', 'question': '本'}]}),
+    ('practice.submit', 'POST', '/api/practice/submit', {'answers': [{'question_id': 1, 'is_correct': True}]}),
+    ('jobs.list', 'GET', '/api/jobs', None),
+    ('entries.delete', 'DELETE', '/api/entries/20', None),
+]
+
+
+def seed(db_path: str, size: int, seed_value: int):
+    """灌入合成数据：句子（含分词、动词、标签），录入时间分布在最近 90 天"""
+    rng = random.Random(seed_value)
+    segmenter = JapaneseSegmenter()
+    corpus = generate_corpus(size, seed_value)
+
+    entries = []
+    for i, (text, reading) in enumerate(corpus):
+        entries.append({
+            'original_data': {
+                'content_type': rng.choice(['sentence', 'sentence', 'sentence', 'phrase', 'word']),
+                'original_jp': text,
+                'hiragana': reading,
+                'chinese_meaning': f'例句{i}',
+                'tags': {'lesson': f'L{i % 20}', 'difficulty': i % 5 + 1, 'grammar_points': ['て形']}
+            },
+            'segmented_words': [word.to_dict() for word in segmenter.segment(text, reading)],
+            'segmentation_source': 'ai'
+        })
+
+    with Database.get_connection(db_path) as conn:
+        cursor = conn.cursor()
+        bulk_ingest(cursor, entries)
+        cursor.execute("UPDATE raw_entries SET created_at = datetime('now', '-' || (id % 90) || ' days')")
+
+
+def collect_statements(app, routes: list) -> dict:
+    """调用各接口，收集执行过的 SQL（参数已展开）"""
+    statements = {}
+    current = []
+
+    # 给连接池新建的连接挂上跟踪回调
+    original_connect = ConnectionPool._connect
+
+    def traced_connect(pool):
+        conn = original_connect(pool)
+        conn.set_trace_callback(lambda sql: current.append(sql))
+        return conn
+
+    ConnectionPool._connect = traced_connect
+    Database.close_all()
+    try:
+        client = app.test_client()
+        for name, method, path, body in routes:
+            current.clear()
+            response = client.open(path, method=method, json=body)
+            if response.status_code >= 400:
+                print(f"  ⚠️  {name}: HTTP {response.status_code}")
+            statements[name] = list(dict.fromkeys(current))
+    finally:
+        ConnectionPool._connect = original_connect
+        Database.close_all()
+    return statements
+
+
+def explain(conn, sql: str) -> list:
+    """EXPLAIN QUERY PLAN 的步骤说明；不可解释的语句返回空列表"""
+    stripped = sql.lstrip().upper()
+    if stripped.startswith(('--', 'BEGIN', 'COMMIT', 'ROLLBACK', 'PRAGMA', 'CREATE', 'SAVEPOINT', 'RELEASE')):
+        return []
+    # FTS5 访问影子表的内部语句（只在连接首次用到全文索引时出现）
+    if "'main'." in sql:
+        return []
+    try:
+        return [row[3] for row in conn.execute('EXPLAIN QUERY PLAN ' + sql)]
+    except sqlite3.Error:
+        return []
+
+
+def plan_issues(details: list) -> list:
+    """筛出需要关注的步骤（全文索引的虚表扫描和常量行不算）"""
+    issues = []
+    for detail in details:
+        if not detail.startswith(PLAN_ISSUES) and 'AUTOMATIC' not in detail:
+            continue
+        if 'VIRTUAL TABLE' in detail or detail == 'SCAN CONSTANT ROW':
+            continue
+        issues.append(detail)
+    return issues
+
+
+def audit(db_path: str, statements: dict, verbose: bool) -> dict:
+    """逐条分析，返回 {接口: [问题, ...]}"""
+    conn = sqlite3.connect(db_path)
+    report = {}
+    try:
+        for name, sqls in statements.items():
+            found = []
+            for sql in sqls:
+                issues = plan_issues(explain(conn, sql))
+                if issues and verbose:
+                    print(f"\n  [{name}] {' '.join(sql.split())[:200]}")
+                    for issue in issues:
+                        print(f"      ↳ {issue}")
+                found.extend(issues)
+            report[name] = sorted(set(found))
+    finally:
+        conn.close()
+    return report
+
+
+def compare(report: dict, baseline: dict) -> int:
+    """与基线对比，返回回归（新增问题）的数量"""
+    regressions = 0
+    print(f"\n{'接口':<32} {'语句问题'}")
+    print("-" * 72)
+    for name, issues in report.items():
+        known = set(baseline.get(name, []))
+        new = [i for i in issues if i not in known]
+        fixed = [i for i in known if i not in issues]
+        mark = '❌' if new else ('⚠️ ' if issues else '✅')
+        print(f"{mark} {name:<30} {len(issues)} 个已知问题" if issues else f"{mark} {name:<30} 无")
+        for issue in new:
+            print(f"      ❌ 新增: {issue}")
+        for issue in fixed:
+            print(f"      🎉 已消除: {issue}")
+        regressions += len(new)
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='言葉AI SQL 查询计划审计')
+    parser.add_argument('--size', type=int, default=2000, help='合成数据条数')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--baseline', default=BASELINE_PATH, help='基线文件路径')
+    parser.add_argument('--update-baseline', action='store_true', help='以当前结果作为新基线')
+    parser.add_argument('--verbose', action='store_true', help='打印有问题的 SQL')
+    args = parser.parse_args()
+
+    print("🔍 言葉AI SQL 查询计划审计")
+    print("=" * 50)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        db_path = os.path.join(tmp, 'audit.db')
+        Database.init_db(db_path)
+        Database.init_phonetics(db_path)
+
+        print(f"\n🌱 灌入 {args.size} 条合成数据...")
+        seed(db_path, args.size, args.seed)
+
+        TestingConfig.DATABASE_PATH = db_path
+        app = create_app('testing')
+
+        print("🚏 调用接口并收集 SQL...")
+        statements = collect_statements(app, ROUTES)
+        report = audit(db_path, statements, args.verbose)
+
+    if args.update_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2, sort_keys=True)
+            f.write('\n')
+        print(f"\n💾 基线已更新: {args.baseline}")
+        return
+
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding='utf-8') as f:
+            baseline = json.load(f)
+
+    regressions = compare(report, baseline)
+    if regressions:
+        print(f"\n❌ 查询计划回归: {regressions} 个新增问题（确认无误后用 --update-baseline 更新基线）")
+        sys.exit(1)
+    print("\n🎉 没有查询计划回归")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,307 @@
+#!/usr/bin/env python3
+"""
+分词 / 动词活用 / 50音提取 性能基准
+
+用分词器自带的词表加随机汉字、假名串生成合成语料（默认 1k/10k/100k 句），
+统计 tokens/sec、chars/sec 和峰值内存，结果保存为 JSON，便于对比两个版本。
+
+用法：
+    python scripts/benchmark.py                         # 运行并保存到 data/benchmarks/
+    python scripts/benchmark.py --sizes 1000,10000      # 指定语料规模
+    python scripts/benchmark.py --compare old.json new.json
+"""
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import platform
+import subprocess
+import tracemalloc
+from datetime import datetime
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.services.segmenter import JapaneseSegmenter, VerbConjugator
+from src.backend.services.ingestion import extract_phonetics
+
+HIRAGANA = [chr(c) for c in range(ord('ぁ'), ord('ゖ') + 1)]
+KATAKANA = [chr(c) for c in range(ord('ァ'), ord('ヺ') + 1)]
+# 常用汉字区段
+KANJI = [chr(c) for c in range(0x4E00, 0x9FA5 + 1)]
+SENTENCE_ENDS = ['。', '！', '？']
+
+
+def git_revision() -> str:
+    """当前 git 版本号（非 git 环境返回 unknown）"""
+    try:
+        return subprocess.check_output(
+            ['git', 'rev-parse', '--short', 'HEAD'],
+            cwd=project_root, stderr=subprocess.DEVNULL
+        ).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return 'unknown'
+
+
+def generate_corpus(size: int, seed: int) -> list:
+    """
+    生成合成语料
+
+    Returns:
+        [(原文, 平假名注音), ...]，注音与原文按字符对齐
+    """
+    rng = random.Random(seed)
+    function_words = sorted(
+        JapaneseSegmenter.PARTICLES | JapaneseSegmenter.AUX_VERBS
+    )
+    content_words = sorted(
+        JapaneseSegmenter.PRONOUNS | JapaneseSegmenter.ADVERBS
+    ) + list(JapaneseSegmenter.NA_ADJECTIVES)
+    verb_endings = list(JapaneseSegmenter.VERB_ENDINGS)
+
+    def kana(length):
+        return ''.join(rng.choice(HIRAGANA) for _ in range(length))
+
+    corpus = []
+    for _ in range(size):
+        text = []
+        reading = []
+        for _ in range(rng.randint(3, 8)):
+            kind = rng.random()
+            if kind < 0.35:
+                word = rng.choice(function_words)
+                text.append(word)
+                reading.append(word)
+            elif kind < 0.55:
+                word = rng.choice(content_words)
+                text.append(word)
+                reading.append(kana(len(word)))
+            elif kind < 0.75:
+                # 汉字串（名词）
+                word = ''.join(rng.choice(KANJI) for _ in range(rng.randint(1, 3)))
+                text.append(word)
+                reading.append(kana(len(word)))
+            elif kind < 0.85:
+                # 片假名串（外来语）
+                word = ''.join(rng.choice(KATAKANA) for _ in range(rng.randint(2, 5)))
+                text.append(word)
+                reading.append(kana(len(word)))
+            else:
+                # 汉字 + 送假名 + 动词变形后缀
+                stem = rng.choice(KANJI) + kana(rng.randint(0, 1))
+                ending = rng.choice(verb_endings)
+                text.append(stem + ending)
+                reading.append(kana(len(stem)) + ending)
+        end = rng.choice(SENTENCE_ENDS)
+        text.append(end)
+        reading.append(end)
+        corpus.append((''.join(text), ''.join(reading)))
+    return corpus
+
+
+def generate_verbs(size: int, seed: int) -> list:
+    """生成 (原型, 读音, 动词类别) 列表"""
+    rng = random.Random(seed)
+    godan_endings = list(VerbConjugator.GODAN_CONJUGATIONS)
+    verbs = []
+    for _ in range(size):
+        stem = rng.choice(KANJI)
+        stem_reading = ''.join(rng.choice(HIRAGANA) for _ in range(2))
+        kind = rng.random()
+        if kind < 0.5:
+            ending = rng.choice(godan_endings)
+            verbs.append((stem + ending, stem_reading + ending, '一类动词'))
+        elif kind < 0.9:
+            verbs.append((stem + 'べる', stem_reading + 'べる', '二类动词'))
+        else:
+            verbs.append((stem + rng.choice(KANJI) + 'する', stem_reading + 'する', '三类动词'))
+    return verbs
+
+
+def measure(func, with_memory: bool) -> dict:
+    """执行一次 func，返回耗时、结果和（可选的）峰值内存"""
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+
+    peak = None
+    if with_memory:
+        # 单独再跑一遍统计内存，避免 tracemalloc 影响计时
+        tracemalloc.start()
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.stop()
+
+    return {'elapsed': elapsed, 'result': result, 'peak_bytes': peak}
+
+
+def rate(count, elapsed):
+    return round(count / elapsed, 1) if elapsed > 0 else None
+
+
+def bench_segment(corpus: list, mode: str, with_memory: bool) -> dict:
+    segmenter = JapaneseSegmenter(mode)
+    chars = sum(len(text) for text, _ in corpus)
+
+    def run():
+        tokens = 0
+        for text, reading in corpus:
+            tokens += len(segmenter.segment(text, reading))
+        return tokens
+
+    m = measure(run, with_memory)
+    return {
+        'sentences': len(corpus),
+        'chars': chars,
+        'tokens': m['result'],
+        'seconds': round(m['elapsed'], 4),
+        'chars_per_sec': rate(chars, m['elapsed']),
+        'tokens_per_sec': rate(m['result'], m['elapsed']),
+        'peak_memory_bytes': m['peak_bytes']
+    }
+
+
+def bench_conjugate(verbs: list, with_memory: bool) -> dict:
+    conjugator = VerbConjugator()
+
+    def run():
+        VerbConjugator.conjugation_rows.cache_clear()
+        return sum(len(conjugator.conjugate(*verb)) for verb in verbs)
+
+    m = measure(run, with_memory)
+    return {
+        'verbs': len(verbs),
+        'forms': m['result'],
+        'seconds': round(m['elapsed'], 4),
+        'verbs_per_sec': rate(len(verbs), m['elapsed']),
+        'forms_per_sec': rate(m['result'], m['elapsed']),
+        'peak_memory_bytes': m['peak_bytes']
+    }
+
+
+def bench_conjugate_many(verbs: list, with_memory: bool) -> dict:
+    conjugator = VerbConjugator()
+    batch = {i: verb for i, verb in enumerate(verbs, 1)}
+
+    def run():
+        VerbConjugator.conjugation_rows.cache_clear()
+        return len(conjugator.conjugate_many(batch))
+
+    m = measure(run, with_memory)
+    return {
+        'verbs': len(verbs),
+        'forms': m['result'],
+        'seconds': round(m['elapsed'], 4),
+        'verbs_per_sec': rate(len(verbs), m['elapsed']),
+        'forms_per_sec': rate(m['result'], m['elapsed']),
+        'peak_memory_bytes': m['peak_bytes']
+    }
+
+
+def bench_phonetics(corpus: list, with_memory: bool) -> dict:
+    chars = sum(len(reading) for _, reading in corpus)
+
+    def run():
+        return sum(len(extract_phonetics(reading)) for _, reading in corpus)
+
+    m = measure(run, with_memory)
+    return {
+        'sentences': len(corpus),
+        'chars': chars,
+        'phonetics': m['result'],
+        'seconds': round(m['elapsed'], 4),
+        'chars_per_sec': rate(chars, m['elapsed']),
+        'peak_memory_bytes': m['peak_bytes']
+    }
+
+
+def run_benchmarks(sizes: list, modes: list, seed: int, with_memory: bool) -> dict:
+    results = {}
+
+    for size in sizes:
+        print(f"\n📚 语料规模: {size} 句")
+        corpus = generate_corpus(size, seed)
+        # 动词规模取句子数的 1/10
+        verbs = generate_verbs(max(size // 10, 1), seed)
+
+        benches = [(f'segment_{mode}', lambda mode=mode: bench_segment(corpus, mode, with_memory)) for mode in modes]
+        benches += [
+            ('conjugate', lambda: bench_conjugate(verbs, with_memory)),
+            ('conjugate_many', lambda: bench_conjugate_many(verbs, with_memory)),
+            ('extract_phonetics', lambda: bench_phonetics(corpus, with_memory)),
+        ]
+
+        for name, bench in benches:
+            result = bench()
+            results.setdefault(name, {})[str(size)] = result
+            throughput = result.get('tokens_per_sec') or result.get('forms_per_sec') or result.get('chars_per_sec')
+            print(f"  {name:<20} {result['seconds']:>9.3f}s  {throughput:>14,.1f}/s")
+
+    return results
+
+
+def compare(old_path: str, new_path: str):
+    """对比两次基准结果（耗时比值 < 1 表示变快）"""
+    with open(old_path, encoding='utf-8') as f:
+        old = json.load(f)
+    with open(new_path, encoding='utf-8') as f:
+        new = json.load(f)
+
+    print(f"📊 {old.get('revision')} → {new.get('revision')}")
+    print(f"{'benchmark':<20} {'size':>8} {'old (s)':>10} {'new (s)':>10} {'ratio':>8} {'peak mem':>10}")
+    print("-" * 72)
+    for name, by_size in new['results'].items():
+        for size, result in by_size.items():
+            before = old['results'].get(name, {}).get(size)
+            if not before:
+                continue
+            ratio = result['seconds'] / before['seconds'] if before['seconds'] else float('nan')
+            mem = ''
+            if result.get('peak_memory_bytes') and before.get('peak_memory_bytes'):
+                mem = f"{result['peak_memory_bytes'] / before['peak_memory_bytes']:.2f}x"
+            print(f"{name:<20} {size:>8} {before['seconds']:>10.3f} {result['seconds']:>10.3f} {ratio:>7.2f}x {mem:>10}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description='言葉AI 性能基准')
+    parser.add_argument('--sizes', default='1000,10000,100000', help='语料规模（句数），逗号分隔')
+    parser.add_argument('--modes', default=','.join(JapaneseSegmenter.MODES), help='分词模式，逗号分隔')
+    parser.add_argument('--seed', type=int, default=42, help='随机种子')
+    parser.add_argument('--no-memory', action='store_true', help='不统计峰值内存（更快）')
+    parser.add_argument('--output', help='结果 JSON 路径（默认 data/benchmarks/bench-<版本>.json）')
+    parser.add_argument('--compare', nargs=2, metavar=('OLD', 'NEW'), help='对比两个结果文件')
+    args = parser.parse_args()
+
+    if args.compare:
+        compare(*args.compare)
+        return
+
+    revision = git_revision()
+    print("⏱️  言葉AI 性能基准")
+    print("=" * 50)
+    print(f"版本: {revision}  Python: {platform.python_version()}")
+
+    sizes = [int(s) for s in args.sizes.split(',') if s]
+    modes = [m for m in args.modes.split(',') if m]
+    results = run_benchmarks(sizes, modes, args.seed, not args.no_memory)
+
+    output = args.output or os.path.join(project_root, 'data', 'benchmarks', f'bench-{revision}.json')
+    os.makedirs(os.path.dirname(os.path.abspath(output)), exist_ok=True)
+    with open(output, 'w', encoding='utf-8') as f:
+        json.dump({
+            'revision': revision,
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'seed': args.seed,
+            'created_at': datetime.now().isoformat(),
+            'results': results
+        }, f, ensure_ascii=False, indent=2)
+
+    print(f"\n💾 结果已保存: {output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,56 @@
+#!/usr/bin/env python3
+"""
+统计计数重算脚本
+
+stats_counters / stats_daily / stats_word_types 由触发器增量维护，
+手动改库或导入旧数据后计数可能出现偏差，运行本脚本按现有数据重算。
+
+用法：
+    python scripts/recompute_stats.py [数据库路径]
+"""
+import os
+import sys
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.models.database import Database
+
+def main():
+    print("🔢 言葉AI 统计计数重算")
+    print("=" * 50)
+    
+    try:
+        db_path = sys.argv[1] if len(sys.argv) > 1 else os.path.join(project_root, 'data', 'japanese_learning.db')
+        
+        with Database.get_connection(db_path) as conn:
+            cursor = conn.cursor()
+            
+            # 确保计数表和触发器存在
+            Database.init_stats(cursor)
+            
+            cursor.execute('SELECT name, value FROM stats_counters')
+            before = {row[0]: row[1] for row in cursor.fetchall()}
+            
+            print("\n📊 重算计数...")
+            Database.recompute_stats(cursor)
+            
+            cursor.execute('SELECT name, value FROM stats_counters')
+            after = {row[0]: row[1] for row in cursor.fetchall()}
+        
+        for name, value in after.items():
+            drift = value - before.get(name, 0)
+            mark = '✅' if drift == 0 else '🔧'
+            print(f"  {mark} {name}: {value}" + (f"（修正 {drift:+d}）" if drift else ''))
+        
+        print("\n🎉 统计计数重算完成！")
+        
+    except Exception as e:
+        print(f"\n❌ 重算失败: {str(e)}")
+        import traceback
+        traceback.print_exc()
+        sys.exit(1)
+
+if __name__ == '__main__':
+    main()
@@ -1,7 +1,13 @@
 from flask import Flask, jsonify, send_from_directory
 from flask_cors import CORS
 import os
+import sqlite3
 from .config import config
+from .models.database import Database
+from .services.segment_cache import segmentation_cache
+from .services.user_dictionary import user_dictionary
+from .services.jobs import ingestion_jobs
+from .services.pagination import total_counts
 
 # 导入路由
 from .routes.entries import entries_bp
@@ -9,6 +15,7 @@ from .routes.phonetics import phonetics_bp
 from .routes.practice import practice_bp
 from .routes.stats import stats_bp
 from .routes.verbs import verbs_bp
+from .routes.jobs import jobs_bp
 
 def create_app(config_name='default'):
     """应用工厂函数"""
@@ -25,6 +32,22 @@ def create_app(config_name='default'):
     # 加载配置
     app.config.from_object(config[config_name])
     config[config_name].init_app(app)
+    Database.configure(app.config)
+    segmentation_cache.max_size = app.config['SEGMENT_CACHE_SIZE']
+    total_counts.ttl = app.config['TOTAL_COUNT_CACHE_SECONDS']
+    
+    # 从语料库加载分词用户词典
+    try:
+        user_dictionary.load(app.config['DATABASE_PATH'])
+        print(f"📖 用户词典已加载: {len(user_dictionary.trie)} 个词条")
+    except sqlite3.OperationalError as e:
+        print(f"⚠️  用户词典加载失败（数据库未初始化？）: {e}")
+    
+    # 启动后台入库线程（会继续处理上次未完成的任务）
+    # 调试模式下 Werkzeug 重载器的父进程也会执行 create_app，只在实际处理请求的子进程里启动
+    ingestion_jobs.configure(app.config)
+    if not app.debug or os.environ.get('WERKZEUG_RUN_MAIN') == 'true':
+        ingestion_jobs.start()
     
     # 启用CORS
     CORS(app, resources={
@@ -41,6 +64,7 @@ def create_app(config_name='default'):
     app.register_blueprint(practice_bp)
     app.register_blueprint(stats_bp)
     app.register_blueprint(verbs_bp)
+    app.register_blueprint(jobs_bp)
     
     # 根路由 - 返回首页
     @app.route('/')
@@ -9,6 +9,28 @@ class Config:
     # 数据库配置
     DATABASE_PATH = os.path.join(BASE_DIR, 'data', 'japanese_learning.db')
     
+    # 连接池：最大连接数、借连接的等待超时（秒）
+    DATABASE_POOL_SIZE = int(os.environ.get('KOTOBA_DB_POOL_SIZE', 8))
+    DATABASE_POOL_TIMEOUT = 30.0
+    
+    # 每个连接创建时设置一次的 PRAGMA
+    DATABASE_PRAGMAS = {
+        'journal_mode': 'WAL',
+        'synchronous': 'NORMAL',
+        'mmap_size': 256 * 1024 * 1024,  # 256MB
+        'cache_size': -16000,  # 负数表示 KiB，约 16MB
+        'temp_store': 'MEMORY',
+        'foreign_keys': 'ON'
+    }
+    
+    # 写入模式：pool（各请求线程直接写）/ single_writer（所有写操作排队交给单个写线程，读走只读连接池）
+    DATABASE_WRITE_MODE = os.environ.get('KOTOBA_DB_WRITE_MODE') or 'pool'
+    
+    # 单写线程：队列容量、排队等待超时（秒）、每个事务最多合并的写操作数
+    DATABASE_WRITE_QUEUE_SIZE = 256
+    DATABASE_WRITE_TIMEOUT = 30.0
+    DATABASE_WRITE_BATCH_SIZE = 64
+    
     # 上传文件配置
     UPLOAD_FOLDER = os.path.join(BASE_DIR, 'uploads')
     MAX_CONTENT_LENGTH = 16 * 1024 * 1024  # 16MB
@@ -21,9 +43,29 @@ class Config:
     DEFAULT_PAGE_SIZE = 20
     MAX_PAGE_SIZE = 100
     
+    # 列表总数缓存时间（秒）
+    TOTAL_COUNT_CACHE_SECONDS = 30
+    
     # 每日一练配置
     DAILY_PRACTICE_COUNT = 20
     
+    # 自动分词模式：greedy（贪心）/ lattice（词格最小代价）
+    SEGMENTER_MODE = os.environ.get('KOTOBA_SEGMENTER_MODE') or 'greedy'
+    
+    # 批量预览的分词进程数（0 表示在请求线程内顺序分词）
+    SEGMENT_WORKERS = int(os.environ.get('KOTOBA_SEGMENT_WORKERS', os.cpu_count() or 0))
+    
+    # 分词缓存（进程内 LRU）容量
+    SEGMENT_CACHE_SIZE = 4096
+    
+    # 后台入库：工作线程数、每个事务提交的条数、任务租约（秒）
+    INGESTION_WORKERS = int(os.environ.get('KOTOBA_INGESTION_WORKERS', 2))
+    INGESTION_CHUNK_SIZE = 200
+    INGESTION_LEASE_SECONDS = 60
+    
+    # 确认入库超过该条数时转为后台任务（0 表示总是同步入库）
+    INGESTION_ASYNC_THRESHOLD = 500
+    
     @staticmethod
     def init_app(app):
         """初始化应用配置"""
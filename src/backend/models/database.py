@@ -1,9 +1,267 @@
 import sqlite3
 import json
 import os
+import time
+import queue
+import threading
 from datetime import datetime
-from flask import current_app
 from contextlib import contextmanager
+from ..config import Config
+from ..services.tags import TAG_KEYS
+from ..services.ingestion import extract_phonetics
+from ..services.question_bank import translation_questions, conjugation_questions, insert_questions
+
+
+class ConnectionPool:
+    """
+    SQLite 连接池（有界队列）
+
+    连接按需创建，最多 size 个；PRAGMA 只在创建连接时设置一次。
+    池中连接全部借出时等待归还，超过 timeout 秒抛出 sqlite3.OperationalError。
+    """
+    
+    def __init__(self, path, size=8, timeout=30.0, pragmas=None):
+        self.path = path
+        # 内存数据库每个连接都是独立的库，只能共用一个连接
+        self.size = 1 if path == ':memory:' else max(int(size), 1)
+        self.timeout = timeout
+        self.pragmas = dict(pragmas or {})
+        self._idle = queue.LifoQueue()
+        self._created = 0
+        self._lock = threading.Lock()
+        
+        # 确保目录存在（只在建池时做一次）
+        directory = os.path.dirname(path)
+        if path != ':memory:' and directory:
+            os.makedirs(directory, exist_ok=True)
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+    
+    def acquire(self):
+        """借出一个连接"""
+        try:
+            return self._idle.get_nowait()
+        except queue.Empty:
+            pass
+        
+        with self._lock:
+            can_create = self._created < self.size
+            if can_create:
+                self._created += 1
+        
+        if can_create:
+            try:
+                return self._connect()
+            except Exception:
+                with self._lock:
+                    self._created -= 1
+                raise
+        
+        try:
+            return self._idle.get(timeout=self.timeout)
+        except queue.Empty:
+            raise sqlite3.OperationalError(
+                f'数据库连接池已耗尽（{self.size} 个连接，等待 {self.timeout} 秒超时）'
+            )
+    
+    def release(self, conn):
+        """归还连接（未结束的事务先回滚）"""
+        try:
+            if conn.in_transaction:
+                conn.rollback()
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+        self._idle.put(conn)
+    
+    def discard(self, conn):
+        """关闭并丢弃一个已损坏的连接"""
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+        with self._lock:
+            self._created -= 1
+    
+    def close(self):
+        """关闭所有空闲连接"""
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            self.discard(conn)
+
+
+class WriteTimeoutError(sqlite3.OperationalError):
+    """写入队列已满或排队超时（单写线程模式下的背压）"""
+
+
+class _WriteRequest:
+    """排队中的一次写操作"""
+    
+    def __init__(self, fn):
+        self.fn = fn
+        self.result = None
+        self.error = None
+        self.done = threading.Event()
+        self._state = 'pending'
+        self._lock = threading.Lock()
+    
+    def start(self) -> bool:
+        """写线程开始执行前调用；已被调用方取消时返回 False"""
+        with self._lock:
+            if self._state != 'pending':
+                return False
+            self._state = 'running'
+            return True
+    
+    def cancel(self) -> bool:
+        """调用方等待超时时取消；已经开始执行的无法取消"""
+        with self._lock:
+            if self._state != 'pending':
+                return False
+            self._state = 'cancelled'
+            return True
+
+
+class WriteQueue:
+    """
+    单写线程队列
+    
+    所有写操作排队交给一个专用线程、一个连接串行执行。写线程每次取出队列里积压的写操作
+    （最多 batch_size 个）放进同一个事务提交（组提交），每个写操作在自己的 SAVEPOINT 里执行，
+    出错只回滚它自己。队列有界：队列满或排队超过 timeout 秒时抛出 WriteTimeoutError，
+    而不是在 SQLite 写锁上报 database is locked。
+    """
+    
+    def __init__(self, path, max_size=256, timeout=30.0, batch_size=64, pragmas=None):
+        self.path = path
+        self.timeout = timeout
+        self.batch_size = max(int(batch_size), 1)
+        self.pragmas = dict(pragmas or {})
+        self._queue = queue.Queue(maxsize=max(int(max_size), 1))
+        self._thread = None
+        self._lock = threading.Lock()
+        
+        # 统计：提交的事务数、执行的写操作数
+        self.commits = 0
+        self.writes = 0
+    
+    def submit(self, fn, timeout=None):
+        """
+        排队执行 fn(cursor) 并等待提交，返回 fn 的返回值（fn 抛出的异常原样抛出）
+        
+        Raises:
+            WriteTimeoutError: 队列已满或排队超时（此时 fn 没有执行）
+        """
+        timeout = self.timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        request = _WriteRequest(fn)
+        
+        self._ensure_started()
+        try:
+            self._queue.put(request, timeout=timeout)
+        except queue.Full:
+            raise WriteTimeoutError(f'写入队列已满（{self._queue.maxsize} 个），等待 {timeout} 秒超时')
+        
+        if not request.done.wait(max(deadline - time.monotonic(), 0)):
+            if request.cancel():
+                raise WriteTimeoutError(f'写入排队超过 {timeout} 秒，已取消')
+            # 已经开始执行：等它提交完成，如实返回结果
+            request.done.wait()
+        
+        if request.error is not None:
+            raise request.error
+        return request.result
+    
+    def pending(self) -> int:
+        """排队中的写操作数"""
+        return self._queue.qsize()
+    
+    def close(self, timeout=None):
+        """处理完已排队的写操作后停止写线程"""
+        with self._lock:
+            thread = self._thread
+            self._thread = None
+        if thread is not None:
+            self._queue.put(None)
+            thread.join(timeout)
+    
+    def _ensure_started(self):
+        with self._lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sqlite-writer', daemon=True)
+                self._thread.start()
+    
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=self.timeout, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        for name, value in self.pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+        return conn
+    
+    def _run(self):
+        conn = self._connect()
+        try:
+            stopping = False
+            while not stopping:
+                request = self._queue.get()
+                if request is None:
+                    break
+                
+                # 组提交：把已经在排队的写操作一起带上
+                batch = [request]
+                while len(batch) < self.batch_size:
+                    try:
+                        request = self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if request is None:
+                        stopping = True
+                        break
+                    batch.append(request)
+                
+                self._execute(conn, [r for r in batch if r.start()])
+        finally:
+            conn.close()
+    
+    def _execute(self, conn, batch):
+        if not batch:
+            return
+        cursor = conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for request in batch:
+                cursor.execute('SAVEPOINT write_request')
+                try:
+                    request.result = request.fn(cursor)
+                    cursor.execute('RELEASE write_request')
+                except Exception as e:
+                    cursor.execute('ROLLBACK TO write_request')
+                    cursor.execute('RELEASE write_request')
+                    request.error = e
+            conn.commit()
+            self.commits += 1
+            self.writes += len(batch)
+        except Exception as e:
+            # 提交失败：整批都没有生效
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pass
+            for request in batch:
+                request.result = None
+                request.error = request.error or e
+        finally:
+            for request in batch:
+                request.done.set()
+
 
 class Database:
     """数据库连接管理"""
@@ -14,33 +272,132 @@ class Database:
         'data', 'japanese_learning.db'
     )
     
+    # 连接池配置（由 configure 从应用配置覆盖）
+    default_path = DEFAULT_DB_PATH
+    pool_size = Config.DATABASE_POOL_SIZE
+    pool_timeout = Config.DATABASE_POOL_TIMEOUT
+    pragmas = Config.DATABASE_PRAGMAS
+    
+    # 写入模式：pool（各连接直接写）/ single_writer（单写线程 + 只读连接池）
+    write_mode = Config.DATABASE_WRITE_MODE
+    write_queue_size = Config.DATABASE_WRITE_QUEUE_SIZE
+    write_timeout = Config.DATABASE_WRITE_TIMEOUT
+    write_batch_size = Config.DATABASE_WRITE_BATCH_SIZE
+    
+    _pools = {}
+    _writers = {}
+    _pools_lock = threading.Lock()
+    
+    @classmethod
+    def configure(cls, app_config):
+        """从应用配置读取数据库路径和连接池参数（create_app 时调用一次）"""
+        cls.close_all()
+        cls.default_path = app_config.get('DATABASE_PATH') or cls.DEFAULT_DB_PATH
+        cls.pool_size = app_config.get('DATABASE_POOL_SIZE', cls.pool_size)
+        cls.pool_timeout = app_config.get('DATABASE_POOL_TIMEOUT', cls.pool_timeout)
+        cls.pragmas = app_config.get('DATABASE_PRAGMAS', cls.pragmas)
+        cls.write_mode = app_config.get('DATABASE_WRITE_MODE', cls.write_mode)
+        cls.write_queue_size = app_config.get('DATABASE_WRITE_QUEUE_SIZE', cls.write_queue_size)
+        cls.write_timeout = app_config.get('DATABASE_WRITE_TIMEOUT', cls.write_timeout)
+        cls.write_batch_size = app_config.get('DATABASE_WRITE_BATCH_SIZE', cls.write_batch_size)
+    
+    @classmethod
+    def get_pool(cls, db_path=None, readonly=False):
+        """获取（必要时创建）指定数据库的连接池；readonly 为只读连接池（PRAGMA query_only）"""
+        path = db_path or cls.default_path
+        key = (path, readonly)
+        pool = cls._pools.get(key)
+        if pool is None:
+            with cls._pools_lock:
+                pool = cls._pools.get(key)
+                if pool is None:
+                    pragmas = dict(cls.pragmas, query_only='ON') if readonly else cls.pragmas
+                    pool = ConnectionPool(path, cls.pool_size, cls.pool_timeout, pragmas)
+                    cls._pools[key] = pool
+        return pool
+    
+    @classmethod
+    def get_writer(cls, db_path=None):
+        """获取（必要时启动）指定数据库的单写线程队列"""
+        path = db_path or cls.default_path
+        writer = cls._writers.get(path)
+        if writer is None:
+            with cls._pools_lock:
+                writer = cls._writers.get(path)
+                if writer is None:
+                    writer = WriteQueue(path, cls.write_queue_size, cls.write_timeout,
+                                        cls.write_batch_size, cls.pragmas)
+                    cls._writers[path] = writer
+        return writer
+    
+    @classmethod
+    def single_writer(cls, db_path=None) -> bool:
+        """是否走单写线程（内存数据库只有一个连接，总是直接写）"""
+        path = db_path or cls.default_path
+        return cls.write_mode == 'single_writer' and path != ':memory:'
+    
+    @classmethod
+    def close_all(cls):
+        """关闭所有连接池和写线程（写线程先处理完已排队的写操作）"""
+        with cls._pools_lock:
+            pools = list(cls._pools.values())
+            writers = list(cls._writers.values())
+            cls._pools.clear()
+            cls._writers.clear()
+        for writer in writers:
+            writer.close()
+        for pool in pools:
+            pool.close()
+    
+    @classmethod
+    def write(cls, fn, db_path=None, timeout=None):
+        """
+        执行写操作 fn(cursor)，提交后返回 fn 的返回值
+        
+        single_writer 模式下排队交给写线程（与其他写操作组提交）；否则在连接池的连接上直接执行。
+        fn 抛出异常时它的修改全部回滚，异常原样抛出。
+        
+        Raises:
+            WriteTimeoutError: 写入队列已满或排队超时（仅 single_writer 模式）
+        """
+        if cls.single_writer(db_path):
+            return cls.get_writer(db_path).submit(fn, timeout)
+        with cls.get_connection(db_path) as conn:
+            return fn(conn.cursor())
+    
+    @staticmethod
+    @contextmanager
+    def read_connection(db_path=None):
+        """获取只读连接（single_writer 模式下取自只读连接池，否则同 get_connection）"""
+        with Database._pooled(Database.get_pool(db_path, readonly=Database.single_writer(db_path))) as conn:
+            yield conn
+    
     @staticmethod
     @contextmanager
     def get_connection(db_path=None):
-        """获取数据库连接（上下文管理器）"""
-        # 优先使用传入的路径，其次是 Flask 配置，最后是默认路径
-        if db_path:
-            path = db_path
-        else:
-            try:
-                path = current_app.config['DATABASE_PATH']
-            except RuntimeError:
-                # 不在 Flask 应用上下文中，使用默认路径
-                path = Database.DEFAULT_DB_PATH
-        
-        # 确保目录存在
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        
-        conn = sqlite3.connect(path)
-        conn.row_factory = sqlite3.Row  # 使查询结果可以通过列名访问
+        """获取数据库连接（上下文管理器，连接取自连接池）"""
+        # 优先使用传入的路径，其次是 configure 设置的路径，最后是默认路径
+        with Database._pooled(Database.get_pool(db_path)) as conn:
+            yield conn
+    
+    @staticmethod
+    @contextmanager
+    def _pooled(pool):
+        """从连接池借出连接，正常结束时提交，异常时回滚"""
+        conn = pool.acquire()
         try:
             yield conn
             conn.commit()
         except Exception as e:
-            conn.rollback()
+            try:
+                conn.rollback()
+            except sqlite3.Error:
+                pool.discard(conn)
+                conn = None
             raise e
         finally:
-            conn.close()
+            if conn is not None:
+                pool.release(conn)
     
     @staticmethod
     def init_db(db_path=None):
@@ -78,6 +435,7 @@ class Database:
                     position INTEGER NOT NULL,
                     grammar_info JSON,
                     verb_id INTEGER,
+                    source TEXT,
                     FOREIGN KEY (raw_entry_id) REFERENCES raw_entries(id) ON DELETE CASCADE,
                     FOREIGN KEY (verb_id) REFERENCES verb_master(id) ON DELETE SET NULL
                 )
@@ -130,33 +488,469 @@ class Database:
                 )
             ''')
             
-            # 6. 每日练习记录表
+            # 6. 每日练习记录表（同一天每组请求参数各保存一套题）
+            cursor.execute(Database.DAILY_PRACTICE_TABLE)
+            
+            # 7. 分词结果缓存表
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS segmentation_cache (
+                    content_hash TEXT NOT NULL,
+                    segmenter_version TEXT NOT NULL,
+                    result JSON NOT NULL,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    PRIMARY KEY (content_hash, segmenter_version)
+                ) WITHOUT ROWID
+            ''')
+            
+            # 8. 后台入库任务表
             cursor.execute('''
-                CREATE TABLE IF NOT EXISTS daily_practice (
+                CREATE TABLE IF NOT EXISTS ingestion_jobs (
+                    id TEXT PRIMARY KEY,
+                    status TEXT NOT NULL DEFAULT 'pending' CHECK(status IN ('pending', 'running', 'completed', 'failed')),
+                    payload JSON,
+                    total INTEGER NOT NULL,
+                    next_index INTEGER DEFAULT 0,
+                    processed INTEGER DEFAULT 0,
+                    failed INTEGER DEFAULT 0,
+                    lease_until REAL,
+                    last_error TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                    started_at TIMESTAMP,
+                    finished_at TIMESTAMP
+                )
+            ''')
+            
+            # 9. 入库任务的逐条错误
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS ingestion_job_errors (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
-                    practice_date DATE NOT NULL UNIQUE,
-                    questions JSON,
-                    answers JSON,
-                    completed BOOLEAN DEFAULT 0,
-                    score INTEGER,
-                    prompt_text TEXT,
-                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                    job_id TEXT NOT NULL,
+                    entry_index INTEGER NOT NULL,
+                    original_jp TEXT,
+                    message TEXT NOT NULL,
+                    FOREIGN KEY (job_id) REFERENCES ingestion_jobs(id) ON DELETE CASCADE
+                )
+            ''')
+            
+            # 10. 间隔重复（SM-2）复习计划：首次作答时创建
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS review_schedule (
+                    entry_id INTEGER PRIMARY KEY,
+                    due TIMESTAMP NOT NULL,
+                    interval_days INTEGER NOT NULL DEFAULT 0,
+                    ease REAL NOT NULL DEFAULT 2.5,
+                    repetitions INTEGER NOT NULL DEFAULT 0,
+                    lapses INTEGER NOT NULL DEFAULT 0,
+                    last_reviewed TIMESTAMP,
+                    FOREIGN KEY (entry_id) REFERENCES raw_entries(id) ON DELETE CASCADE
+                )
+            ''')
+            
+            # 11. 逐题作答记录（只追加）
+            cursor.execute('''
+                CREATE TABLE IF NOT EXISTS review_log (
+                    id INTEGER PRIMARY KEY,
+                    entry_id INTEGER NOT NULL,
+                    question_type TEXT,
+                    correct BOOLEAN NOT NULL,
+                    answered_at TIMESTAMP NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                    FOREIGN KEY (entry_id) REFERENCES raw_entries(id) ON DELETE CASCADE
                 )
             ''')
             
+            # 旧数据库补充新增列
+            Database._ensure_column(cursor, 'segmented_words', 'source', 'TEXT')
+            Database._ensure_column(cursor, 'daily_practice', 'generation_key', 'TEXT')
+            Database._ensure_column(cursor, 'daily_practice', 'etag', 'TEXT')
+            Database._rekey_daily_practice(cursor)
+            
             # 创建索引
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_created ON raw_entries(created_at)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_type ON raw_entries(content_type)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_type_created ON raw_entries(content_type, created_at, id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_processed ON raw_entries(processed)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_words_entry ON segmented_words(raw_entry_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_reading ON raw_entries(content_type, hiragana)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_entries_meaning ON raw_entries(content_type, chinese_meaning)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_words_entry_position ON segmented_words(raw_entry_id, position)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_words_entry_type ON segmented_words(raw_entry_id, word_type)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_words_type ON segmented_words(word_type)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_words_verb ON segmented_words(verb_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_verb_prototype ON verb_master(prototype)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_verb_class ON verb_master(verb_class)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_verb_class_seen ON verb_master(verb_class, first_seen, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_verb_group_seen ON verb_master(verb_group, first_seen, id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_verb_first_seen ON verb_master(first_seen, id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_conj_verb ON verb_conjugations(verb_id)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_conj_type ON verb_conjugations(form_type)')
-            cursor.execute('CREATE INDEX IF NOT EXISTS idx_phonetic_char ON phonetic_index(phonetic)')
             cursor.execute('CREATE INDEX IF NOT EXISTS idx_phonetic_entry ON phonetic_index(entry_table, entry_id)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_status ON ingestion_jobs(status, created_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_jobs_created ON ingestion_jobs(created_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_review_due ON review_schedule(due)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_review_log_entry ON review_log(entry_id, answered_at)')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_review_log_time ON review_log(answered_at)')
+            
+            # 被上面的复合索引取代（前缀相同）
+            for index in ('idx_words_entry', 'idx_verb_class', 'idx_verb_group', 'idx_phonetic_char'):
+                cursor.execute(f'DROP INDEX IF EXISTS {index}')
+            cursor.execute('CREATE INDEX IF NOT EXISTS idx_job_errors_job ON ingestion_job_errors(job_id, entry_index)')
+            
+            # 全文检索索引
+            Database.init_search_index(cursor)
+            
+            # 统计计数表
+            Database.init_stats(cursor)
+            
+            # 标签索引表
+            Database.init_tags(cursor)
+            
+            # 分词的50音倒排
+            Database.init_phonetic_postings(cursor)
+            
+            # 练习题库
+            Database.init_question_bank(cursor)
+    
+    # 全文检索的列（与 raw_entries 同名）
+    SEARCH_COLUMNS = ('original_jp', 'hiragana', 'chinese_meaning', 'romaji')
+    
+    @staticmethod
+    def init_search_index(cursor):
+        """
+        创建 raw_entries 的 FTS5 全文索引（trigram 分词，适合不分词的中日文）
+        
+        外部内容表，由触发器与 raw_entries 同步；新建索引时从已有数据重建。
+        SQLite 不支持 FTS5 trigram（低于 3.34）时跳过，搜索退回 LIKE。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'raw_entries_fts'")
+        exists = cursor.fetchone() is not None
+        
+        columns = ', '.join(Database.SEARCH_COLUMNS)
+        new_values = ', '.join(f'new.{c}' for c in Database.SEARCH_COLUMNS)
+        old_values = ', '.join(f'old.{c}' for c in Database.SEARCH_COLUMNS)
+        
+        try:
+            cursor.execute(f'''
+                CREATE VIRTUAL TABLE IF NOT EXISTS raw_entries_fts USING fts5(
+                    {columns},
+                    content='raw_entries', content_rowid='id', tokenize='trigram'
+                )
+            ''')
+        except sqlite3.OperationalError as e:
+            print(f"⚠️  FTS5 trigram 不可用，搜索将使用 LIKE: {e}")
+            return
+        
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS raw_entries_fts_insert AFTER INSERT ON raw_entries BEGIN
+                INSERT INTO raw_entries_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS raw_entries_fts_delete AFTER DELETE ON raw_entries BEGIN
+                INSERT INTO raw_entries_fts(raw_entries_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+            END
+        ''')
+        cursor.execute(f'''
+            CREATE TRIGGER IF NOT EXISTS raw_entries_fts_update AFTER UPDATE OF {columns} ON raw_entries BEGIN
+                INSERT INTO raw_entries_fts(raw_entries_fts, rowid, {columns}) VALUES ('delete', old.id, {old_values});
+                INSERT INTO raw_entries_fts(rowid, {columns}) VALUES (new.id, {new_values});
+            END
+        ''')
+        
+        if not exists:
+            Database.rebuild_search_index(cursor)
+    
+    @staticmethod
+    def rebuild_search_index(cursor):
+        """从 raw_entries 重建全文索引（修复索引与数据不一致）"""
+        cursor.execute("INSERT INTO raw_entries_fts(raw_entries_fts) VALUES ('rebuild')")
+    
+    # 维护总数的表（stats_counters.name）
+    COUNTED_TABLES = ('raw_entries', 'segmented_words', 'verb_master')
+    
+    @staticmethod
+    def init_stats(cursor):
+        """
+        创建统计计数表，由触发器随数据增删增量维护
+        
+        - stats_counters: 各表总行数
+        - stats_daily: 每天（UTC，与 created_at 一致）的录入数
+        - stats_word_types: 各词性的单词数
+        新建时从现有数据回填；计数出现偏差时用 recompute_stats 修复。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'stats_counters'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_counters (
+                name TEXT PRIMARY KEY,
+                value INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_daily (
+                day DATE PRIMARY KEY,
+                entries INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS stats_word_types (
+                word_type TEXT PRIMARY KEY,
+                count INTEGER NOT NULL DEFAULT 0
+            ) WITHOUT ROWID
+        ''')
+        
+        for table in Database.COUNTED_TABLES:
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS stats_{table}_insert AFTER INSERT ON {table} BEGIN
+                    UPDATE stats_counters SET value = value + 1 WHERE name = '{table}';
+                END
+            ''')
+            cursor.execute(f'''
+                CREATE TRIGGER IF NOT EXISTS stats_{table}_delete AFTER DELETE ON {table} BEGIN
+                    UPDATE stats_counters SET value = value - 1 WHERE name = '{table}';
+                END
+            ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS stats_daily_insert AFTER INSERT ON raw_entries BEGIN
+                INSERT INTO stats_daily (day, entries) VALUES (date(new.created_at), 1)
+                ON CONFLICT(day) DO UPDATE SET entries = entries + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS stats_daily_delete AFTER DELETE ON raw_entries BEGIN
+                UPDATE stats_daily SET entries = entries - 1 WHERE day = date(old.created_at);
+            END
+        ''')
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS stats_word_types_insert AFTER INSERT ON segmented_words BEGIN
+                INSERT INTO stats_word_types (word_type, count) VALUES (new.word_type, 1)
+                ON CONFLICT(word_type) DO UPDATE SET count = count + 1;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS stats_word_types_delete AFTER DELETE ON segmented_words BEGIN
+                UPDATE stats_word_types SET count = count - 1 WHERE word_type = old.word_type;
+            END
+        ''')
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS stats_word_types_update AFTER UPDATE OF word_type ON segmented_words BEGIN
+                UPDATE stats_word_types SET count = count - 1 WHERE word_type = old.word_type;
+                INSERT INTO stats_word_types (word_type, count) VALUES (new.word_type, 1)
+                ON CONFLICT(word_type) DO UPDATE SET count = count + 1;
+            END
+        ''')
+        
+        if not exists:
+            Database.recompute_stats(cursor)
+    
+    @staticmethod
+    def recompute_stats(cursor):
+        """按现有数据重算全部统计计数"""
+        cursor.execute('DELETE FROM stats_counters')
+        for table in Database.COUNTED_TABLES:
+            cursor.execute(f'''
+                INSERT INTO stats_counters (name, value) SELECT '{table}', COUNT(*) FROM {table}
+            ''')
+        
+        cursor.execute('DELETE FROM stats_daily')
+        cursor.execute('''
+            INSERT INTO stats_daily (day, entries)
+            SELECT date(created_at), COUNT(*) FROM raw_entries GROUP BY date(created_at)
+        ''')
+        
+        cursor.execute('DELETE FROM stats_word_types')
+        cursor.execute('''
+            INSERT INTO stats_word_types (word_type, count)
+            SELECT word_type, COUNT(*) FROM segmented_words GROUP BY word_type
+        ''')
+    
+    @staticmethod
+    def init_tags(cursor):
+        """
+        创建标签索引表 entry_tags（raw_entries.tags 仍是原始记录，这里只做可索引的投影）
+        
+        入库时写入（见 services/tags.project_tags），新建时从已有数据回填。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'entry_tags'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS entry_tags (
+                key TEXT NOT NULL,
+                value TEXT NOT NULL,
+                entry_id INTEGER NOT NULL,
+                PRIMARY KEY (key, value, entry_id),
+                FOREIGN KEY (entry_id) REFERENCES raw_entries(id) ON DELETE CASCADE
+            ) WITHOUT ROWID
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_entry_tags_entry ON entry_tags(entry_id)')
+        
+        if not exists:
+            Database.backfill_tags(cursor)
+    
+    @staticmethod
+    def backfill_tags(cursor):
+        """由 raw_entries.tags 重建 entry_tags（数组字段每个元素一行）"""
+        placeholders = ','.join(['?' for _ in TAG_KEYS])
+        cursor.execute('DELETE FROM entry_tags')
+        cursor.execute(f'''
+            INSERT OR IGNORE INTO entry_tags (key, value, entry_id)
+            SELECT t.key, COALESCE(a.value, t.value), r.id
+            FROM raw_entries r
+            JOIN json_each(CASE WHEN json_valid(r.tags) THEN r.tags ELSE '{{}}' END) t
+            LEFT JOIN json_each(CASE WHEN t.type = 'array' THEN t.value ELSE '[]' END) a
+            WHERE t.key IN ({placeholders})
+            AND json_type(r.tags) = 'object'
+            AND COALESCE(a.type, t.type) IN ('text', 'integer', 'real')
+            AND COALESCE(a.value, t.value) != ''
+        ''', TAG_KEYS)
+    
+    @staticmethod
+    def init_phonetic_postings(cursor):
+        """
+        phonetic_index 里分词的倒排（entry_table = 'segmented_words'）
+        
+        按假名查分词走 UNIQUE(phonetic, entry_table, entry_id) 索引，不再对 hiragana 做 LIKE '%x%' 全表扫描。
+        删除条目/分词时由触发器清理对应的倒排；首次创建时从已有分词回填。
+        """
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS phonetic_index_entry_delete AFTER DELETE ON raw_entries BEGIN
+                DELETE FROM phonetic_index WHERE entry_table = 'raw_entries' AND entry_id = old.id;
+            END
+        ''')
+        
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'phonetic_index_word_delete'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TRIGGER IF NOT EXISTS phonetic_index_word_delete AFTER DELETE ON segmented_words BEGIN
+                DELETE FROM phonetic_index WHERE entry_table = 'segmented_words' AND entry_id = old.id;
+            END
+        ''')
+        
+        if not exists:
+            Database.backfill_phonetic_postings(cursor)
+    
+    @staticmethod
+    def backfill_phonetic_postings(cursor):
+        """由 segmented_words.hiragana 重建分词的50音倒排"""
+        cursor.execute("DELETE FROM phonetic_index WHERE entry_table = 'segmented_words'")
+        cursor.execute('SELECT id, hiragana FROM segmented_words')
+        rows = [
+            (phonetic, 'segmented', 'segmented_words', word_id, 'exact')
+            for word_id, hiragana in cursor.fetchall()
+            for phonetic in extract_phonetics(hiragana)
+        ]
+        cursor.executemany('''
+            INSERT OR IGNORE INTO phonetic_index
+            (phonetic, entry_type, entry_table, entry_id, match_type)
+            VALUES (?, ?, ?, ?, ?)
+        ''', rows)
+    
+    @staticmethod
+    def init_question_bank(cursor):
+        """
+        创建练习题库 question_bank：每个条目的翻译题、每个动词活用形的活用题
+        
+        入库时随条目、新动词一起写入（见 services/question_bank），每日一练只按索引取题；
+        删除条目/动词时由外键级联删除对应的题，新建时从已有数据回填。
+        """
+        cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'question_bank'")
+        exists = cursor.fetchone() is not None
+        
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS question_bank (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                question_type TEXT NOT NULL,
+                entry_id INTEGER,
+                verb_id INTEGER,
+                form_type TEXT,
+                question TEXT NOT NULL,
+                correct_answer TEXT NOT NULL,
+                hint TEXT,
+                difficulty INTEGER DEFAULT 1,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                FOREIGN KEY (entry_id) REFERENCES raw_entries(id) ON DELETE CASCADE,
+                FOREIGN KEY (verb_id) REFERENCES verb_master(id) ON DELETE CASCADE
+            )
+        ''')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_bank_entry ON question_bank(entry_id, question_type)')
+        cursor.execute('CREATE INDEX IF NOT EXISTS idx_bank_verb ON question_bank(verb_id, difficulty)')
+        
+        if not exists:
+            Database.backfill_question_bank(cursor)
+    
+    @staticmethod
+    def backfill_question_bank(cursor):
+        """由 raw_entries 和 verb_conjugations 重建题库"""
+        cursor.execute('DELETE FROM question_bank')
+        
+        cursor.execute('SELECT id, original_jp, hiragana, romaji, chinese_meaning, tags FROM raw_entries')
+        rows = []
+        for entry_id, original_jp, hiragana, romaji, chinese_meaning, tags in cursor.fetchall():
+            try:
+                tags = json.loads(tags) if tags else {}
+            except (TypeError, ValueError):
+                tags = {}
+            rows.extend(translation_questions(entry_id, original_jp, hiragana, romaji, chinese_meaning, tags))
+        
+        cursor.execute('SELECT id, prototype, reading FROM verb_master')
+        verbs = {row[0]: (row[1], row[2]) for row in cursor.fetchall()}
+        cursor.execute('''
+            SELECT verb_id, form_type, form_name, form_value, reading, example, politeness, difficulty, meaning
+            FROM verb_conjugations ORDER BY verb_id, id
+        ''')
+        rows.extend(conjugation_questions(cursor.fetchall(), verbs))
+        
+        insert_questions(cursor, rows)
+    
+    @staticmethod
+    def _ensure_column(cursor, table, column, definition):
+        """为已存在的表补充新增列（CREATE TABLE IF NOT EXISTS 不会修改旧表）"""
+        cursor.execute(f'PRAGMA table_info({table})')
+        if column not in [row[1] for row in cursor.fetchall()]:
+            cursor.execute(f'ALTER TABLE {table} ADD COLUMN {column} {definition}')
+    
+    # 每日练习记录表（init_db 建表和旧表重建共用）
+    DAILY_PRACTICE_COLUMNS = ('id', 'practice_date', 'questions', 'answers', 'completed', 'score',
+                              'prompt_text', 'generation_key', 'etag', 'created_at')
+    DAILY_PRACTICE_TABLE = '''
+        CREATE TABLE IF NOT EXISTS daily_practice (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            practice_date DATE NOT NULL,
+            questions JSON,
+            answers JSON,
+            completed BOOLEAN DEFAULT 0,
+            score INTEGER,
+            prompt_text TEXT,
+            generation_key TEXT,
+            etag TEXT,
+            created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+            UNIQUE(practice_date, generation_key)
+        )
+    '''
+    
+    @staticmethod
+    def _rekey_daily_practice(cursor):
+        """
+        旧数据库的 daily_practice 按 practice_date 唯一，换成 (practice_date, generation_key) 唯一
+        
+        SQLite 不能删除列上的 UNIQUE 约束，只能重建表；已有的题目和作答记录原样保留。
+        """
+        cursor.execute('PRAGMA index_list(daily_practice)')
+        unique_indexes = [row[1] for row in cursor.fetchall() if row[2]]
+        for name in unique_indexes:
+            cursor.execute(f'PRAGMA index_info("{name}")')
+            if [row[2] for row in cursor.fetchall()] == ['practice_date']:
+                break
+        else:
+            return
+        
+        columns = ', '.join(Database.DAILY_PRACTICE_COLUMNS)
+        cursor.execute('ALTER TABLE daily_practice RENAME TO daily_practice_old')
+        cursor.execute(Database.DAILY_PRACTICE_TABLE)
+        cursor.execute(f'INSERT INTO daily_practice ({columns}) SELECT {columns} FROM daily_practice_old')
+        cursor.execute('DROP TABLE daily_practice_old')
     
     @staticmethod
     def init_phonetics(db_path=None):
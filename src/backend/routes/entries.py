@@ -1,29 +1,18 @@
 from flask import Blueprint, request, jsonify, current_app
 import json
 from datetime import datetime, timedelta
-from ..models.database import Database
-from ..services.segmenter import JapaneseSegmenter, VerbConjugator
+from ..models.database import Database, WriteTimeoutError
+from ..services.segmenter import JapaneseSegmenter
+from ..services.ingestion import bulk_ingest, extract_phonetics
+from ..services.segment_cache import segmentation_cache
+from ..services.user_dictionary import user_dictionary
+from ..services.jobs import ingestion_jobs
+from ..services.tags import tag_conditions
+from ..services.pagination import CursorError, decode_cursor, encode_cursor, keyset_condition, total_counts
 
 entries_bp = Blueprint('entries', __name__, url_prefix='/api/entries')
 
 # 辅助函数
-def extract_phonetics(hiragana: str) -> list:
-    """提取50音"""
-    gojyuon = set('あいうえおかきくけこさしすせそたちつてとなにぬねの'
-                  'はひふへほまみむめもやゆよらりるれろわをん'
-                  'がぎぐげござじずぜぞだぢづでどばびぶべぼ'
-                  'ぱぴぷぺぽ')
-    
-    phonetics = []
-    seen = set()
-    
-    for char in hiragana:
-        if char in gojyuon and char not in seen:
-            phonetics.append(char)
-            seen.add(char)
-    
-    return phonetics
-
 def extract_verbs(segmented_words: list) -> list:
     """提取动词"""
     verbs = []
@@ -36,57 +25,29 @@ def extract_verbs(segmented_words: list) -> list:
             })
     return verbs
 
-def get_or_create_verb(cursor, prototype: str, word_data: dict) -> int:
-    """获取或创建动词"""
-    # 检查是否已存在
-    cursor.execute('SELECT id FROM verb_master WHERE prototype = ?', (prototype,))
-    row = cursor.fetchone()
-    
-    if row:
-        return row[0]
-    
-    # 创建新动词
-    hiragana = word_data.get('hiragana', '')
-    verb_class = word_data.get('grammar_info', {}).get('verb_class', '一类动词')
-    
-    cursor.execute('''
-        INSERT INTO verb_master (prototype, reading, meaning, verb_class, example_count)
-        VALUES (?, ?, ?, ?, 1)
-    ''', (
-        prototype,
-        hiragana,
-        word_data.get('grammar_info', {}).get('meaning', ''),
-        verb_class
-    ))
-    
-    verb_id = cursor.lastrowid
-    
-    # 生成动词活用
-    conjugator = VerbConjugator()
-    conjugations = conjugator.conjugate(prototype, hiragana, verb_class)
-    
-    for conj in conjugations:
-        cursor.execute('''
-            INSERT INTO verb_conjugations
-            (verb_id, form_type, form_name, form_value, reading, example, politeness, difficulty, meaning)
-            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
-        ''', (
-            verb_id, conj.form_type, conj.form_name, conj.form_value,
-            conj.reading, conj.example, conj.politeness, conj.difficulty, conj.meaning
-        ))
-    
-    return verb_id
+# 全文检索（trigram）可检索的最短关键词长度
+SEARCH_MIN_LENGTH = 3
 
-def create_phonetic_index(cursor, entry_id: int, hiragana: str, word_indices: list):
-    """创建50音索引"""
-    phonetics = extract_phonetics(hiragana)
-    
-    for phonetic in phonetics:
-        cursor.execute('''
-            INSERT OR IGNORE INTO phonetic_index
-            (phonetic, entry_type, entry_table, entry_id, match_type)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (phonetic, 'raw', 'raw_entries', entry_id, 'exact'))
+# BM25 列权重：原文、平假名、中文、罗马音
+SEARCH_WEIGHTS = (10.0, 5.0, 5.0, 1.0)
+
+# 列表可排序字段 -> 排序键（末列为 id，保证游标唯一）
+ENTRY_SORT_COLUMNS = {
+    'created_at': ('r.created_at', 'r.id'),
+    'id': ('r.id',)
+}
+
+# 分类列表的排序键：句子录入时间、句子ID、单词ID
+CATEGORY_SORT_COLUMNS = ('r.created_at', 'r.id', 's.id')
+
+def has_search_index(cursor) -> bool:
+    """数据库是否有全文索引（SQLite 不支持 FTS5 trigram 时不会创建）"""
+    cursor.execute("SELECT 1 FROM sqlite_master WHERE name = 'raw_entries_fts'")
+    return cursor.fetchone() is not None
+
+def fts_phrase(search: str) -> str:
+    """把关键词转成 FTS5 短语查询（按子串匹配，忽略 FTS 语法字符）"""
+    return '"' + search.replace('"', '""') + '"'
 
 def validate_entry(data, index=None):
     """验证单条数据"""
@@ -99,8 +60,12 @@ def validate_entry(data, index=None):
     
     return True, None
 
-def process_single_entry(data):
-    """处理单条数据，返回预览结果"""
+def process_single_entry(data, mode='greedy', segmented_words=None):
+    """
+    处理单条数据，返回预览结果
+    
+    segmented_words 为批量自动分词的结果（字典列表），未提供时在此处分词
+    """
     # 优先使用AI预分词的数据
     pre_segmented = data.get('segmented_words')
     
@@ -110,12 +75,12 @@ def process_single_entry(data):
         print(f"✅ 使用AI预分词结果: {len(pre_segmented)} 个单词")
     else:
         # 降级使用自动分词（不推荐）
-        segmenter = JapaneseSegmenter()
-        segmented_words = segmenter.segment(
-            data['original_jp'],
-            data['hiragana']
-        )
-        segmented_words_data = [word.to_dict() for word in segmented_words]
+        if segmented_words is None:
+            segmented_words = segmentation_cache.segment_many(
+                JapaneseSegmenter(mode, user_dictionary=user_dictionary),
+                [(data['original_jp'], data['hiragana'])]
+            )[0]
+        segmented_words_data = segmented_words
         print(f"⚠️  使用自动分词结果（可能不准确）: {len(segmented_words_data)} 个单词")
     
     phonetics = extract_phonetics(data['hiragana'])
@@ -143,6 +108,17 @@ def create_preview():
             entries = [input_data]
             is_batch = False
         
+        # 分词模式：请求参数优先，其次是配置
+        mode = request.args.get('mode') or current_app.config.get('SEGMENTER_MODE', 'greedy')
+        if mode not in JapaneseSegmenter.MODES:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'VALIDATION_ERROR',
+                    'message': f'未知的分词模式: {mode}'
+                }
+            }), 400
+        
         # 验证所有数据
         for i, entry in enumerate(entries):
             is_valid, error_msg = validate_entry(entry, i if len(entries) > 1 else None)
@@ -158,10 +134,19 @@ def create_preview():
         # 生成预览ID
         preview_id = f"temp_{datetime.now().strftime('%Y%m%d%H%M%S')}"
         
+        # 没有AI预分词的条目统一批量分词
+        auto_indices = [i for i, entry in enumerate(entries) if not entry.get('segmented_words')]
+        auto_results = segmentation_cache.segment_many(
+            JapaneseSegmenter(mode, user_dictionary=user_dictionary),
+            [(entries[i]['original_jp'], entries[i]['hiragana']) for i in auto_indices],
+            workers=current_app.config.get('SEGMENT_WORKERS', 0)
+        )
+        auto_segmented = dict(zip(auto_indices, auto_results))
+        
         # 处理所有条目
         preview_results = []
-        for entry in entries:
-            result = process_single_entry(entry)
+        for i, entry in enumerate(entries):
+            result = process_single_entry(entry, mode, auto_segmented.get(i))
             preview_results.append(result)
         
         return jsonify({
@@ -200,86 +185,53 @@ def confirm_entry(preview_id):
                 }
             }), 400
         
-        results = []
-        
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            for entry_data in preview_entries:
-                original_data = entry_data.get('original_data', {})
-                segmented_words_data = entry_data.get('segmented_words', [])
-                
-                # 1. 插入原始数据
-                cursor.execute('''
-                    INSERT INTO raw_entries 
-                    (content_type, original_jp, hiragana, romaji, chinese_meaning, source, tags, processed)
-                    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
-                ''', (
-                    original_data.get('content_type', 'sentence'),
-                    original_data['original_jp'],
-                    original_data['hiragana'],
-                    original_data.get('romaji', ''),
-                    original_data['chinese_meaning'],
-                    original_data.get('source', ''),
-                    json.dumps(original_data.get('tags', {})),
-                    True
-                ))
-                
-                entry_id = cursor.lastrowid
-                word_indices = []
-                
-                # 2. 插入分词数据
-                for word_data in segmented_words_data:
-                    verb_id = None
-                    
-                    # 如果是动词，处理动词原型
-                    if word_data.get('word_type') == 'verb' and word_data.get('grammar_info', {}).get('prototype'):
-                        prototype = word_data['grammar_info']['prototype']
-                        verb_id = get_or_create_verb(cursor, prototype, word_data)
-                    
-                    cursor.execute('''
-                        INSERT INTO segmented_words
-                        (raw_entry_id, word_jp, hiragana, word_type, position, grammar_info, verb_id)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    ''', (
-                        entry_id,
-                        word_data['word_jp'],
-                        word_data['hiragana'],
-                        word_data['word_type'],
-                        word_data['position'],
-                        json.dumps(word_data.get('grammar_info', {})),
-                        verb_id
-                    ))
-                    
-                    word_indices.append(cursor.lastrowid)
-                
-                # 3. 更新raw_entries的word_indices
-                cursor.execute('''
-                    UPDATE raw_entries SET word_indices = ? WHERE id = ?
-                ''', (json.dumps(word_indices), entry_id))
-                
-                # 4. 生成50音索引
-                if entry_id:
-                    create_phonetic_index(cursor, entry_id, original_data['hiragana'], word_indices)
-                
-                results.append({
-                    'entry_id': entry_id,
-                    'original_jp': original_data['original_jp'],
-                    'segmented_count': len(segmented_words_data)
-                })
-            
+        # 大批量（或显式 ?async=1）转为后台任务，避免请求超时；
+        # 没有运行中的入库线程（如 INGESTION_WORKERS=0）时任务不会被处理，改为同步入库
+        threshold = current_app.config.get('INGESTION_ASYNC_THRESHOLD', 0)
+        run_async = request.args.get('async')
+        wants_async = run_async == '1' or (run_async != '0' and threshold and len(preview_entries) > threshold)
+        if wants_async and ingestion_jobs.running:
+            job_id = ingestion_jobs.submit(preview_entries)
             return jsonify({
                 'success': True,
                 'data': {
-                    'total_entries': len(results),
-                    'entries': results,
-                    'verbs_added': sum(1 for e in preview_entries 
-                                     for w in e.get('segmented_words', []) 
-                                     if w.get('word_type') == 'verb')
+                    'job_id': job_id,
+                    'status': 'pending',
+                    'total_entries': len(preview_entries)
                 },
-                'message': f'成功入库{len(results)}条数据'
-            })
-            
+                'message': f'已加入后台入库队列，共{len(preview_entries)}条数据'
+            }), 202
+        
+        def ingest(cursor):
+            results = bulk_ingest(cursor, preview_entries)
+            return results, user_dictionary.collect(cursor, preview_entries)
+        
+        results, (new_words, new_prototypes) = Database.write(ingest)
+        
+        # 事务提交后再更新用户词典和列表总数缓存
+        user_dictionary.add_words(new_words, new_prototypes)
+        total_counts.invalidate()
+        
+        return jsonify({
+            'success': True,
+            'data': {
+                'total_entries': len(results),
+                'entries': results,
+                'verbs_added': sum(1 for e in preview_entries 
+                                 for w in e.get('segmented_words', []) 
+                                 if w.get('word_type') == 'verb')
+            },
+            'message': f'成功入库{len(results)}条数据'
+        })
+        
+    except WriteTimeoutError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'SERVICE_BUSY',
+                'message': str(e)
+            }
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -291,7 +243,12 @@ def confirm_entry(preview_id):
 
 @entries_bp.route('', methods=['GET'])
 def get_entries():
-    """获取录入列表"""
+    """
+    获取录入列表
+    
+    支持两种分页：page/limit（偏移分页），或 cursor（游标分页，取上一页返回的 next_cursor，
+    深翻页不变慢）。with_total=false 时不统计总数；总数按查询条件短时缓存。
+    """
     try:
         # 获取查询参数
         page = request.args.get('page', 1, type=int)
@@ -299,43 +256,110 @@ def get_entries():
         content_type = request.args.get('content_type')
         search = request.args.get('search', '')
         order_by = request.args.get('order_by', 'created_at')
-        order = request.args.get('order', 'desc')
+        order = request.args.get('order', 'desc').lower()
+        cursor_param = request.args.get('cursor')
+        with_total = request.args.get('with_total', 'true').lower() != 'false'
+        
+        # 排序字段白名单（均有索引支持）
+        if order_by not in ENTRY_SORT_COLUMNS and order_by != 'relevance':
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'VALIDATION_ERROR',
+                    'message': f'不支持的排序字段: {order_by}'
+                }
+            }), 400
+        if order not in ('asc', 'desc'):
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'VALIDATION_ERROR',
+                    'message': f'不支持的排序方向: {order}'
+                }
+            }), 400
         
         # 限制每页数量
-        limit = min(limit, current_app.config.get('MAX_PAGE_SIZE', 100))
+        limit = max(min(limit, current_app.config.get('MAX_PAGE_SIZE', 100)), 1)
+        page = max(page, 1)
         offset = (page - 1) * limit
         
-        with Database.get_connection() as conn:
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
             # 构建查询
-            query = 'SELECT * FROM raw_entries WHERE 1=1'
-            count_query = 'SELECT COUNT(*) FROM raw_entries WHERE 1=1'
+            from_clause = 'raw_entries r'
+            conditions = []
             params = []
+            use_fts = False
+            
+            # 添加搜索功能（3个字符以上走全文索引，更短的退回 LIKE）
+            if search:
+                use_fts = len(search) >= SEARCH_MIN_LENGTH and has_search_index(cursor)
+                if use_fts:
+                    from_clause = 'raw_entries_fts JOIN raw_entries r ON r.id = raw_entries_fts.rowid'
+                    conditions.append('raw_entries_fts MATCH ?')
+                    params.append(fts_phrase(search))
+                else:
+                    search_pattern = f'%{search}%'
+                    conditions.append('(r.original_jp LIKE ? OR r.hiragana LIKE ? OR r.chinese_meaning LIKE ? OR r.romaji LIKE ?)')
+                    params.extend([search_pattern, search_pattern, search_pattern, search_pattern])
             
             if content_type:
-                query += ' AND content_type = ?'
-                count_query += ' AND content_type = ?'
+                conditions.append('r.content_type = ?')
                 params.append(content_type)
             
-            # 添加搜索功能
-            if search:
-                search_pattern = f'%{search}%'
-                query += ' AND (original_jp LIKE ? OR hiragana LIKE ? OR chinese_meaning LIKE ? OR romaji LIKE ?)'
-                count_query += ' AND (original_jp LIKE ? OR hiragana LIKE ? OR chinese_meaning LIKE ? OR romaji LIKE ?)'
-                params.extend([search_pattern, search_pattern, search_pattern, search_pattern])
+            # 标签筛选：lesson / scene / grammar_point / difficulty
+            tag_conds, tag_params = tag_conditions(request.args)
+            conditions.extend(tag_conds)
+            params.extend(tag_params)
             
-            # 获取总数
-            cursor.execute(count_query, params)
-            total = cursor.fetchone()[0]
+            # 获取总数（游标之前的过滤条件）
+            total = None
+            if with_total:
+                where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+                count_sql = f'SELECT COUNT(*) FROM {from_clause}{where_clause}'
+                count_params = list(params)
+                total = total_counts.get(
+                    ('entries', count_sql, tuple(count_params)),
+                    lambda: cursor.execute(count_sql, count_params).fetchone()[0]
+                )
             
-            # 排序和分页
-            query += f' ORDER BY {order_by} {order}'
-            query += ' LIMIT ? OFFSET ?'
-            params.extend([limit, offset])
+            # 排序（relevance 按 BM25 相关度，仅全文检索时有效）
+            if order_by == 'relevance':
+                sort_columns = None
+                if use_fts:
+                    weights = ', '.join(str(w) for w in SEARCH_WEIGHTS)
+                    order_clause = f'bm25(raw_entries_fts, {weights}), r.id DESC'
+                else:
+                    order_clause = f'r.created_at {order}, r.id {order}'
+            else:
+                sort_columns = ENTRY_SORT_COLUMNS[order_by]
+                order_clause = ', '.join(f'{column} {order}' for column in sort_columns)
             
-            cursor.execute(query, params)
+            # 游标分页：从上一页最后一行的排序键之后开始
+            if cursor_param:
+                if sort_columns is None:
+                    return jsonify({
+                        'success': False,
+                        'error': {
+                            'code': 'VALIDATION_ERROR',
+                            'message': '按相关度排序不支持游标分页，请使用 page'
+                        }
+                    }), 400
+                conditions.append(keyset_condition(sort_columns, order))
+                params.extend(decode_cursor(cursor_param, len(sort_columns)))
+                offset = 0
+            
+            where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+            
+            # 多取一行判断是否还有下一页
+            cursor.execute(
+                f'SELECT r.* FROM {from_clause}{where_clause} ORDER BY {order_clause} LIMIT ? OFFSET ?',
+                params + [limit + 1, offset]
+            )
             rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
             
             entries = []
             for row in rows:
@@ -344,19 +368,34 @@ def get_entries():
                 entry['word_indices'] = json.loads(entry.get('word_indices', '[]'))
                 entries.append(entry)
             
+            next_cursor = None
+            if has_more and sort_columns:
+                last = rows[-1]
+                next_cursor = encode_cursor([last[column.split('.')[-1]] for column in sort_columns])
+            
             return jsonify({
                 'success': True,
                 'data': {
                     'items': entries,
                     'pagination': {
-                        'page': page,
+                        'page': None if cursor_param else page,
                         'limit': limit,
                         'total': total,
-                        'total_pages': (total + limit - 1) // limit
+                        'total_pages': (total + limit - 1) // limit if total is not None else None,
+                        'has_more': has_more,
+                        'next_cursor': next_cursor
                     }
                 }
             })
             
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'VALIDATION_ERROR',
+                'message': str(e)
+            }
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -370,7 +409,7 @@ def get_entries():
 def get_entry(entry_id):
     """获取录入详情"""
     try:
-        with Database.get_connection() as conn:
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
             # 查询原始数据
@@ -422,25 +461,33 @@ def get_entry(entry_id):
 def delete_entry(entry_id):
     """删除录入"""
     try:
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            
-            cursor.execute('DELETE FROM raw_entries WHERE id = ?', (entry_id,))
-            
-            if cursor.rowcount == 0:
-                return jsonify({
-                    'success': False,
-                    'error': {
-                        'code': 'NOT_FOUND',
-                        'message': f'录入不存在: {entry_id}'
-                    }
-                }), 404
-            
+        deleted = Database.write(
+            lambda cursor: cursor.execute('DELETE FROM raw_entries WHERE id = ?', (entry_id,)).rowcount
+        )
+        total_counts.invalidate()
+        
+        if deleted == 0:
             return jsonify({
-                'success': True,
-                'message': '删除成功'
-            })
+                'success': False,
+                'error': {
+                    'code': 'NOT_FOUND',
+                    'message': f'录入不存在: {entry_id}'
+                }
+            }), 404
+        
+        return jsonify({
+            'success': True,
+            'message': '删除成功'
+        })
             
+    except WriteTimeoutError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'SERVICE_BUSY',
+                'message': str(e)
+            }
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -466,21 +513,36 @@ def get_categories(word_type):
         if not isinstance(target_types, list):
             target_types = [target_types]
         
-        with Database.get_connection() as conn:
+        # 默认返回最新的100个，可用 cursor（上一页的 next_cursor）继续翻页
+        limit = request.args.get('limit', 100, type=int)
+        limit = max(min(limit, current_app.config.get('MAX_PAGE_SIZE', 100)), 1)
+        cursor_param = request.args.get('cursor')
+        
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
-            # 查询所有分词及其对应的原始句子
+            # 查询分词及其对应的原始句子，按句子录入时间倒序
+            # CROSS JOIN 固定连接顺序：沿 idx_entries_created 倒序遍历句子，再按 (raw_entry_id, word_type) 取分词，
+            # LIMIT 提前结束，不需要把所有同词性分词取出来排序
             placeholders = ','.join(['?' for _ in target_types])
+            params = list(target_types)
+            keyset = ''
+            if cursor_param:
+                keyset = ' AND ' + keyset_condition(CATEGORY_SORT_COLUMNS, 'desc')
+                params.extend(decode_cursor(cursor_param, len(CATEGORY_SORT_COLUMNS)))
+            
             cursor.execute(f'''
                 SELECT s.*, r.original_jp as from_sentence, r.romaji, r.created_at
-                FROM segmented_words s
-                JOIN raw_entries r ON s.raw_entry_id = r.id
-                WHERE s.word_type IN ({placeholders})
-                ORDER BY r.created_at DESC
-                LIMIT 100
-            ''', target_types)
+                FROM raw_entries r
+                CROSS JOIN segmented_words s ON s.raw_entry_id = r.id
+                WHERE s.word_type IN ({placeholders}){keyset}
+                ORDER BY r.created_at DESC, r.id DESC, s.id DESC
+                LIMIT ?
+            ''', params + [limit + 1])
             
             rows = cursor.fetchall()
+            has_more = len(rows) > limit
+            rows = rows[:limit]
             
             words = []
             for row in rows:
@@ -488,15 +550,30 @@ def get_categories(word_type):
                 word['grammar_info'] = json.loads(word.get('grammar_info', '{}'))
                 words.append(word)
             
+            next_cursor = None
+            if has_more:
+                last = rows[-1]
+                next_cursor = encode_cursor([last['created_at'], last['raw_entry_id'], last['id']])
+            
             return jsonify({
                 'success': True,
                 'data': {
                     'type': word_type,
                     'count': len(words),
-                    'words': words
+                    'words': words,
+                    'has_more': has_more,
+                    'next_cursor': next_cursor
                 }
             })
             
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'VALIDATION_ERROR',
+                'message': str(e)
+            }
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
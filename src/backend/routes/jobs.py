@@ -0,0 +1,112 @@
+from flask import Blueprint, request, jsonify
+from ..models.database import WriteTimeoutError
+from ..services.jobs import ingestion_jobs
+
+jobs_bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+@jobs_bp.route('', methods=['POST'])
+def create_job():
+    """提交后台入库任务（请求体与确认入库相同）"""
+    try:
+        data = request.get_json() or {}
+        entries = data.get('entries', [])
+
+        if not entries:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'VALIDATION_ERROR',
+                    'message': '没有要入库的数据'
+                }
+            }), 400
+
+        # 没有运行中的入库线程（INGESTION_WORKERS=0，或调试模式下的重载监视进程）时任务永远不会执行
+        if not ingestion_jobs.running:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'SERVICE_UNAVAILABLE',
+                    'message': '后台入库未启用，请改用确认入库接口同步入库'
+                }
+            }), 503
+
+        job_id = ingestion_jobs.submit(entries)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'job_id': job_id,
+                'status': 'pending',
+                'total_entries': len(entries)
+            },
+            'message': f'已加入后台入库队列，共{len(entries)}条数据'
+        }), 202
+
+    except WriteTimeoutError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'SERVICE_BUSY',
+                'message': str(e)
+            }
+        }), 503
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        }), 500
+
+@jobs_bp.route('', methods=['GET'])
+def list_jobs():
+    """最近的入库任务"""
+    try:
+        limit = min(request.args.get('limit', 20, type=int), 100)
+
+        return jsonify({
+            'success': True,
+            'data': {
+                'jobs': ingestion_jobs.recent(limit)
+            }
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        }), 500
+
+@jobs_bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """入库任务进度（已处理/失败条数和逐条错误）"""
+    try:
+        error_limit = min(request.args.get('error_limit', 100, type=int), 1000)
+        job = ingestion_jobs.get(job_id, error_limit)
+
+        if not job:
+            return jsonify({
+                'success': False,
+                'error': {
+                    'code': 'NOT_FOUND',
+                    'message': f'任务不存在: {job_id}'
+                }
+            }), 404
+
+        return jsonify({
+            'success': True,
+            'data': job
+        })
+
+    except Exception as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'INTERNAL_ERROR',
+                'message': str(e)
+            }
+        }), 500
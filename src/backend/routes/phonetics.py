@@ -1,6 +1,7 @@
 from flask import Blueprint, jsonify, request
 import json
 from ..models.database import Database
+from ..services.ingestion import GOJYUON
 
 phonetics_bp = Blueprint('phonetics', __name__, url_prefix='/api/phonetics')
 
@@ -8,7 +9,7 @@ phonetics_bp = Blueprint('phonetics', __name__, url_prefix='/api/phonetics')
 def get_phonetics():
     """获取50音图表"""
     try:
-        with Database.get_connection() as conn:
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
             # 查询所有50音
@@ -72,7 +73,7 @@ def search_by_phonetic(character):
         entry_type = request.args.get('type', 'all')
         match_type = request.args.get('match_type', 'exact')
         
-        with Database.get_connection() as conn:
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
             results = {
@@ -101,13 +102,24 @@ def search_by_phonetic(character):
             
             # 查询分词数据
             if entry_type in ['all', 'segmented']:
-                cursor.execute('''
-                    SELECT s.*, e.original_jp as from_sentence, e.created_at
-                    FROM segmented_words s
-                    JOIN raw_entries e ON s.raw_entry_id = e.id
-                    WHERE s.hiragana LIKE ?
-                    ORDER BY e.created_at DESC
-                ''', (f'%{character}%',))
+                if character in GOJYUON:
+                    # 走分词的50音倒排
+                    cursor.execute('''
+                        SELECT s.*, e.original_jp as from_sentence, e.created_at
+                        FROM phonetic_index p
+                        JOIN segmented_words s ON s.id = p.entry_id
+                        JOIN raw_entries e ON s.raw_entry_id = e.id
+                        WHERE p.phonetic = ? AND p.entry_table = 'segmented_words'
+                        ORDER BY e.created_at DESC
+                    ''', (character,))
+                else:
+                    cursor.execute('''
+                        SELECT s.*, e.original_jp as from_sentence, e.created_at
+                        FROM segmented_words s
+                        JOIN raw_entries e ON s.raw_entry_id = e.id
+                        WHERE s.hiragana LIKE ?
+                        ORDER BY e.created_at DESC
+                    ''', (f'%{character}%',))
                 
                 for row in cursor.fetchall():
                     word = dict(row)
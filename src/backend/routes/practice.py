@@ -1,115 +1,167 @@
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, make_response
 import json
+import hashlib
 from datetime import datetime, timedelta
 import random
-from ..models.database import Database
+from typing import Optional
+from ..models.database import Database, WriteTimeoutError
+from ..services.tags import TAG_FILTERS, tag_conditions
+from ..services.scheduler import answer_quality, record_reviews, log_answers, utc_now, format_timestamp
+from ..services.sampling import sample_sentences
+from ..services.question_bank import load_questions
+from ..services.distractors import build_options
 
 practice_bp = Blueprint('practice', __name__, url_prefix='/api/practice')
 
+# 每日一练默认题量
+DEFAULT_DAILY_COUNT = 20
+
 @practice_bp.route('/daily', methods=['GET'])
 def generate_daily_practice():
-    """生成每日一练"""
+    """
+    获取每日一练（可按 lesson / scene / grammar_point / difficulty 限定范围）
+    
+    题目由 (日期, 题量, 用户, 标签筛选) 派生的种子生成：当天第一次请求时生成并保存，
+    之后同样参数的请求直接返回保存的题目（带 ETag，未变化时返回 304）；
+    ?regenerate=1 强制换一批新题。不同参数的题目按 generation_key 分别保存，互不覆盖，
+    提交答案和生成 Prompt 时带上响应中的 generation_key（不带时指默认参数的那一套）。
+    """
     try:
-        count = request.args.get('count', 20, type=int)
+        count = request.args.get('count', DEFAULT_DAILY_COUNT, type=int)
         count = min(count, 50)  # 最多50题
+        regenerate = request.args.get('regenerate', '').lower() in ('1', 'true')
+        
+        now = datetime.now()
+        today = now.strftime('%Y-%m-%d')
+        generation_key = _generation_key(request.args, count)
+        
+        # 今天已按同样参数生成过：按 (practice_date, generation_key) 唯一索引取出保存的题目
+        if not regenerate:
+            with Database.read_connection() as conn:
+                cursor = conn.cursor()
+                cursor.execute('''
+                    SELECT questions, etag FROM daily_practice WHERE practice_date = ? AND generation_key = ?
+                ''', (today, generation_key))
+                row = cursor.fetchone()
+            if row and row['etag']:
+                return _daily_response(today, generation_key, row['questions'], row['etag'])
         
-        with Database.get_connection() as conn:
+        # 同一天同样参数的种子固定，重新生成的结果相同；regenerate 时换一个随机种子
+        seed = random.SystemRandom().getrandbits(64) if regenerate else _daily_seed(today, generation_key)
+        rng = random.Random(seed)
+        
+        # 标签筛选条件
+        tag_conds, tag_params = tag_conditions(request.args, 'id')
+        tag_filter = ''.join(f' AND {cond}' for cond in tag_conds)
+        probe_conds, _ = tag_conditions(request.args, 'raw_entries.id', correlated=True)
+        probe_filter = ''.join(f' AND {cond}' for cond in probe_conds)
+        due_conds, due_params = tag_conditions(request.args, 'r.id')
+        due_filter = ''.join(f' AND {cond}' for cond in due_conds)
+        
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
-            now = datetime.now()
             questions = []
             
-            # 1. 获取最近7天的句子（新知识，40%）
-            cursor.execute('''
-                SELECT * FROM raw_entries
-                WHERE created_at >= datetime('now', '-7 days')
-                AND content_type = 'sentence'
-                AND processed = 1
-                ORDER BY created_at DESC
-            ''')
-            recent_entries = [dict(row) for row in cursor.fetchall()]
+            # 0. 到期复习（CROSS JOIN 固定从 idx_review_due 做 due 的范围扫描，最早到期的优先）
+            cursor.execute(f'''
+                SELECT r.* FROM review_schedule s
+                CROSS JOIN raw_entries r ON r.id = s.entry_id
+                WHERE s.due <= datetime('now')
+                AND r.content_type = 'sentence'
+                AND r.processed = 1{due_filter}
+                ORDER BY s.due
+                LIMIT ?
+            ''', due_params + [count])
+            due_entries = [dict(row) for row in cursor.fetchall()]
             
-            # 2. 获取7-30天的句子（30%）
-            cursor.execute('''
-                SELECT * FROM raw_entries
-                WHERE created_at BETWEEN datetime('now', '-30 days') AND datetime('now', '-7 days')
-                AND content_type = 'sentence'
-                AND processed = 1
-                ORDER BY created_at DESC
-            ''')
-            medium_entries = [dict(row) for row in cursor.fetchall()]
+            # 以下按录入时间分层抽取新句子（复习过的由复习计划安排，不再参与），
+            # 每层在 SQL 里按 rowid 随机探测，不把整层读进内存
+            unscheduled = ' AND NOT EXISTS (SELECT 1 FROM review_schedule WHERE entry_id = raw_entries.id)'
+            utc = utc_now()
+            week_ago = format_timestamp(utc - timedelta(days=7))
+            month_ago = format_timestamp(utc - timedelta(days=30))
             
-            # 3. 获取30天以上的句子（20%）
-            cursor.execute('''
-                SELECT * FROM raw_entries
-                WHERE created_at < datetime('now', '-30 days')
-                AND content_type = 'sentence'
-                AND processed = 1
-                ORDER BY RANDOM()
-            ''')
-            old_entries = [dict(row) for row in cursor.fetchall()]
+            # 到期复习之外的题量按区间分配：新知识40%、近期30%、旧知识20%、随机10%
+            remaining = count - len(due_entries)
+            new_count = int(remaining * 0.4)
+            medium_count = int(remaining * 0.3)
+            old_count = int(remaining * 0.2)
+            random_count = remaining - new_count - medium_count - old_count
             
-            # 4. 计算各区间选题数量
-            new_count = int(count * 0.4)
-            medium_count = int(count * 0.3)
-            old_count = int(count * 0.2)
-            random_count = count - new_count - medium_count - old_count
+            selected = list(due_entries)
+            due_ids = {entry['id'] for entry in due_entries}
             
-            selected = []
+            def sample(k, since=None, until=None):
+                return sample_sentences(cursor, k, since, until, unscheduled + probe_filter, tag_params,
+                                        exclude=[entry['id'] for entry in selected], rng=rng,
+                                        scan_filters=unscheduled + tag_filter, scan_params=tag_params)
             
-            # 选择新学内容
-            if len(recent_entries) >= new_count:
-                selected.extend(random.sample(recent_entries, new_count))
-            else:
-                selected.extend(recent_entries)
-                medium_count += new_count - len(recent_entries)
+            # 1. 最近7天的句子（新知识），不足的部分顺延到下一层
+            entries = sample(new_count, since=week_ago)
+            selected.extend(entries)
+            medium_count += new_count - len(entries)
             
-            # 选择近期内容
-            if len(medium_entries) >= medium_count:
-                selected.extend(random.sample(medium_entries, medium_count))
-            else:
-                selected.extend(medium_entries)
-                old_count += medium_count - len(medium_entries)
+            # 2. 7-30天的句子
+            entries = sample(medium_count, since=month_ago, until=week_ago)
+            selected.extend(entries)
+            old_count += medium_count - len(entries)
             
-            # 选择旧知识
-            if len(old_entries) >= old_count:
-                selected.extend(random.sample(old_entries, old_count))
-            else:
-                selected.extend(old_entries)
-                random_count += old_count - len(old_entries)
+            # 3. 30天以上的句子
+            entries = sample(old_count, until=month_ago)
+            selected.extend(entries)
+            random_count += old_count - len(entries)
             
-            # 5. 生成题目
-            for i, entry in enumerate(selected[:count], 1):
-                question = _create_question(entry, i, now)
-                questions.append(question)
-            
-            # 打乱顺序
-            random.shuffle(questions)
+            # 4. 随机（任意时间录入）
+            selected.extend(sample(random_count))
             
-            # 6. 保存到数据库
-            today = now.strftime('%Y-%m-%d')
-            questions_json = json.dumps([q for q in questions])
+            # 5. 新句子不够时（如已全部复习过），用尚未到期的复习条目补齐，最早到期的优先（同样走 idx_review_due）
+            if len(selected) < count:
+                cursor.execute(f'''
+                    SELECT r.* FROM review_schedule s
+                    CROSS JOIN raw_entries r ON r.id = s.entry_id
+                    WHERE s.due > datetime('now')
+                    AND r.content_type = 'sentence'
+                    AND r.processed = 1{due_filter}
+                    ORDER BY s.due
+                    LIMIT ?
+                ''', due_params + [count - len(selected)])
+                selected.extend(dict(row) for row in cursor.fetchall())
             
-            cursor.execute('''
-                INSERT OR REPLACE INTO daily_practice
-                (practice_date, questions, completed, created_at)
-                VALUES (?, ?, 0, ?)
-            ''', (today, questions_json, now))
+            # 6. 从题库取题（入库时已生成，这里只按条目做索引查询），并按相近条目生成选择题选项
+            selected = selected[:count]
+            bank = load_questions(cursor, [entry['id'] for entry in selected])
+            for entry in selected:
+                question = _create_question(entry, bank.get(entry['id'], []), len(questions) + 1, now, rng)
+                if question is None:
+                    continue
+                question['is_due'] = entry['id'] in due_ids
+                question['options'] = build_options(cursor, entry, question, rng)
+                questions.append(question)
             
-            return jsonify({
-                'success': True,
-                'data': {
-                    'date': today,
-                    'total_questions': len(questions),
-                    'questions': questions,
-                    'stats': {
-                        'new_content': len([q for q in questions if q.get('is_new')]),
-                        'recent_review': len([q for q in questions if 0 < q.get('days_since_created', 0) <= 30]),
-                        'old_review': len([q for q in questions if q.get('days_since_created', 0) > 30])
-                    }
-                }
-            })
+            # 打乱顺序
+            rng.shuffle(questions)
+        
+        # 7. 保存到数据库（只替换同样参数的那一套，其他参数的题目和作答记录不受影响）
+        questions_json = json.dumps([q for q in questions])
+        etag = hashlib.sha1(f'{today}|{generation_key}|{questions_json}'.encode('utf-8')).hexdigest()
+        
+        Database.write(lambda cursor: cursor.execute('''
+            INSERT OR REPLACE INTO daily_practice
+            (practice_date, questions, generation_key, etag, completed, created_at)
+            VALUES (?, ?, ?, ?, 0, ?)
+        ''', (today, questions_json, generation_key, etag, now)))
+        
+        return _daily_response(today, generation_key, questions, etag)
             
+    except WriteTimeoutError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'SERVICE_BUSY',
+                'message': str(e)
+            }
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -174,11 +226,10 @@ def generate_prompt():
         
         # 保存到今日练习记录
         today = datetime.now().strftime('%Y-%m-%d')
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
-            cursor.execute('''
-                UPDATE daily_practice SET prompt_text = ? WHERE practice_date = ?
-            ''', (prompt, today))
+        generation_key = data.get('generation_key') or _generation_key({}, DEFAULT_DAILY_COUNT)
+        Database.write(lambda cursor: cursor.execute('''
+            UPDATE daily_practice SET prompt_text = ? WHERE practice_date = ? AND generation_key = ?
+        ''', (prompt, today, generation_key)))
         
         return jsonify({
             'success': True,
@@ -189,6 +240,14 @@ def generate_prompt():
             }
         })
         
+    except WriteTimeoutError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'SERVICE_BUSY',
+                'message': str(e)
+            }
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -204,6 +263,7 @@ def submit_practice():
     try:
         data = request.get_json()
         practice_date = data.get('date', datetime.now().strftime('%Y-%m-%d'))
+        generation_key = data.get('generation_key') or _generation_key({}, DEFAULT_DAILY_COUNT)
         answers = data.get('answers', [])
         completed = data.get('completed', True)
         
@@ -224,14 +284,42 @@ def submit_practice():
         
         weak_points = list(set(weak_points))[:3]  # 最多3个
         
-        # 保存结果
-        with Database.get_connection() as conn:
-            cursor = conn.cursor()
+        # 保存结果，写入逐题作答记录，并按作答结果更新复习计划（同一事务）
+        # 重复提交（重试、连点）时已记录过的题不再写作答记录、不再更新复习计划
+        def save(cursor):
+            cursor.execute('''
+                SELECT questions, answers FROM daily_practice WHERE practice_date = ? AND generation_key = ?
+            ''', (practice_date, generation_key))
+            row = cursor.fetchone()
+            stored = {q.get('id'): q for q in json.loads(row[0] or '[]')} if row else {}
+            previous = json.loads(row[1] or '[]') if row else []
+            answered = {a.get('question_id') for a in previous if a.get('question_id') is not None}
+            new_answers = [a for a in answers if a.get('question_id') is None or a.get('question_id') not in answered]
+            
+            reviews = []
+            logs = []
+            for answer in new_answers:
+                if row:
+                    # 有保存的题目时只认题目对应的条目，不接受客户端指定的条目（不在这套题里的答案忽略）
+                    question = stored.get(answer.get('question_id'), {})
+                    entry_id = question.get('source_entry_id')
+                    question_type = question.get('type')
+                else:
+                    entry_id = answer.get('source_entry_id')
+                    question_type = answer.get('question_type')
+                if entry_id:
+                    reviews.append((entry_id, answer_quality(answer)))
+                    logs.append((entry_id, question_type, answer.get('is_correct', False)))
+            
             cursor.execute('''
                 UPDATE daily_practice
                 SET answers = ?, completed = ?, score = ?
-                WHERE practice_date = ?
-            ''', (json.dumps(answers), completed, score, practice_date))
+                WHERE practice_date = ? AND generation_key = ?
+            ''', (json.dumps(previous + new_answers), completed, score, practice_date, generation_key))
+            log_answers(cursor, logs)
+            return record_reviews(cursor, reviews)
+        
+        scheduled = Database.write(save)
         
         return jsonify({
             'success': True,
@@ -240,10 +328,19 @@ def submit_practice():
                 'total': total,
                 'accuracy': round(correct_count / total, 2) if total > 0 else 0,
                 'wrong_questions': [i+1 for i, a in enumerate(answers) if not a.get('is_correct', False)],
-                'review_recommendations': weak_points
+                'review_recommendations': weak_points,
+                'scheduled_entries': scheduled
             }
         })
         
+    except WriteTimeoutError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'SERVICE_BUSY',
+                'message': str(e)
+            }
+        }), 503
     except Exception as e:
         return jsonify({
             'success': False,
@@ -253,36 +350,81 @@ def submit_practice():
             }
         }), 500
 
-def _create_question(entry: dict, question_id: int, now: datetime) -> dict:
-    """根据句子内容创建题目（只处理句子类型）"""
+def _generation_key(args, count: int) -> str:
+    """决定题目内容的请求参数（题量、用户、标签筛选），同一天参数相同则题目相同"""
+    params = {'count': count, 'user': args.get('user', '')}
+    for param in TAG_FILTERS:
+        if args.get(param):
+            params[param] = args.get(param)
+    return json.dumps(params, ensure_ascii=False, sort_keys=True)
+
+def _daily_seed(today: str, generation_key: str) -> int:
+    """由日期和请求参数派生的随机种子"""
+    digest = hashlib.sha256(f'{today}|{generation_key}'.encode('utf-8')).digest()
+    return int.from_bytes(digest[:8], 'big')
+
+def _daily_response(today: str, generation_key: str, questions, etag: str):
+    """每日一练响应（questions 可以是保存的 JSON 文本）；客户端带 If-None-Match 且题目未变时返回 304"""
+    if request.if_none_match.contains(etag):
+        response = make_response('', 304)
+    else:
+        if isinstance(questions, str):
+            questions = json.loads(questions)
+        response = jsonify({
+            'success': True,
+            'data': {
+                'date': today,
+                'generation_key': generation_key,
+                'total_questions': len(questions),
+                'questions': questions,
+                'stats': {
+                    'due_review': len([q for q in questions if q.get('is_due')]),
+                    'new_content': len([q for q in questions if q.get('is_new')]),
+                    'recent_review': len([q for q in questions if 0 < q.get('days_since_created', 0) <= 30]),
+                    'old_review': len([q for q in questions if q.get('days_since_created', 0) > 30])
+                }
+            }
+        })
+    response.set_etag(etag)
+    # 允许浏览器缓存，但每次都要带 ETag 验证（重新生成后立即可见）
+    response.headers['Cache-Control'] = 'no-cache'
+    return response
+
+def _create_question(entry: dict, candidates: list, question_id: int, now: datetime, rng=random) -> Optional[dict]:
+    """
+    从题库中为句子选一道题：先随机选题型，再在该题型的题里选一道
+    
+    Args:
+        candidates: 该句子可出的题（question_bank 行，见 load_questions）
+        rng: 随机数生成器（带种子时结果可复现）
+    
+    Returns:
+        题目；题库里没有该句子的题时为 None
+    """
+    if not candidates:
+        return None
+    
     # 计算已创建天数
     created_at = datetime.fromisoformat(entry['created_at'].replace('Z', '+00:00'))
     days_ago = (now - created_at).days
     is_new = days_ago <= 7
     
-    # 随机选择题型（句子类型专用）
-    question_types = ['translation_jp_to_cn', 'translation_cn_to_jp']
-    q_type = random.choice(question_types)
+    # 随机选择题型（翻译两个方向；句中有动词时还有活用题）
+    question_types = sorted({q['question_type'] for q in candidates})
+    q_type = rng.choice(question_types)
+    bank_question = rng.choice([q for q in candidates if q['question_type'] == q_type])
     
-    if q_type == 'translation_jp_to_cn':
-        return {
-            'id': question_id,
-            'type': 'translation_jp_to_cn',
-            'question': entry['original_jp'],
-            'correct_answer': entry['chinese_meaning'],
-            'hint': f"读音: {entry['hiragana']}",
-            'source_entry_id': entry['id'],
-            'is_new': is_new,
-            'days_since_created': days_ago
-        }
-    else:
-        return {
-            'id': question_id,
-            'type': 'translation_cn_to_jp',
-            'question': entry['chinese_meaning'],
-            'correct_answer': entry['original_jp'],
-            'hint': f"读音: {entry.get('romaji', entry['hiragana'])}",
-            'source_entry_id': entry['id'],
-            'is_new': is_new,
-            'days_since_created': days_ago
-        }
+    question = {
+        'id': question_id,
+        'type': q_type,
+        'question': bank_question['question'],
+        'correct_answer': bank_question['correct_answer'],
+        'hint': bank_question['hint'],
+        'difficulty': bank_question['difficulty'],
+        'source_entry_id': entry['id'],
+        'is_new': is_new,
+        'days_since_created': days_ago
+    }
+    if bank_question['verb_id']:
+        question['verb_id'] = bank_question['verb_id']
+    return question
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify
-from datetime import datetime, timedelta
 from ..models.database import Database
+from ..services.segment_cache import segmentation_cache
 
 stats_bp = Blueprint('stats', __name__, url_prefix='/api/stats')
 
@@ -8,43 +8,31 @@ stats_bp = Blueprint('stats', __name__, url_prefix='/api/stats')
 def get_overview():
     """获取学习统计概览"""
     try:
-        with Database.get_connection() as conn:
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
-            # 1. 总录入数
-            cursor.execute('SELECT COUNT(*) FROM raw_entries')
-            total_entries = cursor.fetchone()[0]
-            
-            # 2. 总单词数（分词表）
-            cursor.execute('SELECT COUNT(*) FROM segmented_words')
-            total_words = cursor.fetchone()[0]
-            
-            # 3. 动词数量
-            cursor.execute('SELECT COUNT(*) FROM verb_master')
-            total_verbs = cursor.fetchone()[0]
+            # 计数由触发器维护（见 Database.init_stats），这里只读几行
+            # 1-3. 总录入数、总单词数、动词数量
+            cursor.execute('SELECT name, value FROM stats_counters')
+            counters = {row[0]: row[1] for row in cursor.fetchall()}
+            total_entries = counters.get('raw_entries', 0)
+            total_words = counters.get('segmented_words', 0)
+            total_verbs = counters.get('verb_master', 0)
             
             # 4. 今日新学
-            today = datetime.now().strftime('%Y-%m-%d')
-            cursor.execute('''
-                SELECT COUNT(*) FROM raw_entries 
-                WHERE date(created_at) = date('now')
-            ''')
-            today_new = cursor.fetchone()[0]
+            cursor.execute("SELECT entries FROM stats_daily WHERE day = date('now')")
+            row = cursor.fetchone()
+            today_new = row[0] if row else 0
             
-            # 5. 连续学习天数（简化计算：最近7天内有多少天有录入）
+            # 5. 连续学习天数（简化计算：含今天在内的最近7个自然日中有多少天有录入）
             cursor.execute('''
-                SELECT COUNT(DISTINCT date(created_at)) 
-                FROM raw_entries 
-                WHERE created_at >= datetime('now', '-7 days')
+                SELECT COUNT(*) FROM stats_daily
+                WHERE day >= date('now', '-6 days') AND entries > 0
             ''')
             streak_days = cursor.fetchone()[0]
             
             # 6. 分类统计
-            cursor.execute('''
-                SELECT word_type, COUNT(*) 
-                FROM segmented_words 
-                GROUP BY word_type
-            ''')
+            cursor.execute('SELECT word_type, count FROM stats_word_types WHERE count > 0')
             type_stats = {row[0]: row[1] for row in cursor.fetchall()}
             
             return jsonify({
@@ -67,3 +55,11 @@ def get_overview():
                 'message': str(e)
             }
         }), 500
+
+@stats_bp.route('/segmenter-cache', methods=['GET'])
+def get_segmenter_cache_stats():
+    """获取分词缓存命中统计"""
+    return jsonify({
+        'success': True,
+        'data': segmentation_cache.stats()
+    })
@@ -1,58 +1,157 @@
-from flask import Blueprint, jsonify
+from flask import Blueprint, Response, request, jsonify, current_app, stream_with_context
 from ..models.database import Database
+from ..services.pagination import CursorError, decode_cursor, encode_cursor, keyset_condition, total_counts
 import json
 
 verbs_bp = Blueprint('verbs', __name__, url_prefix='/api/verbs')
 
+# 动词列表的排序键（末列为 id，保证游标唯一）
+VERB_SORT_COLUMNS = ('first_seen', 'id')
+
+# 可筛选的字段
+VERB_FILTERS = ('verb_class', 'verb_group')
+
+# 活用形式 IN (...) 查询、流式导出每批的动词数
+QUERY_BATCH = 500
+
+def load_conjugations(cursor, verb_ids: list) -> dict:
+    """
+    批量读取活用形式（按 IN 分批，避免每个动词一次查询）
+    
+    Returns:
+        {verb_id: {form_type: {...}}}
+    """
+    conjugations = {verb_id: {} for verb_id in verb_ids}
+    for i in range(0, len(verb_ids), QUERY_BATCH):
+        batch = verb_ids[i:i + QUERY_BATCH]
+        placeholders = ','.join(['?' for _ in batch])
+        cursor.execute(f'''
+            SELECT verb_id, form_type, form_name, form_value, reading, example, politeness
+            FROM verb_conjugations
+            WHERE verb_id IN ({placeholders})
+            ORDER BY verb_id, id
+        ''', batch)
+        for conj in cursor.fetchall():
+            conjugations[conj['verb_id']][conj['form_type']] = {
+                'form_name': conj['form_name'],
+                'form_value': conj['form_value'],
+                'reading': conj['reading'],
+                'example': conj['example'],
+                'politeness': conj['politeness']
+            }
+    return conjugations
+
+def fetch_verbs(cursor, conditions: list, params: list, limit: int = None) -> list:
+    """按条件读取一批动词（含活用形式），按首次出现时间倒序"""
+    query = 'SELECT * FROM verb_master'
+    if conditions:
+        query += ' WHERE ' + ' AND '.join(conditions)
+    query += ' ORDER BY first_seen DESC, id DESC'
+    if limit is not None:
+        query += ' LIMIT ?'
+        params = params + [limit]
+    
+    cursor.execute(query, params)
+    verbs = [dict(row) for row in cursor.fetchall()]
+    
+    conjugations = load_conjugations(cursor, [verb['id'] for verb in verbs])
+    for verb in verbs:
+        verb['conjugations'] = conjugations[verb['id']]
+    return verbs
+
+def stream_verbs(conditions: list, params: list):
+    """
+    逐批导出动词（NDJSON，每行一个动词），内存占用与总数无关
+    
+    每批按游标重新借用连接，取完即归还后再输出：慢速客户端下载期间不占用连接池，
+    也不长时间持有读快照（否则会阻止 WAL 检查点）。
+    """
+    after = []
+    while True:
+        batch_conditions = list(conditions)
+        if after:
+            batch_conditions.append(keyset_condition(VERB_SORT_COLUMNS, 'desc'))
+        with Database.read_connection() as conn:
+            verbs = fetch_verbs(conn.cursor(), batch_conditions, params + after, QUERY_BATCH)
+        for verb in verbs:
+            yield json.dumps(verb, ensure_ascii=False) + '\n'
+        if len(verbs) < QUERY_BATCH:
+            break
+        after = [verbs[-1][c] for c in VERB_SORT_COLUMNS]
+
 @verbs_bp.route('', methods=['GET'])
 def get_verbs():
-    """获取所有动词列表"""
+    """
+    获取动词列表
+    
+    - verb_class / verb_group: 筛选
+    - limit / cursor: 游标分页（cursor 取上一页的 next_cursor），不传 limit 时按默认每页条数
+    - with_total=false: 不统计总数（total 为 null）；总数按筛选条件短时缓存
+    - format=ndjson: 流式导出全部（每行一个动词）
+    """
     try:
-        with Database.get_connection() as conn:
+        limit = request.args.get('limit', current_app.config.get('DEFAULT_PAGE_SIZE', 20), type=int)
+        limit = max(min(limit, current_app.config.get('MAX_PAGE_SIZE', 100)), 1)
+        cursor_param = request.args.get('cursor')
+        with_total = request.args.get('with_total', 'true').lower() != 'false'
+        
+        conditions = []
+        params = []
+        for field in VERB_FILTERS:
+            value = request.args.get(field)
+            if value:
+                conditions.append(f'{field} = ?')
+                params.append(value)
+        
+        if request.args.get('format') == 'ndjson':
+            return Response(
+                stream_with_context(stream_verbs(conditions, params)),
+                mimetype='application/x-ndjson'
+            )
+        
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
-            # 获取所有动词
-            cursor.execute('''
-                SELECT * FROM verb_master 
-                ORDER BY first_seen DESC
-            ''')
-            verb_rows = cursor.fetchall()
+            # 总数（游标之前的筛选条件）
+            total = None
+            if with_total:
+                where_clause = ' WHERE ' + ' AND '.join(conditions) if conditions else ''
+                count_sql = f'SELECT COUNT(*) FROM verb_master{where_clause}'
+                count_params = list(params)
+                total = total_counts.get(
+                    ('verbs', count_sql, tuple(count_params)),
+                    lambda: cursor.execute(count_sql, count_params).fetchone()[0]
+                )
             
-            verbs = []
-            for verb_row in verb_rows:
-                verb = dict(verb_row)
-                verb_id = verb['id']
-                
-                # 获取该动词的所有活用形式
-                cursor.execute('''
-                    SELECT * FROM verb_conjugations 
-                    WHERE verb_id = ? 
-                    ORDER BY id
-                ''', (verb_id,))
-                conj_rows = cursor.fetchall()
-                
-                conjugations = {}
-                for conj_row in conj_rows:
-                    conj = dict(conj_row)
-                    conjugations[conj['form_type']] = {
-                        'form_name': conj['form_name'],
-                        'form_value': conj['form_value'],
-                        'reading': conj['reading'],
-                        'example': conj['example'],
-                        'politeness': conj['politeness']
-                    }
-                
-                verb['conjugations'] = conjugations
-                verbs.append(verb)
+            if cursor_param:
+                conditions.append(keyset_condition(VERB_SORT_COLUMNS, 'desc'))
+                params.extend(decode_cursor(cursor_param, len(VERB_SORT_COLUMNS)))
+            
+            # 多取一行判断是否还有下一页
+            verbs = fetch_verbs(cursor, conditions, params, limit + 1)
+            has_more = len(verbs) > limit
+            verbs = verbs[:limit]
+            
+            data = {
+                'total': total,
+                'verbs': verbs,
+                'has_more': has_more,
+                'next_cursor': encode_cursor([verbs[-1][c] for c in VERB_SORT_COLUMNS]) if has_more else None
+            }
             
             return jsonify({
                 'success': True,
-                'data': {
-                    'total': len(verbs),
-                    'verbs': verbs
-                }
+                'data': data
             })
             
+    except CursorError as e:
+        return jsonify({
+            'success': False,
+            'error': {
+                'code': 'VALIDATION_ERROR',
+                'message': str(e)
+            }
+        }), 400
     except Exception as e:
         return jsonify({
             'success': False,
@@ -66,7 +165,7 @@ def get_verbs():
 def get_verb_detail(verb_id):
     """获取单个动词详情"""
     try:
-        with Database.get_connection() as conn:
+        with Database.read_connection() as conn:
             cursor = conn.cursor()
             
             # 获取动词信息
@@ -0,0 +1,87 @@
+import random
+from typing import List, Optional
+
+from .question_bank import CONJUGATION_TYPE
+
+# 每道选择题的干扰项个数（加上正确答案共 4 个选项）
+DISTRACTOR_COUNT = 3
+
+# 翻译题：(排序列, 选项列)
+# 按读音 / 中文意思排序后相邻的条目就是读音或意思相近的条目，
+# 由 idx_entries_reading / idx_entries_meaning 支持，入库时随索引增量维护
+NEIGHBOUR_COLUMNS = {
+    'translation_cn_to_jp': ('hiragana', 'original_jp'),
+    'translation_jp_to_cn': ('chinese_meaning', 'chinese_meaning')
+}
+
+
+def _neighbours(cursor, entry: dict, sort_column: str, value_column: str, k: int) -> List[str]:
+    """同类条目中按 sort_column 排在该条目前后的各 k 条，由近到远前后交替"""
+    key = entry[sort_column]
+    cursor.execute(f'''
+        SELECT {value_column} FROM raw_entries
+        WHERE content_type = ? AND {sort_column} < ?
+        ORDER BY {sort_column} DESC LIMIT ?
+    ''', (entry['content_type'], key, k))
+    before = [row[0] for row in cursor.fetchall()]
+    cursor.execute(f'''
+        SELECT {value_column} FROM raw_entries
+        WHERE content_type = ? AND {sort_column} > ?
+        ORDER BY {sort_column} LIMIT ?
+    ''', (entry['content_type'], key, k))
+    after = [row[0] for row in cursor.fetchall()]
+
+    merged = []
+    for i in range(k):
+        merged.extend(side[i] for side in (before, after) if i < len(side))
+    return merged
+
+
+def find_distractors(cursor, entry: dict, question: dict, k: int = DISTRACTOR_COUNT,
+                     rng: Optional[random.Random] = None) -> List[str]:
+    """
+    为题目找 k 个干扰项（每道题只做一两次索引查找）
+
+    翻译题取读音（中译日）或中文意思（日译中）排序相邻的条目；
+    活用题取同一动词的其他活用形（题库的 idx_bank_verb）。
+
+    Args:
+        entry: 题目来源的 raw_entries 行
+        question: 题目（见 routes/practice._create_question）
+        rng: 随机数生成器（带种子时结果可复现）
+
+    Returns:
+        干扰项，与正确答案不重复；语料不足时可能少于 k 个
+    """
+    rng = rng or random
+    answer = question['correct_answer']
+
+    if question['type'] in NEIGHBOUR_COLUMNS:
+        sort_column, value_column = NEIGHBOUR_COLUMNS[question['type']]
+        # 多取几条，抵消与答案相同或彼此重复的
+        candidates = _neighbours(cursor, entry, sort_column, value_column, k + 1)
+    elif question['type'] == CONJUGATION_TYPE and question.get('verb_id'):
+        cursor.execute('''
+            SELECT correct_answer FROM question_bank WHERE verb_id = ? AND question_type = ?
+        ''', (question['verb_id'], CONJUGATION_TYPE))
+        candidates = [row[0] for row in cursor.fetchall()]
+        rng.shuffle(candidates)
+    else:
+        return []
+
+    distractors = []
+    for candidate in candidates:
+        if candidate and candidate != answer and candidate not in distractors:
+            distractors.append(candidate)
+    return distractors[:k]
+
+
+def build_options(cursor, entry: dict, question: dict, rng: Optional[random.Random] = None) -> List[str]:
+    """选择题选项（干扰项 + 正确答案，随机顺序）；找不到干扰项时为空，前端退回填空作答"""
+    rng = rng or random
+    distractors = find_distractors(cursor, entry, question, rng=rng)
+    if not distractors:
+        return []
+    options = distractors + [question['correct_answer']]
+    rng.shuffle(options)
+    return options
@@ -0,0 +1,270 @@
+import json
+from typing import Dict, List
+from .segmenter import VerbConjugator, VerbDeconjugator
+from .tags import project_tags
+from .question_bank import translation_questions, conjugation_questions, insert_questions
+
+# 活用生成器、逆活用索引无状态，模块内共享
+_conjugator = VerbConjugator()
+_deconjugator = VerbDeconjugator()
+
+# SQLite IN (...) 每批的参数个数
+QUERY_BATCH = 500
+
+# 预分配 ID 的自增表
+ID_TABLES = ('raw_entries', 'segmented_words', 'verb_master')
+
+GOJYUON = set('あいうえおかきくけこさしすせそたちつてとなにぬねの'
+              'はひふへほまみむめもやゆよらりるれろわをん'
+              'がぎぐげござじずぜぞだぢづでどばびぶべぼ'
+              'ぱぴぷぺぽ')
+
+
+def extract_phonetics(hiragana: str) -> list:
+    """提取50音"""
+    phonetics = []
+    seen = set()
+
+    for char in hiragana:
+        if char in GOJYUON and char not in seen:
+            phonetics.append(char)
+            seen.add(char)
+
+    return phonetics
+
+
+def _next_ids(cursor) -> Dict[str, int]:
+    """
+    各自增表的下一个 ID
+
+    AUTOINCREMENT 表的 sqlite_sequence.seq 不小于已用过的最大 ID，
+    显式写入更大的 ID 时 SQLite 会同步更新 seq。
+    """
+    placeholders = ','.join(['?' for _ in ID_TABLES])
+    cursor.execute(f'SELECT name, seq FROM sqlite_sequence WHERE name IN ({placeholders})', ID_TABLES)
+    seqs = {row[0]: row[1] for row in cursor.fetchall()}
+    return {table: (seqs.get(table) or 0) + 1 for table in ID_TABLES}
+
+
+def _load_verbs(cursor, prototypes: set) -> Dict[str, int]:
+    """已收录的动词 {原型: id}，分批 IN 查询"""
+    prototypes = list(prototypes)
+    known = {}
+    for i in range(0, len(prototypes), QUERY_BATCH):
+        batch = prototypes[i:i + QUERY_BATCH]
+        placeholders = ','.join(['?' for _ in batch])
+        cursor.execute(f'SELECT prototype, id FROM verb_master WHERE prototype IN ({placeholders})', batch)
+        known.update((row[0], row[1]) for row in cursor.fetchall())
+    return known
+
+
+def _resolve_verbs(cursor, verb_words: list) -> Dict[str, int]:
+    """
+    识别整批动词的原型，返回已收录动词的 {原型: id}
+
+    缺少原型的动词用逆活用索引求候选，与分词结果给出的原型一起做一次查询，
+    已收录（或本批其他词给出）的原型优先。识别结果写回 grammar_info。
+    """
+    explicit = set()
+    candidates = {}
+    for i, word_data in enumerate(verb_words):
+        grammar_info = word_data.setdefault('grammar_info', {})
+        if grammar_info.get('prototype'):
+            explicit.add(grammar_info['prototype'])
+        else:
+            candidates[i] = _deconjugator.deconjugate(word_data.get('word_jp', ''), word_data.get('hiragana', ''))
+
+    lookup = explicit | {c['prototype'] for found in candidates.values() for c in found}
+    known = _load_verbs(cursor, lookup) if lookup else {}
+
+    preferred = set(known) | explicit
+    for i, found in candidates.items():
+        if not found:
+            continue
+        word_data = verb_words[i]
+        verb_info = _deconjugator.deconjugate(word_data.get('word_jp', ''), word_data.get('hiragana', ''), preferred)[0]
+        del verb_info['suffix']
+        word_data['grammar_info'].update(verb_info)
+
+    return known
+
+
+def _new_verb_row(verb_id: int, prototype: str, word_data: dict) -> tuple:
+    """新动词的 verb_master 行（不含例句数）：读音、类别优先取分词结果，缺失时由逆活用索引推算"""
+    grammar_info = word_data.get('grammar_info', {})
+    verb_info = {}
+    if not grammar_info.get('verb_class') or not grammar_info.get('prototype_reading'):
+        candidates = _deconjugator.deconjugate(word_data.get('word_jp', ''), word_data.get('hiragana', ''))
+        verb_info = next((c for c in candidates if c['prototype'] == prototype), {})
+
+    reading = grammar_info.get('prototype_reading') or verb_info.get('prototype_reading') or word_data.get('hiragana', '')
+    verb_class = grammar_info.get('verb_class') or verb_info.get('verb_class') or '一类动词'
+    verb_group = grammar_info.get('verb_group') or verb_info.get('verb_group')
+    stem = prototype[:-2] if verb_group in ('suru', 'kuru') else prototype[:-1]
+
+    return (verb_id, prototype, reading, grammar_info.get('meaning', ''), verb_class, verb_group, stem)
+
+
+def bulk_ingest(cursor, preview_entries: list) -> List[dict]:
+    """
+    批量入库（集合式写入）
+
+    整批只做固定几条语句：一次取自增序列、一次 IN 查询动词，
+    原始数据、分词、新动词、活用、标签、50音索引、题库各一次 executemany。
+    ID 在写入前预分配，word_indices 随原始数据一起写入，不需要回填。
+
+    Args:
+        cursor: 数据库游标（在调用方的事务内执行）
+        preview_entries: 预览接口返回的条目（含 original_data / segmented_words / segmentation_source）
+
+    Returns:
+        [{'entry_id', 'original_jp', 'segmented_count'}, ...]
+    """
+    # 立即取得写锁，保证预分配的 ID 不被其他连接占用
+    if not cursor.connection.in_transaction:
+        cursor.execute('BEGIN IMMEDIATE')
+
+    next_ids = _next_ids(cursor)
+
+    verb_words = [w for e in preview_entries for w in e.get('segmented_words', [])
+                  if w.get('word_type') == 'verb']
+    verb_ids = _resolve_verbs(cursor, verb_words)
+
+    entry_rows = []
+    word_rows = []
+    verb_rows = []
+    new_verbs = {}
+    verb_examples = {}
+    phonetic_rows = []
+    tag_rows = []
+    question_rows = []
+    results = []
+
+    entry_id = next_ids['raw_entries']
+    word_id = next_ids['segmented_words']
+    verb_id = next_ids['verb_master']
+
+    for entry_data in preview_entries:
+        original_data = entry_data.get('original_data', {})
+        segmented_words_data = entry_data.get('segmented_words', [])
+        word_indices = []
+        entry_verbs = set()
+
+        for word_data in segmented_words_data:
+            word_verb_id = None
+            prototype = (word_data.get('grammar_info') or {}).get('prototype')
+            if word_data.get('word_type') == 'verb' and prototype:
+                word_verb_id = verb_ids.get(prototype)
+                if word_verb_id is None:
+                    word_verb_id = verb_ids[prototype] = verb_id
+                    verb_id += 1
+                    row = _new_verb_row(word_verb_id, prototype, word_data)
+                    verb_rows.append(row)
+                    new_verbs[word_verb_id] = (prototype, row[2], row[4])
+                entry_verbs.add(word_verb_id)
+
+            word_rows.append((
+                word_id,
+                entry_id,
+                word_data['word_jp'],
+                word_data['hiragana'],
+                word_data['word_type'],
+                word_data['position'],
+                json.dumps(word_data.get('grammar_info', {})),
+                word_verb_id,
+                entry_data.get('segmentation_source')
+            ))
+            phonetic_rows.extend(
+                (phonetic, 'segmented', 'segmented_words', word_id, 'exact')
+                for phonetic in extract_phonetics(word_data['hiragana'])
+            )
+            word_indices.append(word_id)
+            word_id += 1
+
+        entry_rows.append((
+            entry_id,
+            original_data.get('content_type', 'sentence'),
+            original_data['original_jp'],
+            original_data['hiragana'],
+            original_data.get('romaji', ''),
+            original_data['chinese_meaning'],
+            original_data.get('source', ''),
+            json.dumps(original_data.get('tags', {})),
+            True,
+            json.dumps(word_indices)
+        ))
+
+        for example_verb_id in entry_verbs:
+            verb_examples[example_verb_id] = verb_examples.get(example_verb_id, 0) + 1
+
+        tag_rows.extend(project_tags(entry_id, original_data.get('tags')))
+
+        question_rows.extend(translation_questions(
+            entry_id,
+            original_data['original_jp'],
+            original_data['hiragana'],
+            original_data.get('romaji', ''),
+            original_data['chinese_meaning'],
+            original_data.get('tags')
+        ))
+
+        phonetic_rows.extend(
+            (phonetic, 'raw', 'raw_entries', entry_id, 'exact')
+            for phonetic in extract_phonetics(original_data['hiragana'])
+        )
+
+        results.append({
+            'entry_id': entry_id,
+            'original_jp': original_data['original_jp'],
+            'segmented_count': len(segmented_words_data)
+        })
+        entry_id += 1
+
+    # 先写被引用的表（外键）
+    cursor.executemany('''
+        INSERT INTO raw_entries
+        (id, content_type, original_jp, hiragana, romaji, chinese_meaning, source, tags, processed, word_indices)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', entry_rows)
+
+    if verb_rows:
+        cursor.executemany('''
+            INSERT INTO verb_master (id, prototype, reading, meaning, verb_class, verb_group, stem, example_count)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        ''', [row + (verb_examples[row[0]],) for row in verb_rows])
+
+        conjugation_rows = _conjugator.conjugate_many(new_verbs)
+        cursor.executemany('''
+            INSERT INTO verb_conjugations
+            (verb_id, form_type, form_name, form_value, reading, example, politeness, difficulty, meaning)
+            VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        ''', conjugation_rows)
+        question_rows.extend(conjugation_questions(conjugation_rows, new_verbs))
+
+    # 已收录动词的例句数（本批中用到该动词的条目数）
+    existing_examples = [(count, verb_id) for verb_id, count in verb_examples.items() if verb_id not in new_verbs]
+    if existing_examples:
+        cursor.executemany('UPDATE verb_master SET example_count = example_count + ? WHERE id = ?',
+                           existing_examples)
+
+    cursor.executemany('''
+        INSERT INTO segmented_words
+        (id, raw_entry_id, word_jp, hiragana, word_type, position, grammar_info, verb_id, source)
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+    ''', word_rows)
+
+    if tag_rows:
+        cursor.executemany('''
+            INSERT OR IGNORE INTO entry_tags (entry_id, key, value)
+            VALUES (?, ?, ?)
+        ''', tag_rows)
+
+    insert_questions(cursor, question_rows)
+
+    cursor.executemany('''
+        INSERT OR IGNORE INTO phonetic_index
+        (phonetic, entry_type, entry_table, entry_id, match_type)
+        VALUES (?, ?, ?, ?, ?)
+    ''', phonetic_rows)
+
+    return results
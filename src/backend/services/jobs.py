@@ -0,0 +1,271 @@
+import json
+import time
+import uuid
+import sqlite3
+import threading
+from typing import List, Optional
+from ..models.database import Database
+from .ingestion import bulk_ingest
+from .user_dictionary import user_dictionary
+from .pagination import total_counts
+
+
+class JobLeaseLost(Exception):
+    """任务的租约已被其他工作线程接手（本线程提交的进度与数据库不一致），放弃处理该任务"""
+
+
+# 条目数据本身有问题时的异常：记为该条失败并跳过；其他异常（如 database is locked、磁盘 I/O）
+# 不是条目的问题，不能记成该条失败
+ENTRY_ERRORS = (sqlite3.IntegrityError, ValueError, KeyError, TypeError, AttributeError)
+
+
+class IngestionJobQueue:
+    """
+    后台入库任务队列
+
+    任务（含待入库数据和进度）持久化在 ingestion_jobs 表，进程内的工作线程按块提交：
+    每块的入库和进度更新在同一个事务里，服务重启后从上次提交的位置继续。
+    工作线程通过租约认领任务，租约过期（进程退出）的任务会被重新认领。
+    """
+
+    def __init__(self, workers: int = 2, chunk_size: int = 200,
+                 lease_seconds: float = 60.0, poll_interval: float = 2.0):
+        self.workers = workers
+        self.chunk_size = chunk_size
+        self.lease_seconds = lease_seconds
+        self.poll_interval = poll_interval
+        self._threads = []
+        self._wakeup = threading.Event()
+        self._stopping = threading.Event()
+        self._lock = threading.Lock()
+
+    def configure(self, app_config):
+        """从应用配置读取参数"""
+        self.workers = app_config.get('INGESTION_WORKERS', self.workers)
+        self.chunk_size = app_config.get('INGESTION_CHUNK_SIZE', self.chunk_size)
+        self.lease_seconds = app_config.get('INGESTION_LEASE_SECONDS', self.lease_seconds)
+
+    def start(self):
+        """启动工作线程（重复调用无副作用）"""
+        with self._lock:
+            if self._threads:
+                return
+            self._stopping.clear()
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._run, name=f'ingestion-worker-{i}', daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    @property
+    def running(self) -> bool:
+        """是否有存活的工作线程（没有时提交的任务不会被处理）"""
+        with self._lock:
+            return any(thread.is_alive() for thread in self._threads)
+
+    def stop(self, timeout: Optional[float] = None):
+        """停止工作线程（当前块处理完后退出）"""
+        with self._lock:
+            threads = self._threads
+            self._threads = []
+        self._stopping.set()
+        self._wakeup.set()
+        for thread in threads:
+            thread.join(timeout)
+
+    def submit(self, entries: list) -> str:
+        """
+        提交入库任务
+
+        Args:
+            entries: 预览接口返回的条目
+
+        Returns:
+            任务ID
+        """
+        job_id = uuid.uuid4().hex
+        Database.write(lambda cursor: cursor.execute('''
+            INSERT INTO ingestion_jobs (id, payload, total)
+            VALUES (?, ?, ?)
+        ''', (job_id, json.dumps(entries, ensure_ascii=False), len(entries))))
+        self._wakeup.set()
+        return job_id
+
+    def get(self, job_id: str, error_limit: int = 100) -> Optional[dict]:
+        """任务状态（不含待入库数据），不存在时返回 None"""
+        with Database.read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, status, total, processed, failed, last_error,
+                       created_at, started_at, finished_at
+                FROM ingestion_jobs WHERE id = ?
+            ''', (job_id,))
+            row = cursor.fetchone()
+            if not row:
+                return None
+
+            job = dict(row)
+            cursor.execute('''
+                SELECT entry_index, original_jp, message
+                FROM ingestion_job_errors
+                WHERE job_id = ?
+                ORDER BY entry_index
+                LIMIT ?
+            ''', (job_id, error_limit))
+            job['errors'] = [dict(r) for r in cursor.fetchall()]
+
+        job['progress'] = round((job['processed'] + job['failed']) * 100 / job['total'], 1) if job['total'] else 100.0
+        return job
+
+    def recent(self, limit: int = 20) -> List[dict]:
+        """最近的任务"""
+        with Database.read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('''
+                SELECT id, status, total, processed, failed, created_at, finished_at
+                FROM ingestion_jobs
+                ORDER BY created_at DESC
+                LIMIT ?
+            ''', (limit,))
+            return [dict(row) for row in cursor.fetchall()]
+
+    def _run(self):
+        while not self._stopping.is_set():
+            try:
+                job_id = self._claim()
+            except Exception as e:
+                print(f"⚠️  入库任务认领失败: {e}")
+                job_id = None
+
+            if job_id is None:
+                self._wakeup.wait(self.poll_interval)
+                self._wakeup.clear()
+                continue
+
+            try:
+                self._process(job_id)
+            except JobLeaseLost as e:
+                # 租约过期后任务已被其他线程认领，由对方继续处理
+                print(f"⚠️  入库任务 {job_id} 已被其他工作线程接手: {e}")
+            except sqlite3.OperationalError as e:
+                # 写入队列繁忙、数据库被锁等暂时性错误（含 WriteTimeoutError）：不标记失败，租约过期后任务会被重新认领
+                print(f"⚠️  入库任务 {job_id} 暂时无法写入，稍后重试: {e}")
+            except Exception as e:
+                # 任务级错误（如数据损坏）：标记失败，不再重试
+                print(f"❌ 入库任务 {job_id} 失败: {e}")
+                self._mark_failed(job_id, str(e))
+
+    def _mark_failed(self, job_id: str, message: str):
+        """标记任务失败；写入出错时只记录日志，工作线程继续运行（任务随租约过期被重新认领）"""
+        try:
+            Database.write(lambda cursor: cursor.execute('''
+                UPDATE ingestion_jobs
+                SET status = 'failed', last_error = ?, lease_until = NULL,
+                    finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (message, job_id)))
+        except Exception as e:
+            print(f"⚠️  入库任务 {job_id} 失败状态写入失败: {e}")
+
+    def _claim(self) -> Optional[str]:
+        """认领一个待处理（或租约已过期）的任务"""
+        now = time.time()
+        row = Database.write(lambda cursor: cursor.execute('''
+            UPDATE ingestion_jobs
+            SET status = 'running', lease_until = ?,
+                started_at = COALESCE(started_at, CURRENT_TIMESTAMP)
+            WHERE id = (
+                SELECT id FROM ingestion_jobs
+                WHERE status = 'pending' OR (status = 'running' AND lease_until < ?)
+                ORDER BY created_at
+                LIMIT 1
+            )
+            RETURNING id
+        ''', (now + self.lease_seconds, now)).fetchone())
+        return row[0] if row else None
+
+    def _process(self, job_id: str):
+        with Database.read_connection() as conn:
+            cursor = conn.cursor()
+            cursor.execute('SELECT payload, next_index FROM ingestion_jobs WHERE id = ?', (job_id,))
+            row = cursor.fetchone()
+        if row is None or row['payload'] is None:
+            # 认领后任务被删除或已由其他线程完成
+            return
+        entries = json.loads(row['payload'])
+        index = row['next_index']
+
+        while index < len(entries) and not self._stopping.is_set():
+            chunk = entries[index:index + self.chunk_size]
+            try:
+                self._commit_chunk(job_id, index, chunk)
+            except (JobLeaseLost, sqlite3.OperationalError):
+                raise
+            except Exception:
+                # 整块失败时逐条重试，找出有问题的条目；不是条目本身问题的异常向上抛出（见 _run）
+                for offset, entry in enumerate(chunk):
+                    try:
+                        self._commit_chunk(job_id, index + offset, [entry])
+                    except ENTRY_ERRORS as e:
+                        self._record_error(job_id, index + offset, entry, e)
+            index += len(chunk)
+
+        if index >= len(entries):
+            Database.write(lambda cursor: cursor.execute('''
+                UPDATE ingestion_jobs
+                SET status = 'completed', payload = NULL, lease_until = NULL,
+                    finished_at = CURRENT_TIMESTAMP
+                WHERE id = ?
+            ''', (job_id,)))
+        else:
+            # 停止时交还任务，下次启动继续
+            Database.write(lambda cursor: cursor.execute('''
+                UPDATE ingestion_jobs SET status = 'pending', lease_until = NULL WHERE id = ?
+            ''', (job_id,)))
+
+    def _commit_chunk(self, job_id: str, index: int, chunk: list):
+        """
+        入库一块数据，并在同一事务内推进任务进度
+
+        进度只在仍停留在 index 时推进：租约过期后其他线程已提交过这一块时，
+        整个事务回滚（不会重复入库），抛出 JobLeaseLost。
+        """
+        def commit(cursor):
+            bulk_ingest(cursor, chunk)
+            collected = user_dictionary.collect(cursor, chunk)
+            cursor.execute('''
+                UPDATE ingestion_jobs
+                SET next_index = ?, processed = processed + ?, lease_until = ?
+                WHERE id = ? AND next_index = ?
+            ''', (index + len(chunk), len(chunk), time.time() + self.lease_seconds, job_id, index))
+            if cursor.rowcount == 0:
+                raise JobLeaseLost(f'第 {index} 条起的数据已由其他工作线程提交')
+            return collected
+
+        new_words, new_prototypes = Database.write(commit)
+
+        # 事务提交后再更新用户词典和列表总数缓存
+        user_dictionary.add_words(new_words, new_prototypes)
+        total_counts.invalidate()
+
+    def _record_error(self, job_id: str, index: int, entry: dict, error: Exception):
+        """记录单条失败并跳过（与 _commit_chunk 一样只在进度仍停留在 index 时生效）"""
+        original_jp = (entry.get('original_data') or {}).get('original_jp') if isinstance(entry, dict) else None
+
+        def record(cursor):
+            cursor.execute('''
+                INSERT INTO ingestion_job_errors (job_id, entry_index, original_jp, message)
+                VALUES (?, ?, ?, ?)
+            ''', (job_id, index, original_jp, f'{type(error).__name__}: {error}'))
+            cursor.execute('''
+                UPDATE ingestion_jobs
+                SET next_index = ?, failed = failed + 1, lease_until = ?
+                WHERE id = ? AND next_index = ?
+            ''', (index + 1, time.time() + self.lease_seconds, job_id, index))
+            if cursor.rowcount == 0:
+                raise JobLeaseLost(f'第 {index} 条已由其他工作线程处理')
+
+        Database.write(record)
+
+
+# 进程内共享的入库任务队列
+ingestion_jobs = IngestionJobQueue()
@@ -0,0 +1,84 @@
+import json
+import time
+import base64
+import threading
+from collections import OrderedDict
+from typing import Callable, Hashable, List, Sequence
+
+
+class CursorError(ValueError):
+    """分页游标无效"""
+
+
+def encode_cursor(values: Sequence) -> str:
+    """把排序键（如 [created_at, id]）编码成不透明的游标字符串"""
+    raw = json.dumps(list(values), ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def decode_cursor(cursor: str, size: int) -> List:
+    """
+    解码游标
+
+    Args:
+        size: 排序键的列数（与接口的排序方式对应）
+
+    Raises:
+        CursorError: 游标格式不对或与当前排序方式不匹配
+    """
+    try:
+        raw = base64.urlsafe_b64decode(cursor + '=' * (-len(cursor) % 4))
+        values = json.loads(raw.decode('utf-8'))
+    except (ValueError, UnicodeDecodeError):
+        raise CursorError('无效的分页游标')
+
+    if (not isinstance(values, list) or len(values) != size
+            or not all(isinstance(v, (str, int, float)) and not isinstance(v, bool) for v in values)):
+        raise CursorError('无效的分页游标')
+    return values
+
+
+def keyset_condition(columns: Sequence[str], order: str) -> str:
+    """排序键严格位于游标之后的条件（行值比较，可走 (列..., id) 复合索引）"""
+    op = '<' if order == 'desc' else '>'
+    placeholders = ', '.join('?' for _ in columns)
+    return f"({', '.join(columns)}) {op} ({placeholders})"
+
+
+class TotalCountCache:
+    """
+    列表总数缓存
+
+    按查询条件缓存 COUNT(*) 结果，ttl 秒后过期；本进程写入数据后调用 invalidate 立即失效。
+    其他进程写入的数据最多延迟 ttl 秒反映到总数上。
+    """
+
+    def __init__(self, ttl: float = 30.0, max_size: int = 256):
+        self.ttl = ttl
+        self.max_size = max_size
+        self._entries: 'OrderedDict[Hashable, tuple]' = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, count: Callable[[], int]) -> int:
+        """取缓存的总数，未命中或已过期时调用 count() 重新计算"""
+        now = time.monotonic()
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached and now - cached[1] < self.ttl:
+                return cached[0]
+
+        total = count()
+        with self._lock:
+            self._entries[key] = (total, now)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+        return total
+
+    def invalidate(self):
+        with self._lock:
+            self._entries.clear()
+
+
+# 进程内共享的总数缓存
+total_counts = TotalCountCache()
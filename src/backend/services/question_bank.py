@@ -0,0 +1,108 @@
+from collections import defaultdict
+from typing import Dict, Iterable, List
+
+# 题型
+TRANSLATION_TYPES = ('translation_jp_to_cn', 'translation_cn_to_jp')
+CONJUGATION_TYPE = 'verb_conjugation'
+
+# 不出题的活用形（答案就是题面里的原形）
+SKIPPED_FORMS = ('dictionary',)
+
+DEFAULT_DIFFICULTY = 1
+
+# SQLite IN (...) 每批的参数个数
+QUERY_BATCH = 500
+
+INSERT_SQL = '''
+    INSERT INTO question_bank
+    (question_type, entry_id, verb_id, form_type, question, correct_answer, hint, difficulty)
+    VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+'''
+
+
+def entry_difficulty(tags) -> int:
+    """条目难度：取 tags.difficulty（1-5），缺失或无法解析时为默认值"""
+    value = tags.get('difficulty') if isinstance(tags, dict) else None
+    if isinstance(value, bool):
+        return DEFAULT_DIFFICULTY
+    try:
+        return max(1, min(5, int(value)))
+    except (TypeError, ValueError):
+        return DEFAULT_DIFFICULTY
+
+
+def translation_questions(entry_id: int, original_jp: str, hiragana: str, romaji: str,
+                          chinese_meaning: str, tags) -> List[tuple]:
+    """
+    条目的翻译题（日译中、中译日各一道）
+
+    Returns:
+        question_bank 行，字段顺序见 INSERT_SQL
+    """
+    if not original_jp or not chinese_meaning:
+        return []
+    difficulty = entry_difficulty(tags)
+    return [
+        ('translation_jp_to_cn', entry_id, None, None, original_jp, chinese_meaning,
+         f"读音: {hiragana}", difficulty),
+        ('translation_cn_to_jp', entry_id, None, None, chinese_meaning, original_jp,
+         f"读音: {romaji or hiragana}", difficulty)
+    ]
+
+
+def conjugation_questions(conjugations: Iterable[tuple], verbs: Dict[int, tuple]) -> List[tuple]:
+    """
+    动词的活用题（每个活用形一道，难度取 verb_conjugations.difficulty）
+
+    Args:
+        conjugations: verb_conjugations 行
+            (verb_id, form_type, form_name, form_value, reading, example, politeness, difficulty, meaning)
+        verbs: {verb_id: (原型, 读音, ...)}
+
+    Returns:
+        question_bank 行，字段顺序见 INSERT_SQL
+    """
+    rows = []
+    for verb_id, form_type, form_name, form_value, _, _, _, difficulty, _ in conjugations:
+        if form_type in SKIPPED_FORMS or verb_id not in verbs:
+            continue
+        prototype, reading = verbs[verb_id][:2]
+        rows.append((CONJUGATION_TYPE, None, verb_id, form_type, f'{prototype}的{form_name}是？', form_value,
+                     f'读音: {reading}', difficulty or DEFAULT_DIFFICULTY))
+    return rows
+
+
+def insert_questions(cursor, rows: List[tuple]):
+    """写入题库（在调用方的事务内执行）"""
+    if rows:
+        cursor.executemany(INSERT_SQL, rows)
+
+
+def load_questions(cursor, entry_ids: List[int]) -> Dict[int, List[dict]]:
+    """
+    各条目可出的题：条目自身的翻译题，加上句中动词的活用题
+
+    两条 IN 查询分别走 idx_bank_entry 和 idx_words_entry_type → idx_bank_verb，与题库大小无关。
+
+    Returns:
+        {entry_id: [question_bank 行（dict），按 id 排序]}
+    """
+    questions = defaultdict(dict)
+    for i in range(0, len(entry_ids), QUERY_BATCH):
+        batch = entry_ids[i:i + QUERY_BATCH]
+        placeholders = ','.join(['?' for _ in batch])
+        cursor.execute(f'SELECT * FROM question_bank WHERE entry_id IN ({placeholders})', batch)
+        for row in cursor.fetchall():
+            questions[row['entry_id']][row['id']] = dict(row)
+
+        cursor.execute(f'''
+            SELECT w.raw_entry_id AS source_entry_id, q.* FROM segmented_words w
+            CROSS JOIN question_bank q ON q.verb_id = w.verb_id
+            WHERE w.raw_entry_id IN ({placeholders}) AND w.word_type = 'verb'
+        ''', batch)
+        for row in cursor.fetchall():
+            question = dict(row)
+            entry_id = question.pop('source_entry_id')
+            questions[entry_id][question['id']] = question
+
+    return {entry_id: [rows[key] for key in sorted(rows)] for entry_id, rows in questions.items()}
@@ -0,0 +1,136 @@
+import random
+from typing import Iterable, List, Optional, Sequence
+
+# 每个要抽的条目最多探测的次数（超过后改用精确抽样补齐）
+PROBES_PER_ROW = 32
+
+# 每次探测查看的 id 窗口大小
+PROBE_WINDOW = 16
+
+# 可练习的句子
+SENTENCE_CONDITION = "content_type = 'sentence' AND processed = 1"
+
+# 整段扫描时的同一条件：一元 + 让优化器不走 content_type / processed 的索引，
+# 只在 rowid 区间和标签的 IN 列表之间选（稀疏标签时由 IN 列表驱动）
+SCAN_CONDITION = "+content_type = 'sentence' AND +processed = 1"
+
+
+def _time_range(since: Optional[str], until: Optional[str]):
+    """录入时间区间 [since, until) 的条件"""
+    conditions = ''
+    params = []
+    if since:
+        conditions += ' AND created_at >= ?'
+        params.append(since)
+    if until:
+        conditions += ' AND created_at < ?'
+        params.append(until)
+    return conditions, params
+
+
+def sample_sentences(cursor, k: int, since: Optional[str] = None, until: Optional[str] = None,
+                     filters: str = '', filter_params: Sequence = (), exclude: Iterable[int] = (),
+                     rng: Optional[random.Random] = None, scan_filters: Optional[str] = None,
+                     scan_params: Sequence = ()) -> List[dict]:
+    """
+    从录入时间在 [since, until) 内的句子中随机抽取 k 条（不把整层读进内存）
+
+    先沿 idx_entries_type_created 取该层最早、最晚录入的 id 作为 rowid 区间。
+    满足条件的条目不多（不超过 k * PROBES_PER_ROW 条）时直接取出全部 id 精确抽样；
+    否则随机取区间内的 id，在其后 PROBE_WINDOW 个 id 的窗口里找第一条满足条件的句子，
+    按它前面（同样限制在窗口内）的空档长度做拒绝采样，窗口内没有命中也算一次拒绝，
+    保证层内每条句子被抽中的概率相同（标签筛选后的条目成批聚集时也一样）。
+    每次探测只查一个固定大小的 id 窗口，与层的大小、筛选条件的稀疏程度无关。
+    条目按录入顺序分配 id，因此录入时间区间近似对应一段连续的 id；
+    探测次数用完仍不够 k 条时，改为只取该层的 id 精确抽样补齐。
+
+    Args:
+        since / until: 录入时间下限（含）/ 上限（不含），格式同 CURRENT_TIMESTAMP，None 表示不限
+        filters: 附加条件（以 ' AND ' 开头，列名不带表别名）
+        exclude: 不能选的条目 id（已被其他层选中的）
+        rng: 随机数生成器（传入带种子的实例可复现结果）
+        scan_filters / scan_params: 与 filters 等价、适合整段扫描的写法（计数和精确抽样时用），
+            如标签的 IN 子查询；默认同 filters
+
+    Returns:
+        raw_entries 行（dict），最多 k 条
+    """
+    if k <= 0:
+        return []
+    rng = rng or random
+    time_filter, time_params = _time_range(since, until)
+
+    cursor.execute(f'''
+        SELECT id FROM raw_entries WHERE content_type = 'sentence'{time_filter}
+        ORDER BY created_at, id LIMIT 1
+    ''', time_params)
+    first = cursor.fetchone()
+    if first is None:
+        return []
+    cursor.execute(f'''
+        SELECT id FROM raw_entries WHERE content_type = 'sentence'{time_filter}
+        ORDER BY created_at DESC, id DESC LIMIT 1
+    ''', time_params)
+    last = cursor.fetchone()
+    low, high = min(first[0], last[0]), max(first[0], last[0])
+
+    where = f'{SENTENCE_CONDITION}{time_filter}{filters}'
+    params = time_params + list(filter_params)
+    probe = f'SELECT * FROM raw_entries WHERE id >= ? AND id <= ? AND {where} ORDER BY id LIMIT 1'
+    previous = f'SELECT id FROM raw_entries WHERE id >= ? AND id < ? AND {where} ORDER BY id DESC LIMIT 1'
+
+    if scan_filters is None:
+        scan_filters, scan_params = filters, filter_params
+    scan_where = f'{SCAN_CONDITION}{time_filter}{scan_filters}'
+    scan_params = [low, high] + time_params + list(scan_params)
+    excluded = set(exclude)
+
+    # 满足条件的条目不多时直接精确抽样（计数到上限即停，稀疏的标签走 IN 子查询的索引）
+    limit = k * PROBES_PER_ROW
+    cursor.execute(f'SELECT id FROM raw_entries WHERE id >= ? AND id <= ? AND {scan_where} LIMIT ?',
+                   scan_params + [limit])
+    ids = [row[0] for row in cursor.fetchall()]
+    if len(ids) < limit:
+        return _fetch(cursor, _draw(ids, k, excluded, rng))
+
+    chosen = {}
+    for _ in range(limit):
+        if len(chosen) >= k:
+            break
+        start = rng.randint(low, high)
+        cursor.execute(probe, [start, min(start + PROBE_WINDOW - 1, high)] + params)
+        row = cursor.fetchone()
+        if row is None or row['id'] in excluded or row['id'] in chosen:
+            continue
+
+        # 命中概率与它前面（窗口内）的空档长度成正比，按 1/空档 接受，使每条被选中的概率相同
+        floor = max(low, row['id'] - PROBE_WINDOW + 1)
+        cursor.execute(previous, [floor, row['id']] + params)
+        prev = cursor.fetchone()
+        gap = row['id'] - (prev[0] if prev else floor - 1)
+        if rng.random() * gap < 1:
+            chosen[row['id']] = dict(row)
+
+    if len(chosen) < k:
+        # 探测次数用完：取出该层全部 id 精确抽样补齐
+        cursor.execute(f'SELECT id FROM raw_entries WHERE id >= ? AND id <= ? AND {scan_where}', scan_params)
+        extra = _draw([row[0] for row in cursor.fetchall()], k - len(chosen), excluded | set(chosen), rng)
+        chosen.update((row['id'], row) for row in _fetch(cursor, extra))
+
+    return list(chosen.values())
+
+
+def _draw(ids: List[int], k: int, excluded: set, rng) -> List[int]:
+    """从候选 id 中不重复地随机取 k 个"""
+    candidates = [entry_id for entry_id in ids if entry_id not in excluded]
+    return rng.sample(candidates, min(k, len(candidates)))
+
+
+def _fetch(cursor, ids: List[int]) -> List[dict]:
+    """按给定顺序取出条目"""
+    if not ids:
+        return []
+    placeholders = ','.join(['?' for _ in ids])
+    cursor.execute(f'SELECT * FROM raw_entries WHERE id IN ({placeholders})', ids)
+    rows = {row['id']: dict(row) for row in cursor.fetchall()}
+    return [rows[entry_id] for entry_id in ids]
@@ -0,0 +1,173 @@
+from datetime import datetime, timedelta, timezone
+from typing import Dict, Iterable, List, Optional, Tuple
+
+# SM-2 参数
+DEFAULT_EASE = 2.5
+MIN_EASE = 1.3
+
+# 回答质量（0-5，>= 3 视为答对）；只给出对错时的默认值
+PASS_QUALITY = 3
+CORRECT_QUALITY = 4
+WRONG_QUALITY = 1
+
+# SQLite IN (...) 每批的参数个数
+QUERY_BATCH = 500
+
+# 与 SQLite CURRENT_TIMESTAMP 相同的格式（UTC），可直接和 datetime('now') 比较
+TIMESTAMP_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc).replace(tzinfo=None)
+
+
+def format_timestamp(value: datetime) -> str:
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+def answer_quality(answer: dict) -> int:
+    """回答质量：优先用 quality（0-5），否则按 is_correct 取默认值"""
+    quality = answer.get('quality')
+    if isinstance(quality, (int, float)) and not isinstance(quality, bool):
+        return max(0, min(5, int(quality)))
+    return CORRECT_QUALITY if answer.get('is_correct', False) else WRONG_QUALITY
+
+
+def sm2(state: Optional[dict], quality: int, now: datetime) -> dict:
+    """
+    SM-2 复习间隔计算
+
+    Args:
+        state: 当前状态（interval_days / ease / repetitions / lapses），首次复习为 None
+        quality: 回答质量 0-5
+        now: 复习时间（UTC）
+
+    Returns:
+        新状态（含下次复习时间 due）
+    """
+    state = state or {}
+    interval = state.get('interval_days') or 0
+    ease = state.get('ease') or DEFAULT_EASE
+    repetitions = state.get('repetitions') or 0
+    lapses = state.get('lapses') or 0
+
+    if quality >= PASS_QUALITY:
+        if repetitions == 0:
+            interval = 1
+        elif repetitions == 1:
+            interval = 6
+        else:
+            interval = max(round(interval * ease), interval + 1)
+        repetitions += 1
+    else:
+        # 遗忘：从头开始，已掌握过的记一次遗忘
+        if repetitions > 0:
+            lapses += 1
+        repetitions = 0
+        interval = 1
+
+    ease = max(MIN_EASE, ease + 0.1 - (5 - quality) * (0.08 + (5 - quality) * 0.02))
+
+    return {
+        'due': format_timestamp(now + timedelta(days=interval)),
+        'interval_days': interval,
+        'ease': round(ease, 4),
+        'repetitions': repetitions,
+        'lapses': lapses,
+        'last_reviewed': format_timestamp(now)
+    }
+
+
+def _load_states(cursor, entry_ids: List[int]) -> Dict[int, dict]:
+    """已有的复习状态 {entry_id: 状态}，分批 IN 查询"""
+    states = {}
+    for i in range(0, len(entry_ids), QUERY_BATCH):
+        batch = entry_ids[i:i + QUERY_BATCH]
+        placeholders = ','.join(['?' for _ in batch])
+        cursor.execute(f'''
+            SELECT entry_id, interval_days, ease, repetitions, lapses
+            FROM review_schedule WHERE entry_id IN ({placeholders})
+        ''', batch)
+        for row in cursor.fetchall():
+            states[row[0]] = {
+                'interval_days': row[1],
+                'ease': row[2],
+                'repetitions': row[3],
+                'lapses': row[4]
+            }
+    return states
+
+
+def record_reviews(cursor, reviews: Iterable[Tuple[int, int]], now: Optional[datetime] = None) -> int:
+    """
+    按回答结果更新复习计划（在调用方的事务内执行）
+
+    同一条目多次作答时按顺序依次计算；已删除的条目忽略。
+
+    Args:
+        reviews: [(entry_id, quality), ...]
+
+    Returns:
+        更新的条目数
+    """
+    reviews = list(reviews)
+    if not reviews:
+        return 0
+    now = now or utc_now()
+
+    entry_ids = list(dict.fromkeys(entry_id for entry_id, _ in reviews))
+    states = _load_states(cursor, entry_ids)
+    for entry_id, quality in reviews:
+        states[entry_id] = sm2(states.get(entry_id), quality, now)
+
+    rows = []
+    for entry_id in entry_ids:
+        state = states[entry_id]
+        rows.append((state['due'], state['interval_days'], state['ease'], state['repetitions'],
+                     state['lapses'], state['last_reviewed'], entry_id))
+
+    cursor.executemany('''
+        INSERT INTO review_schedule (entry_id, due, interval_days, ease, repetitions, lapses, last_reviewed)
+        SELECT id, ?, ?, ?, ?, ?, ? FROM raw_entries WHERE id = ?
+        ON CONFLICT(entry_id) DO UPDATE SET
+            due = excluded.due,
+            interval_days = excluded.interval_days,
+            ease = excluded.ease,
+            repetitions = excluded.repetitions,
+            lapses = excluded.lapses,
+            last_reviewed = excluded.last_reviewed
+    ''', rows)
+    return len(entry_ids)
+
+
+def log_answers(cursor, answers: Iterable[Tuple[int, str, bool]], now: Optional[datetime] = None) -> int:
+    """
+    追加作答记录到 review_log，并累加条目的 review_count / last_reviewed（在调用方的事务内执行）
+
+    已删除的条目忽略。
+
+    Args:
+        answers: [(entry_id, question_type, 是否答对), ...]
+
+    Returns:
+        写入的记录数
+    """
+    answers = list(answers)
+    if not answers:
+        return 0
+    answered_at = format_timestamp(now or utc_now())
+
+    cursor.executemany('''
+        INSERT INTO review_log (entry_id, question_type, correct, answered_at)
+        SELECT id, ?, ?, ? FROM raw_entries WHERE id = ?
+    ''', [(question_type, bool(correct), answered_at, entry_id) for entry_id, question_type, correct in answers])
+    logged = cursor.rowcount
+
+    counts = {}
+    for entry_id, _, _ in answers:
+        counts[entry_id] = counts.get(entry_id, 0) + 1
+    cursor.executemany('''
+        UPDATE raw_entries SET review_count = COALESCE(review_count, 0) + ?, last_reviewed = ?
+        WHERE id = ?
+    ''', [(count, answered_at, entry_id) for entry_id, count in counts.items()])
+    return logged
@@ -0,0 +1,177 @@
+import json
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import List, Tuple, Dict, Any, Iterable, Optional
+from ..models.database import Database
+from .segmenter import JapaneseSegmenter, RULES_VERSION
+
+
+class SegmentationCache:
+    """
+    分词结果缓存
+
+    两级结构：进程内有界 LRU + SQLite 表 segmentation_cache。
+    键为 (原文+注音的摘要, 分词器版本)，分词规则或模式变化后旧结果自动失效。
+    """
+    
+    # SQLite IN (...) 每批的参数个数
+    QUERY_BATCH = 500
+    
+    # 每个分词模式在 SQLite 中保留的分词器版本数（含当前版本）
+    KEEP_VERSIONS = 4
+    
+    def __init__(self, max_size: int = 4096):
+        self.max_size = max_size
+        self._lru: 'OrderedDict[Tuple[str, str], str]' = OrderedDict()
+        self._lock = threading.Lock()
+        self._pruned = set()
+        self.memory_hits = 0
+        self.db_hits = 0
+        self.misses = 0
+    
+    @staticmethod
+    def content_hash(text: str, hiragana: str) -> str:
+        """原文 + 注音的摘要"""
+        return hashlib.sha1(f'{text}\0{hiragana}'.encode('utf-8')).hexdigest()
+    
+    def segment_many(self, segmenter: JapaneseSegmenter, pairs: Iterable[Tuple[str, str]],
+                     workers: int = 0) -> List[List[Dict[str, Any]]]:
+        """
+        带缓存的批量分词
+        
+        Args:
+            segmenter: 分词器（决定缓存版本）
+            pairs: (原文, 平假名注音) 序列
+            workers: 未命中部分交给 segment_many 的进程数
+            
+        Returns:
+            每条句子的分词结果（SegmentedWord.to_dict() 列表），顺序与输入一致
+        """
+        pairs = list(pairs)
+        version = segmenter.version
+        hashes = [self.content_hash(text, hira) for text, hira in pairs]
+        results: List[Optional[str]] = [None] * len(pairs)
+        
+        # 1. 进程内 LRU
+        pending = {}
+        with self._lock:
+            for i, content_hash in enumerate(hashes):
+                key = (content_hash, version)
+                cached = self._lru.get(key)
+                if cached is not None:
+                    self._lru.move_to_end(key)
+                    results[i] = cached
+                    self.memory_hits += 1
+                else:
+                    pending.setdefault(content_hash, []).append(i)
+        
+        if pending:
+            # 2. SQLite 持久化缓存（只读连接，分词期间不占写锁）
+            with Database.read_connection() as conn:
+                stored = self._load(conn.cursor(), version, list(pending))
+            for content_hash, result_json in stored.items():
+                for i in pending.pop(content_hash):
+                    results[i] = result_json
+                self.db_hits += 1
+                self._remember((content_hash, version), result_json)
+            
+            # 3. 真正分词（相同句子只分一次）
+            rows = []
+            if pending:
+                missing = list(pending)
+                first_index = [pending[h][0] for h in missing]
+                segmented = segmenter.segment_many(
+                    [pairs[i] for i in first_index], workers=workers
+                )
+                for content_hash, words in zip(missing, segmented):
+                    result_json = json.dumps([w.to_dict() for w in words], ensure_ascii=False)
+                    for i in pending[content_hash]:
+                        results[i] = result_json
+                    rows.append((content_hash, version, result_json))
+                    self._remember((content_hash, version), result_json)
+                self.misses += len(missing)
+            
+            if rows or version not in self._pruned:
+                Database.write(lambda cursor: self._store(cursor, segmenter, rows))
+        
+        # 每次反序列化得到独立的对象，调用方可以随意修改
+        return [json.loads(result_json) for result_json in results]
+    
+    def _store(self, cursor, segmenter: JapaneseSegmenter, rows: List[Tuple[str, str, str]]):
+        """清理过期缓存并写入新的分词结果"""
+        self._prune(cursor, segmenter)
+        cursor.executemany('''
+            INSERT OR REPLACE INTO segmentation_cache
+            (content_hash, segmenter_version, result)
+            VALUES (?, ?, ?)
+        ''', rows)
+    
+    def _load(self, cursor, version: str, content_hashes: List[str]) -> Dict[str, str]:
+        """从 SQLite 批量读取缓存结果"""
+        stored = {}
+        for i in range(0, len(content_hashes), self.QUERY_BATCH):
+            batch = content_hashes[i:i + self.QUERY_BATCH]
+            placeholders = ','.join(['?' for _ in batch])
+            cursor.execute(f'''
+                SELECT content_hash, result FROM segmentation_cache
+                WHERE segmenter_version = ? AND content_hash IN ({placeholders})
+            ''', [version] + batch)
+            for row in cursor.fetchall():
+                stored[row[0]] = row[1]
+        return stored
+    
+    def _prune(self, cursor, segmenter: JapaneseSegmenter):
+        """
+        清理过期的缓存：规则版本不同的，以及同一模式下最近 KEEP_VERSIONS 个用户词典版本之外的
+        （每个版本每个进程只执行一次）
+        
+        入库新词就会产生新的用户词典版本，只保留当前版本会让每次入库都清空持久化缓存；
+        保留最近几个版本，词典回到相同内容时（如重启后重新加载）旧结果仍可命中。
+        """
+        version = segmenter.version
+        if version in self._pruned:
+            return
+        mode_prefix = f'{RULES_VERSION}-{segmenter.mode}-%'
+        cursor.execute('''
+            DELETE FROM segmentation_cache
+            WHERE segmenter_version NOT LIKE ?
+            OR (segmenter_version LIKE ? AND segmenter_version != ? AND segmenter_version NOT IN (
+                SELECT segmenter_version FROM segmentation_cache
+                WHERE segmenter_version LIKE ? AND segmenter_version != ?
+                GROUP BY segmenter_version
+                ORDER BY MAX(created_at) DESC
+                LIMIT ?
+            ))
+        ''', (f'{RULES_VERSION}-%', mode_prefix, version, mode_prefix, version, self.KEEP_VERSIONS - 1))
+        self._pruned.add(version)
+    
+    def _remember(self, key: Tuple[str, str], result_json: str):
+        """写入进程内 LRU，超出容量时淘汰最久未用的条目"""
+        with self._lock:
+            self._lru[key] = result_json
+            self._lru.move_to_end(key)
+            while len(self._lru) > self.max_size:
+                self._lru.popitem(last=False)
+    
+    def clear(self):
+        """清空进程内缓存和计数"""
+        with self._lock:
+            self._lru.clear()
+            self.memory_hits = self.db_hits = self.misses = 0
+    
+    def stats(self) -> Dict[str, Any]:
+        """命中/未命中统计"""
+        lookups = self.memory_hits + self.db_hits + self.misses
+        return {
+            'memory_hits': self.memory_hits,
+            'db_hits': self.db_hits,
+            'misses': self.misses,
+            'hit_rate': round((self.memory_hits + self.db_hits) / lookups, 4) if lookups else 0,
+            'memory_size': len(self._lru),
+            'max_size': self.max_size
+        }
+
+
+# 进程内共享的分词缓存
+segmentation_cache = SegmentationCache()
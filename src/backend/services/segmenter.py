@@ -1,7 +1,202 @@
+import os
 import re
-from typing import List, Optional, Dict, Any, Tuple
+import atexit
+import pickle
+import shutil
+import hashlib
+import tempfile
+import threading
+import multiprocessing
+from contextlib import nullcontext
+from functools import lru_cache
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Optional, Dict, Any, Tuple, Iterable, Iterator
 from ..models import SegmentedWord, VerbMaster, VerbConjugation
 
+# 分词规则版本：取本模块源码的摘要，规则（词表、代价、匹配逻辑）一改即变
+try:
+    with open(__file__, 'rb') as _source:
+        RULES_VERSION = hashlib.sha1(_source.read()).hexdigest()[:12]
+except OSError:
+    RULES_VERSION = 'unknown'
+
+# 批量分词进程池（按需创建，进程内共享）
+_executor: Optional[ProcessPoolExecutor] = None
+_executor_workers = 0
+_executor_lock = threading.Lock()
+
+
+def _get_executor(workers: int) -> ProcessPoolExecutor:
+    """获取批量分词进程池，工作进程数变化时重建"""
+    global _executor, _executor_workers
+    with _executor_lock:
+        if _executor is None or _executor_workers != workers:
+            if _executor is not None:
+                _executor.shutdown(wait=False)
+            # 使用 spawn 避免在多线程的 Web 进程中 fork
+            _executor = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context('spawn')
+            )
+            _executor_workers = workers
+        return _executor
+
+
+# 发给工作进程的分词器快照（主进程内）：{分词器版本: 快照文件路径}，只保留最近几个版本
+_snapshots: Dict[str, str] = {}
+_snapshot_dir: Optional[str] = None
+SNAPSHOT_KEEP = 4
+
+# 工作进程内缓存的分词器：(版本, 分词器)
+_worker_segmenter: Optional[Tuple[str, 'JapaneseSegmenter']] = None
+
+
+def _snapshot(segmenter: 'JapaneseSegmenter') -> Tuple[str, str]:
+    """
+    把分词器（含用户词典）序列化到临时文件，每个版本只写一次
+
+    工作进程按版本缓存分词器，版本变化时才读一次快照，
+    分块任务本身只带版本号、快照路径和句子，不再每块都序列化整个用户词典。
+
+    Returns:
+        (版本, 快照路径)
+    """
+    global _snapshot_dir
+    dictionary = segmenter.user_dictionary
+    with _executor_lock:
+        # 版本号和序列化都在用户词典的锁内完成：并发入库的 add_words 会改动词典树和原型集合，
+        # 不加锁时序列化可能在遍历中途出错，或得到与版本号不一致的快照
+        with dictionary.locked() if dictionary is not None else nullcontext():
+            version = segmenter.version
+            path = _snapshots.get(version)
+            data = None if path is not None else pickle.dumps(segmenter, protocol=pickle.HIGHEST_PROTOCOL)
+        if path is None:
+            if _snapshot_dir is None:
+                _snapshot_dir = tempfile.mkdtemp(prefix='kotoba-segmenter-')
+                atexit.register(shutil.rmtree, _snapshot_dir, True)
+            path = os.path.join(_snapshot_dir, hashlib.sha1(version.encode('utf-8')).hexdigest() + '.pickle')
+            with open(path, 'wb') as f:
+                f.write(data)
+            _snapshots[version] = path
+            # 旧版本的快照只在仍有进行中的批次时才会用到，保留最近几个
+            while len(_snapshots) > SNAPSHOT_KEEP:
+                old = _snapshots.pop(next(iter(_snapshots)))
+                try:
+                    os.remove(old)
+                except OSError:
+                    pass
+        return version, path
+
+
+def _segment_chunk(version: str, snapshot: str, pairs: List[Tuple[str, str]]) -> List[List[SegmentedWord]]:
+    """工作进程入口：分词一批句子（分词器版本变化时才从快照加载）"""
+    global _worker_segmenter
+    if _worker_segmenter is None or _worker_segmenter[0] != version:
+        with open(snapshot, 'rb') as f:
+            _worker_segmenter = (version, pickle.load(f))
+    segmenter = _worker_segmenter[1]
+    return [segmenter.segment(text, hiragana) for text, hiragana in pairs]
+
+
+class DictionaryTrie:
+    """
+    词典前缀树
+
+    每个词条带有词性和优先级（数值越小越优先），一次扫描即可找出
+    从某个位置开始的全部候选词。
+    """
+    
+    # 节点中存放词条信息的键（单个字符永远不会是空串）
+    _TERMINAL = ''
+    
+    def __init__(self, groups: Iterable[Tuple[Iterable[str], str]] = ()):
+        """
+        Args:
+            groups: (词表, 词性) 序列，排在前面的词表优先级更高
+        """
+        self._root: Dict[str, Any] = {}
+        self.size = 0
+        for rank, (words, word_type) in enumerate(groups):
+            for word in words:
+                self.add(word, word_type, rank)
+    
+    def add(self, word: str, word_type: str, rank: int = 0):
+        """添加词条；同一个词出现在多个词表时保留优先级最高的词性"""
+        if not word:
+            return
+        node = self._root
+        for char in word:
+            node = node.setdefault(char, {})
+        existing = node.get(self._TERMINAL)
+        if existing is None:
+            self.size += 1
+        if existing is None or rank < existing[0]:
+            node[self._TERMINAL] = (rank, word_type)
+    
+    def get(self, word: str) -> Optional[Tuple[int, str]]:
+        """词条的 (优先级, 词性)，不存在时返回 None"""
+        node = self._root
+        for char in word:
+            node = node.get(char)
+            if node is None:
+                return None
+        return node.get(self._TERMINAL)
+    
+    def __len__(self) -> int:
+        return self.size
+    
+    def matches(self, text: str, start: int = 0) -> List[Tuple[int, str, int]]:
+        """
+        列出从 start 开始的所有词典匹配
+        
+        Returns:
+            [(匹配长度, 词性, 优先级), ...]，按长度递增
+        """
+        results = []
+        node = self._root
+        terminal = self._TERMINAL
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            entry = node.get(terminal)
+            if entry is not None:
+                results.append((i - start + 1, entry[1], entry[0]))
+        return results
+    
+    def longest_match(self, text: str, start: int = 0) -> Optional[Tuple[int, str]]:
+        """
+        按优先级取最长匹配：先比较词表优先级，同一词表内取最长
+        
+        Returns:
+            (匹配长度, 词性)，无匹配时返回 None
+        """
+        best = None
+        node = self._root
+        terminal = self._TERMINAL
+        for i in range(start, len(text)):
+            node = node.get(text[i])
+            if node is None:
+                break
+            entry = node.get(terminal)
+            if entry is not None and (best is None or entry[0] <= best[0]):
+                best = (entry[0], i - start + 1, entry[1])
+        if best is None:
+            return None
+        return best[1], best[2]
+
+
+def _char_class(char: str) -> str:
+    """字符类别：kanji/hiragana/katakana/other"""
+    if '\u4e00' <= char <= '\u9fff' or char == '々':
+        return 'kanji'
+    if '\u3041' <= char <= '\u309f':
+        return 'hiragana'
+    if '\u30a0' <= char <= '\u30ff':
+        return 'katakana'
+    return 'other'
+
+
 class JapaneseSegmenter:
     """日文自动分词器"""
     
@@ -49,8 +244,94 @@ class JapaneseSegmenter:
         '特に', 'とくに', '主に', 'おもに', '大体', 'だいたい'
     }
     
-    def __init__(self):
+    # 常见な形容词
+    NA_ADJECTIVES = ('静か', 'しずか', '有名', 'ゆうめい', '便利', 'べんり')
+    
+    # 动词变形后缀（按匹配顺序）
+    VERB_ENDINGS = (
+        'ます', 'ました', 'ません',
+        'て', 'で', 'た', 'だ',
+        'ない', 'なかった',
+        'れる', 'られる', 'せる', 'させる',
+        'よう', 'ましょう',
+    )
+    
+    # 词格模式额外识别的动词词尾（辞书形、愿望、进行体等）
+    LATTICE_VERB_ENDINGS = VERB_ENDINGS + (
+        'う', 'く', 'ぐ', 'す', 'つ', 'ぬ', 'ぶ', 'む', 'る',
+        'たい', 'たくない', 'たかった',
+        'ている', 'ています', 'ていました', 'てください',
+        'でいる', 'でいます', 'でいました', 'でください',
+    )
+    
+    # 分词模式：greedy（从左到右贪心匹配）/ lattice（词格 + 最小代价路径）
+    MODES = ('greedy', 'lattice')
+    
+    # 词格模式下各类候选词的代价，越小越优先
+    WORD_COSTS = {
+        'aux_verb': 300,
+        'particle': 300,
+        'adverb': 400,
+        'pronoun': 400,
+        'verb': 500,
+        'adjective_na': 500,
+        'adjective_i': 600,
+        'noun': 700,
+        'unknown': 1000,
+    }
+    
+    # 词格模式下用户词典词条的代价优惠
+    USER_WORD_BONUS = 200
+    
+    # 词格模式下送假名每个字符的附加代价
+    OKURIGANA_COST = 150
+    
+    # 词格模式下规则候选词的长度上限
+    LATTICE_MAX_NOUN = 8
+    LATTICE_MAX_KANJI_STEM = 2
+    LATTICE_MAX_OKURIGANA = 2
+    
+    # 不会出现在送假名中的假名（多为助词）
+    NON_OKURIGANA = {'は', 'を', 'へ', 'て', 'で'}
+    
+    # 批量分词时启用进程池的最小句子数
+    PARALLEL_THRESHOLD = 64
+    
+    # 功能词词典（类加载时编译一次），顺序即匹配优先级
+    DICTIONARY = DictionaryTrie((
+        (AUX_VERBS, 'aux_verb'),
+        (PARTICLES, 'particle'),
+        (ADVERBS, 'adverb'),
+        (PRONOUNS, 'pronoun'),
+    ))
+    
+    # 动词词尾词典（词格模式使用）
+    VERB_ENDING_TRIE = DictionaryTrie(((LATTICE_VERB_ENDINGS, 'verb'),))
+    
+    def __init__(self, mode: str = 'greedy', known_prototypes: Optional[Iterable[str]] = None,
+                 user_dictionary=None):
+        """
+        Args:
+            mode: 分词模式（greedy/lattice）
+            known_prototypes: 已知动词原型，识别原型时优先；默认取用户词典中的原型
+            user_dictionary: 用户词典（UserDictionary），参与最长匹配
+        """
+        if mode not in self.MODES:
+            raise ValueError(f'未知的分词模式: {mode}')
+        self.mode = mode
         self.verb_conjugator = VerbConjugator()
+        self.verb_deconjugator = VerbDeconjugator()
+        self.user_dictionary = user_dictionary
+        if known_prototypes is None and user_dictionary is not None:
+            self.known_prototypes = user_dictionary.prototypes
+        else:
+            self.known_prototypes = set(known_prototypes or ())
+    
+    @property
+    def version(self) -> str:
+        """分词器版本（规则版本 + 模式 + 用户词典版本），用作分词缓存的一部分键"""
+        user_revision = self.user_dictionary.revision if self.user_dictionary is not None else '0'
+        return f'{RULES_VERSION}-{self.mode}-u{user_revision}'
     
     def segment(self, text: str, hiragana: str) -> List[SegmentedWord]:
         """
@@ -63,152 +344,327 @@ class JapaneseSegmenter:
         Returns:
             分词结果列表
         """
-        words = []
+        return list(self.iter_segments(text, hiragana))
+    
+    def iter_segments(self, text: str, hiragana: str) -> Iterator[SegmentedWord]:
+        """
+        逐个生成分词结果（按字符偏移扫描，不复制剩余字符串）
+        
+        Args:
+            text: 原文
+            hiragana: 平假名注音（按字符位置与原文对齐）
+            
+        Yields:
+            分词结果
+        """
+        if self.mode == 'lattice':
+            yield from self._iter_lattice(text, hiragana)
+            return
+        
         position = 0
-        remaining_text = text
-        remaining_hira = hiragana
+        offset = 0
+        n = len(text)
         
-        while remaining_text:
+        while offset < n:
             # 跳过标点符号
-            if remaining_text[0] in self.PUNCTUATIONS:
-                remaining_text = remaining_text[1:]
-                if remaining_hira:
-                    remaining_hira = remaining_hira[1:]
+            if text[offset] in self.PUNCTUATIONS:
+                offset += 1
                 continue
             
-            word, word_type, word_hira, consumed = self._match_word(
-                remaining_text, remaining_hira
-            )
+            word, word_type, word_hira, consumed = self._match_word(text, hiragana, offset)
             
             if word:
-                grammar_info = self._get_grammar_info(word, word_type, word_hira)
-                
-                seg_word = SegmentedWord(
-                    raw_entry_id=0,  # 稍后设置
-                    word_jp=word,
-                    hiragana=word_hira,
-                    word_type=word_type,
-                    position=position,
-                    grammar_info=grammar_info,
-                    verb_id=None
-                )
-                
-                # 如果是动词，识别原型
-                if word_type == 'verb':
-                    verb_info = self._detect_verb(word, word_hira)
-                    if verb_info:
-                        seg_word.grammar_info.update(verb_info)
-                
-                words.append(seg_word)
+                yield self._build_word(word, word_type, word_hira, position)
                 position += 1
             
-            remaining_text = remaining_text[consumed:]
-            remaining_hira = remaining_hira[len(word_hira):]
+            offset += consumed
+    
+    def segment_many(self, pairs: Iterable[Tuple[str, str]], workers: int = 0) -> List[List[SegmentedWord]]:
+        """
+        批量分词
+        
+        Args:
+            pairs: (原文, 平假名注音) 序列
+            workers: 进程池工作进程数；小于2或句子数较少时在当前进程内顺序执行
+            
+        Returns:
+            分词结果列表，顺序与输入一致
+        """
+        pairs = list(pairs)
+        if workers < 2 or len(pairs) < self.PARALLEL_THRESHOLD:
+            return [self.segment(text, hiragana) for text, hiragana in pairs]
+        
+        # 每个工作进程分到若干块，块内顺序执行，map 保证结果顺序
+        chunk_size = max(1, -(-len(pairs) // (workers * 4)))
+        chunks = [pairs[i:i + chunk_size] for i in range(0, len(pairs), chunk_size)]
+        
+        # 分词器（含用户词典）按版本只序列化一次，各工作进程按版本缓存
+        version, snapshot = _snapshot(self)
+        
+        results = []
+        executor = _get_executor(workers)
+        n = len(chunks)
+        for chunk_result in executor.map(_segment_chunk, [version] * n, [snapshot] * n, chunks):
+            results.extend(chunk_result)
+        return results
+    
+    def _build_word(self, word: str, word_type: str, word_hira: str, position: int) -> SegmentedWord:
+        """构建分词结果（附带语法信息）"""
+        grammar_info = self._get_grammar_info(word, word_type, word_hira)
+        
+        seg_word = SegmentedWord(
+            raw_entry_id=0,  # 稍后设置
+            word_jp=word,
+            hiragana=word_hira,
+            word_type=word_type,
+            position=position,
+            grammar_info=grammar_info,
+            verb_id=None
+        )
+        
+        # 如果是动词，识别原型
+        if word_type == 'verb':
+            verb_info = self._detect_verb(word, word_hira)
+            if verb_info:
+                seg_word.grammar_info.update(verb_info)
+        
+        return seg_word
+    
+    def _iter_lattice(self, text: str, hiragana: str) -> Iterator[SegmentedWord]:
+        """
+        词格分词：在每个字符位置列出全部词典/规则候选词，
+        再用动态规划求代价最小的路径
+        
+        没有候选词跨过的位置是所有路径的必经点，到达这样的位置时
+        之前的最优路径已经确定，可以先输出，不必等整段文本处理完。
+        """
+        n = len(text)
+        if n == 0:
+            return
+        
+        # best[i]: 到达位置 i 的最小代价；back[i]: (起点, 词性)
+        inf = float('inf')
+        best = [inf] * (n + 1)
+        back: List[Optional[Tuple[int, Optional[str]]]] = [None] * (n + 1)
+        best[0] = 0
+        run_end = self._run_ends(text)
+        
+        position = 0
+        flushed = 0  # 已输出路径的终点
+        reach = 0    # 已生成候选词的最远结束位置
+        
+        for i in range(n):
+            if i > flushed and reach <= i:
+                for word in self._lattice_words(text, hiragana, back, flushed, i, position):
+                    yield word
+                    position += 1
+                flushed = i
+            
+            cost_i = best[i]
+            if cost_i == inf:
+                continue
+            for end, word_type, cost in self._lattice_candidates(text, i, run_end):
+                if end > reach:
+                    reach = end
+                total = cost_i + cost
+                if total < best[end]:
+                    best[end] = total
+                    back[end] = (i, word_type)
+        
+        yield from self._lattice_words(text, hiragana, back, flushed, n, position)
+    
+    def _lattice_words(self, text: str, hiragana: str, back: list,
+                       start: int, end: int, position: int) -> List[SegmentedWord]:
+        """从 end 回溯到 start，构建这一段最优路径上的单词"""
+        spans = []
+        while end > start:
+            begin, word_type = back[end]
+            if word_type is not None:
+                spans.append((begin, end, word_type))
+            end = begin
+        spans.reverse()
+        
+        return [
+            self._build_word(text[begin:end], word_type, hiragana[begin:end], position + k)
+            for k, (begin, end, word_type) in enumerate(spans)
+        ]
+    
+    @staticmethod
+    def _run_ends(text: str) -> List[int]:
+        """run_end[i]: 从 i 开始的同类字符串（汉字/平假名/片假名）的结束位置"""
+        n = len(text)
+        run_end = [n] * n
+        for i in range(n - 2, -1, -1):
+            if _char_class(text[i]) == _char_class(text[i + 1]):
+                run_end[i] = run_end[i + 1]
+            else:
+                run_end[i] = i + 1
+        return run_end
+    
+    def _okurigana_ends(self, text: str, kana_start: int):
+        """
+        列出汉字串之后送假名的可能结束位置
         
-        return words
+        Yields:
+            (送假名结束位置, 送假名长度)，长度为 0 表示没有送假名
+        """
+        yield kana_start, 0
+        limit = min(kana_start + self.LATTICE_MAX_OKURIGANA, len(text))
+        for end in range(kana_start + 1, limit + 1):
+            char = text[end - 1]
+            if _char_class(char) != 'hiragana' or char in self.NON_OKURIGANA:
+                break
+            yield end, end - kana_start
     
-    def _match_word(self, text: str, hiragana: str) -> Tuple[Optional[str], str, str, int]:
+    def _lattice_candidates(self, text: str, start: int, run_end: List[int]):
         """
-        匹配一个单词
+        列出从 start 开始的候选词
+        
+        Yields:
+            (结束位置, 词性, 代价)；标点符号的词性为 None，不输出为单词
+        """
+        costs = self.WORD_COSTS
+        char = text[start]
+        
+        if char in self.PUNCTUATIONS:
+            yield start + 1, None, 0
+            return
+        
+        # 1. 功能词词典（同一个词出现在多个词表时按优先级取词性）
+        for length, word_type, rank in self.DICTIONARY.matches(text, start):
+            yield start + length, word_type, costs[word_type] + rank
+        
+        # 用户词典（来自语料库的词条）
+        if self.user_dictionary is not None:
+            for length, word_type, _ in self.user_dictionary.trie.matches(text, start):
+                yield start + length, word_type, costs[word_type] - self.USER_WORD_BONUS
+        
+        # 2. な形容词
+        for adj in self.NA_ADJECTIVES:
+            if text.startswith(adj, start):
+                yield start + len(adj), 'adjective_na', costs['adjective_na']
+        
+        char_class = _char_class(char)
+        
+        # 3. 动词：词干（1-2个汉字 + 送假名，或不超过2个平假名）+ 词尾
+        #    汉字后直接接「で/だ」的不是动词（如「部屋で」）
+        if char_class == 'kanji' and run_end[start] - start <= self.LATTICE_MAX_KANJI_STEM:
+            kana_start = run_end[start]
+            for j, okurigana in self._okurigana_ends(text, kana_start):
+                for length, _, _ in self.VERB_ENDING_TRIE.matches(text, j):
+                    if okurigana == 0 and text[j] in ('で', 'だ'):
+                        continue
+                    yield j + length, 'verb', costs['verb'] + okurigana * self.OKURIGANA_COST
+        elif char_class == 'hiragana':
+            for j in range(start + 1, min(run_end[start], start + 2) + 1):
+                for length, _, _ in self.VERB_ENDING_TRIE.matches(text, j):
+                    yield j + length, 'verb', costs['verb'] + 2 * self.OKURIGANA_COST
+        
+        # 4. い形容词：1-2个汉字 + 以「い」结尾的送假名
+        if char_class == 'kanji' and run_end[start] - start <= self.LATTICE_MAX_KANJI_STEM:
+            for j, okurigana in self._okurigana_ends(text, run_end[start]):
+                if j < len(text) and text[j] == 'い':
+                    yield j + 1, 'adjective_i', costs['adjective_i'] + okurigana * self.OKURIGANA_COST
+        
+        # 5. 名词：汉字/片假名串的所有前缀
+        if char_class in ('kanji', 'katakana'):
+            limit = min(run_end[start], start + self.LATTICE_MAX_NOUN)
+            for end in range(start + 1, limit + 1):
+                yield end, 'noun', costs['noun']
+        else:
+            # 兜底：未登录的假名串（最长4字符），单字符保证路径连通
+            limit = min(run_end[start], start + 4)
+            for end in range(start + 1, limit + 1):
+                yield end, 'noun', costs['unknown']
+    
+    def _match_word(self, text: str, hiragana: str, start: int = 0) -> Tuple[Optional[str], str, str, int]:
+        """
+        匹配从 start 开始的一个单词
         
         Returns:
             (word, word_type, word_hiragana, consumed_chars)
         """
-        # 1. 优先匹配助动词（通常较长）
-        for aux in sorted(self.AUX_VERBS, key=len, reverse=True):
-            if text.startswith(aux):
-                return aux, 'aux_verb', self._get_hiragana(text[:len(aux)], hiragana), len(aux)
-        
-        # 2. 匹配助词
-        for particle in sorted(self.PARTICLES, key=len, reverse=True):
-            if text.startswith(particle):
-                return particle, 'particle', self._get_hiragana(text[:len(particle)], hiragana), len(particle)
-        
-        # 3. 匹配副词
-        for adv in sorted(self.ADVERBS, key=len, reverse=True):
-            if text.startswith(adv):
-                return adv, 'adverb', self._get_hiragana(text[:len(adv)], hiragana), len(adv)
-        
-        # 4. 匹配代词
-        for pronoun in sorted(self.PRONOUNS, key=len, reverse=True):
-            if text.startswith(pronoun):
-                return pronoun, 'pronoun', self._get_hiragana(text[:len(pronoun)], hiragana), len(pronoun)
+        # 1-4. 词典匹配：助动词 > 助词 > 副词 > 代词，同类取最长
+        dict_match = self.DICTIONARY.longest_match(text, start)
+        
+        # 用户词典：比内置词典的匹配更长时优先
+        if self.user_dictionary is not None:
+            user_match = self.user_dictionary.trie.longest_match(text, start)
+            if user_match and (not dict_match or user_match[0] > dict_match[0]):
+                dict_match = user_match
+        
+        if dict_match:
+            length, word_type = dict_match
+            word = text[start:start + length]
+            return word, word_type, self._get_hiragana(word, hiragana, start), length
         
         # 5. 匹配动词（通过变形特征）
-        verb_match = self._match_verb(text, hiragana)
+        verb_match = self._match_verb(text, hiragana, start)
         if verb_match:
             return verb_match
         
         # 6. 匹配形容词（い结尾或な结尾）
-        adj_match = self._match_adjective(text, hiragana)
+        adj_match = self._match_adjective(text, hiragana, start)
         if adj_match:
             return adj_match
         
         # 7. 默认按2-4字符分割名词
-        return self._split_noun(text, hiragana)
+        return self._split_noun(text, hiragana, start)
     
-    def _get_hiragana(self, word: str, full_hiragana: str) -> str:
+    def _get_hiragana(self, word: str, full_hiragana: str, start: int = 0) -> str:
         """从完整平假名中提取对应部分的读音"""
         # 简化处理：假设原文和假名长度对应
-        return full_hiragana[:len(word)]
+        return full_hiragana[start:start + len(word)]
     
-    def _match_verb(self, text: str, hiragana: str) -> Optional[Tuple]:
+    def _match_verb(self, text: str, hiragana: str, start: int = 0) -> Optional[Tuple]:
         """匹配动词"""
-        # 检查常见动词变形后缀
-        verb_endings = [
-            ('ます', 'verb'), ('ました', 'verb'), ('ません', 'verb'),
-            ('て', 'verb'), ('で', 'verb'), ('た', 'verb'), ('だ', 'verb'),
-            ('ない', 'verb'), ('なかった', 'verb'),
-            ('れる', 'verb'), ('られる', 'verb'), ('せる', 'verb'), ('させる', 'verb'),
-            ('よう', 'verb'), ('ましょう', 'verb'),
-        ]
-        
         # 尝试匹配包含变形后缀的词
-        for ending, word_type in verb_endings:
-            if ending in text[:6]:  # 限制搜索长度
-                # 找到词干（简化处理）
-                idx = text.find(ending)
-                if idx > 0:
-                    word = text[:idx+len(ending)]
-                    return word, word_type, hiragana[:len(word)], len(word)
+        for ending in self.VERB_ENDINGS:
+            idx = text.find(ending, start, start + 6)  # 限制搜索长度
+            # 找到词干（简化处理）
+            if idx > start:
+                end = idx + len(ending)
+                return text[start:end], 'verb', hiragana[start:end], end - start
         
         return None
     
-    def _match_adjective(self, text: str, hiragana: str) -> Optional[Tuple]:
+    def _match_adjective(self, text: str, hiragana: str, start: int = 0) -> Optional[Tuple]:
         """匹配形容词"""
+        remaining = len(text) - start
+        
         # い形容词：以い结尾
-        if len(text) >= 2 and text.endswith('い') and not text.endswith('だい'):
+        if remaining >= 2 and text.endswith('い') and not text.endswith('だい'):
             # 简单判断：排除一些常见的非形容词
-            if text not in ['いい']:  # いい是形容词，但容易误判
-                return text, 'adjective_i', hiragana, len(text)
+            if not (remaining == 2 and text.startswith('いい', start)):  # いい是形容词，但容易误判
+                return text[start:], 'adjective_i', hiragana[start:], remaining
         
         # な形容词：通常后跟「な」
-        if len(text) >= 2:
+        if remaining >= 2:
             # 检查常见的な形容词
-            na_adjs = ['静か', 'しずか', '有名', 'ゆうめい', '便利', 'べんり']
-            for adj in na_adjs:
-                if text.startswith(adj):
-                    return adj, 'adjective_na', hiragana[:len(adj)], len(adj)
+            for adj in self.NA_ADJECTIVES:
+                if text.startswith(adj, start):
+                    return adj, 'adjective_na', hiragana[start:start + len(adj)], len(adj)
         
         return None
     
-    def _split_noun(self, text: str, hiragana: str) -> Tuple[str, str, str, int]:
+    def _split_noun(self, text: str, hiragana: str, start: int = 0) -> Tuple[str, str, str, int]:
         """分割名词（按2-4字符）"""
         # 简单策略：优先取2-4个字符，跳过标点符号
+        remaining = len(text) - start
         for length in [4, 3, 2, 1]:
-            if len(text) >= length:
-                word = text[:length]
+            if remaining >= length:
+                word = text[start:start + length]
                 # 如果包含标点符号，减少长度再试
                 if any(c in self.PUNCTUATIONS for c in word):
                     continue
-                word_hira = hiragana[:length]
+                word_hira = hiragana[start:start + length]
                 return word, 'noun', word_hira, length
         
         # 如果都是标点符号，返回第一个字符作为other类型
-        char = text[0] if text else ''
+        char = text[start] if remaining > 0 else ''
         if char in self.PUNCTUATIONS:
             return char, 'punctuation', char, 1
-        return char, 'other', hiragana[0] if hiragana else '', 1
+        return char, 'other', hiragana[start] if start < len(hiragana) else '', 1
     
     def _get_grammar_info(self, word: str, word_type: str, hiragana: str) -> Dict[str, Any]:
         """获取语法信息"""
@@ -255,37 +711,16 @@ class JapaneseSegmenter:
         return info
     
     def _detect_verb(self, word: str, hiragana: str) -> Optional[Dict[str, Any]]:
-        """检测动词信息"""
-        info = {}
-        
-        # 识别动词变形
-        if word.endswith('ます'):
-            stem = word[:-2]
-            info['form'] = 'masu'
-            info['form_name'] = '礼貌体'
-            info['prototype'] = f"{stem}る"
-            info['verb_class'] = '二类动词'
-            
-        elif word.endswith('ました'):
-            stem = word[:-3]
-            info['form'] = 'mashita'
-            info['form_name'] = '礼貌体过去式'
-            info['prototype'] = f"{stem}る"
-            info['verb_class'] = '二类动词'
-            
-        elif word.endswith('て') or word.endswith('で'):
-            info['form'] = 'te'
-            info['form_name'] = 'て形'
-            
-        elif word.endswith('た') or word.endswith('だ'):
-            info['form'] = 'ta'
-            info['form_name'] = 'た形（过去式）'
-            
-        elif word.endswith('ない'):
-            info['form'] = 'nai'
-            info['form_name'] = '否定形'
+        """检测动词信息（通过逆活用索引识别原型）"""
+        candidates = self.verb_deconjugator.deconjugate(word, hiragana, self.known_prototypes)
+        if not candidates:
+            return None
         
-        return info if info else None
+        info = dict(candidates[0])
+        del info['suffix']
+        if info['prototype_reading'] is None:
+            del info['prototype_reading']
+        return info
 
 
 class VerbConjugator:
@@ -484,6 +919,42 @@ class VerbConjugator:
         'conditional': '条件形'
     }
     
+    # 例句模板（{stem} 为词干）
+    EXAMPLE_TEMPLATES = {
+        'dictionary': '{stem}のが好きです',
+        'masu': '{stem}ます',
+        'te': '{stem}てください',
+        'ta': '昨日、{stem}た',
+        'nai': '{stem}ないでください',
+        'potential': '{stem}ることができます',
+        'passive': '{stem}れました',
+        'causative': '子供を{stem}せました',
+        'volitional': '一緒に{stem}ましょう',
+    }
+    
+    FORM_MEANINGS = {
+        'dictionary': '原型',
+        'masu': '礼貌体',
+        'te': '连接形',
+        'ta': '过去式',
+        'nai': '否定',
+        'potential': '能力',
+        'passive': '被动',
+        'causative': '使役',
+        'causative_passive': '使役被动',
+        'volitional': '意向',
+        'imperative': '命令',
+        'conditional': '假设'
+    }
+    
+    # 活用结果行的字段顺序（与 verb_conjugations 插入列一致，不含 verb_id）
+    ROW_FIELDS = (
+        'form_type', 'form_name', 'form_value', 'reading',
+        'example', 'politeness', 'difficulty', 'meaning'
+    )
+    
+    _templates: Optional[Dict[Tuple[str, ...], Tuple[Tuple, ...]]] = None
+    
     def conjugate(self, prototype: str, reading: str, verb_class: str) -> List[VerbConjugation]:
         """
         生成动词的所有活用形式
@@ -496,132 +967,295 @@ class VerbConjugator:
         Returns:
             动词活用列表
         """
-        conjugations = []
-        
-        if verb_class == '一类动词':
-            conjugations = self._conjugate_godan(prototype, reading)
-        elif verb_class == '二类动词':
-            conjugations = self._conjugate_ichidan(prototype, reading)
-        elif verb_class == '三类动词':
-            conjugations = self._conjugate_irregular(prototype, reading)
+        return [
+            VerbConjugation(verb_id=0, **dict(zip(self.ROW_FIELDS, row)))  # verb_id 稍后设置
+            for row in self.conjugation_rows(prototype, reading, verb_class)
+        ]
+    
+    def conjugate_many(self, verbs: Dict[int, Tuple[str, str, str]]) -> List[Tuple]:
+        """
+        批量生成活用形式
         
-        return conjugations
+        Args:
+            verbs: {verb_id: (原型, 读音, 动词类别)}
+            
+        Returns:
+            (verb_id, form_type, form_name, form_value, reading, example, politeness, difficulty, meaning)
+            行列表，可直接用于 executemany
+        """
+        rows = []
+        for verb_id, (prototype, reading, verb_class) in verbs.items():
+            rows.extend((verb_id,) + row for row in self.conjugation_rows(prototype, reading, verb_class))
+        return rows
     
-    def _conjugate_godan(self, prototype: str, reading: str) -> List[VerbConjugation]:
-        """生成一类动词（五段）活用"""
-        stem = prototype[:-1]
-        stem_reading = reading[:-1]
-        ending = reading[-1]
+    @staticmethod
+    @lru_cache(maxsize=4096)
+    def conjugation_rows(prototype: str, reading: str, verb_class: str) -> Tuple[Tuple, ...]:
+        """按原型缓存的活用结果行（字段顺序见 ROW_FIELDS）"""
+        templates = VerbConjugator.templates()
         
-        if ending not in self.GODAN_CONJUGATIONS:
-            return []
+        if verb_class == '一类动词':
+            ending = reading[-1:]
+            if ('godan', ending) not in templates:
+                return ()
+            return VerbConjugator._fill(templates[('godan', ending)], prototype[:-1], reading[:-1])
         
-        rules = self.GODAN_CONJUGATIONS[ending]
-        conjugations = []
+        if verb_class == '二类动词':
+            return VerbConjugator._fill(templates[('ichidan',)], prototype[:-1], reading[:-1])
         
-        for form_type, (suffix, suffix_reading) in rules.items():
-            conj = VerbConjugation(
-                verb_id=0,  # 稍后设置
-                form_type=form_type,
-                form_name=self.FORM_NAMES.get(form_type, form_type),
-                form_value=f"{stem}{suffix}",
-                reading=f"{stem_reading}{suffix_reading}",
-                example=self._generate_example(stem, suffix, form_type),
-                politeness='polite' if form_type in ['masu'] else 'plain',
-                difficulty=1 if form_type in ['dictionary', 'masu'] else (2 if form_type in ['te', 'ta', 'nai'] else 3),
-                meaning=self._get_form_meaning(form_type)
-            )
-            conjugations.append(conj)
-        
-        return conjugations
-    
-    def _conjugate_ichidan(self, prototype: str, reading: str) -> List[VerbConjugation]:
-        """生成二类动词（一段）活用"""
-        stem = prototype[:-1]
-        stem_reading = reading[:-1]
-        
-        conjugations = []
-        
-        for form_type, (suffix, suffix_reading) in self.ICHIDAN_CONJUGATIONS.items():
-            conj = VerbConjugation(
-                verb_id=0,
-                form_type=form_type,
-                form_name=self.FORM_NAMES.get(form_type, form_type),
-                form_value=f"{stem}{suffix}",
-                reading=f"{stem_reading}{suffix_reading}",
-                example=self._generate_example(stem, suffix, form_type),
-                politeness='polite' if form_type in ['masu'] else 'plain',
-                difficulty=1 if form_type in ['dictionary', 'masu'] else (2 if form_type in ['te', 'ta', 'nai'] else 3),
-                meaning=self._get_form_meaning(form_type)
-            )
-            conjugations.append(conj)
+        if verb_class == '三类动词':
+            return VerbConjugator._fill_irregular(templates, prototype, reading)
         
-        return conjugations
+        return ()
     
-    def _conjugate_irregular(self, prototype: str, reading: str) -> List[VerbConjugation]:
+    @classmethod
+    def templates(cls) -> Dict[Tuple[str, ...], Tuple[Tuple, ...]]:
+        """
+        各类动词的活用模板（首次使用时编译）
+        
+        Returns:
+            {('godan', 词尾) / ('ichidan',) / ('suru',) / ('kuru',):
+             ((form_type, form_name, 后缀, 后缀读音, 例句模板, politeness, difficulty, meaning), ...)}
+        """
+        if cls._templates is None:
+            def compile_rules(rules, fixed_difficulty=None):
+                return tuple(
+                    (
+                        form_type,
+                        cls.FORM_NAMES.get(form_type, form_type),
+                        suffix,
+                        suffix_reading,
+                        cls.EXAMPLE_TEMPLATES.get(form_type, '{stem}...'),
+                        'polite' if form_type in ['masu'] else 'plain',
+                        fixed_difficulty or (1 if form_type in ['dictionary', 'masu'] else (2 if form_type in ['te', 'ta', 'nai'] else 3)),
+                        cls.FORM_MEANINGS.get(form_type, '')
+                    )
+                    for form_type, (suffix, suffix_reading) in rules.items()
+                )
+            
+            templates = {('godan', ending): compile_rules(rules) for ending, rules in cls.GODAN_CONJUGATIONS.items()}
+            templates[('ichidan',)] = compile_rules(cls.ICHIDAN_CONJUGATIONS)
+            templates[('suru',)] = compile_rules(cls.IRREGULAR_VERBS['する'], fixed_difficulty=3)
+            templates[('kuru',)] = compile_rules(cls.IRREGULAR_VERBS['来る'], fixed_difficulty=3)
+            cls._templates = templates
+        return cls._templates
+    
+    @staticmethod
+    def _fill(template: Tuple[Tuple, ...], stem: str, stem_reading: str) -> Tuple[Tuple, ...]:
+        """一类/二类动词：词干 + 后缀"""
+        return tuple(
+            (form_type, form_name, f"{stem}{suffix}", f"{stem_reading}{suffix_reading}",
+             example.format(stem=stem), politeness, difficulty, meaning)
+            for form_type, form_name, suffix, suffix_reading, example, politeness, difficulty, meaning in template
+        )
+    
+    @staticmethod
+    def _fill_irregular(templates: Dict, prototype: str, reading: str) -> Tuple[Tuple, ...]:
         """生成三类动词（不规则）活用"""
         # 检查是否是来る
-        if '来' in prototype or reading.endswith('くる'):
-            rules = self.IRREGULAR_VERBS['来る']
-        else:
-            rules = self.IRREGULAR_VERBS['する']
+        is_kuru = '来' in prototype or reading.endswith('くる')
+        template = templates[('kuru',)] if is_kuru else templates[('suru',)]
+        example_stem = prototype.replace('する', '').replace('来る', '')
         
-        conjugations = []
-        
-        for form_type, (written, yomi) in rules.items():
+        rows = []
+        for form_type, form_name, written, yomi, example, politeness, difficulty, meaning in template:
             # 根据原型选择正确形式
             if '来る' in prototype:
-                form_value = written if '来' in prototype else written.replace('来', '来')
+                form_value = written
                 form_reading = yomi
             else:
-                form_value = written.replace('する', prototype)
+                # サ变复合动词（勉強する）：词干 + する的活用
+                if prototype.endswith('する'):
+                    form_value = prototype[:-2] + written
+                else:
+                    form_value = written.replace('する', prototype)
                 form_reading = reading.replace('する', yomi)
             
-            conj = VerbConjugation(
-                verb_id=0,
-                form_type=form_type,
-                form_name=self.FORM_NAMES.get(form_type, form_type),
-                form_value=form_value,
-                reading=form_reading,
-                example=self._generate_example(prototype.replace('する', '').replace('来る', ''), '', form_type),
-                politeness='polite' if form_type in ['masu'] else 'plain',
-                difficulty=3,
-                meaning=self._get_form_meaning(form_type)
+            rows.append((form_type, form_name, form_value, form_reading,
+                         example.format(stem=example_stem), politeness, difficulty, meaning))
+        return tuple(rows)
+
+
+class VerbDeconjugator:
+    """
+    动词逆活用索引
+    
+    由 VerbConjugator 的活用表反向构建：把每个活用后缀映射回
+    (原型词尾, 动词类别, 活用形式) 候选，存放在按字符倒序的后缀树中，
+    一次查询只需沿单词末尾走一遍。
+    """
+    
+    # 活用表中没有、但由 ます形/ない形/て形 派生的常见形式：(基础形式, 基础词尾, 派生词尾, 派生形式)
+    # 基础词尾为空表示直接接在基础形式后面（词格模式会整体切出「読んでいます」这样的进行体）
+    DERIVED_FORMS = (
+        ('masu', 'ます', 'ました', 'mashita'),
+        ('masu', 'ます', 'ません', 'masen'),
+        ('masu', 'ます', 'ましょう', 'mashou'),
+        ('nai', 'ない', 'なかった', 'nakatta'),
+        ('te', '', 'いる', 'te_iru'),
+        ('te', '', 'います', 'te_imasu'),
+        ('te', '', 'いました', 'te_imashita'),
+        ('te', '', 'ください', 'te_kudasai'),
+    )
+    
+    # 活用不规则的五段动词：{原型: (读音, 与活用表不同的形式 {form_type: (后缀, 后缀读音)})}
+    GODAN_EXCEPTIONS = {
+        '行く': ('いく', {'te': ('って', 'って'), 'ta': ('った', 'った')}),
+    }
+    
+    # 识别结果中的形式名称（其余沿用 VerbConjugator.FORM_NAMES）
+    FORM_NAMES = {
+        'masu': '礼貌体',
+        'mashita': '礼貌体过去式',
+        'masen': '礼貌体否定',
+        'mashou': '礼貌体劝诱',
+        'te': 'て形',
+        'ta': 'た形（过去式）',
+        'nai': '否定形',
+        'nakatta': '否定过去式',
+        'te_iru': '进行体',
+        'te_imasu': '进行体（礼貌）',
+        'te_imashita': '进行体过去式（礼貌）',
+        'te_kudasai': '请求',
+    }
+    
+    # 一段动词「る」前面的假名（い段/え段）
+    ICHIDAN_STEM_KANA = set('いきぎしじちぢにひびぴみりえけげせぜてでねへべぺめれ')
+    
+    # 五段动词词干末尾不会出现的假名（它们属于て形/た形，「読んでいます」不是「読んでう」的ます形）
+    GODAN_IMPLAUSIBLE_STEM_KANA = set('てでっん')
+    
+    # 五段动词词尾按常见程度排序（「読んで」优先还原为「読む」而不是「読ぬ」）
+    GODAN_ENDING_ORDER = 'うるむくすつぐぶぬ'
+    
+    _TERMINAL = ''
+    _index: Optional[Dict[str, Any]] = None
+    _index_lock = threading.Lock()
+    
+    @classmethod
+    def index(cls) -> Dict[str, Any]:
+        """获取逆活用后缀树（首次使用时构建，进程内共享）"""
+        if cls._index is None:
+            with cls._index_lock:
+                if cls._index is None:
+                    cls._index = cls._build_index()
+        return cls._index
+    
+    @classmethod
+    def _expand_forms(cls, rules: Dict[str, Tuple[str, str]]):
+        """活用表 + 派生形式：(form_type, 后缀, 后缀读音)"""
+        for form_type, (suffix, suffix_reading) in rules.items():
+            yield form_type, suffix, suffix_reading
+        for base_form, base_ending, ending, form_type in cls.DERIVED_FORMS:
+            suffix, suffix_reading = rules[base_form]
+            if suffix.endswith(base_ending):
+                yield (form_type,
+                       suffix[:len(suffix) - len(base_ending)] + ending,
+                       suffix_reading[:len(suffix_reading) - len(base_ending)] + ending)
+    
+    @classmethod
+    def _build_index(cls) -> Dict[str, Any]:
+        root: Dict[str, Any] = {}
+        
+        def add(suffix, suffix_reading, ending, ending_reading, verb_class, verb_group, form_type):
+            node = root
+            for char in reversed(suffix):
+                node = node.setdefault(char, {})
+            node.setdefault(cls._TERMINAL, []).append(
+                (suffix, suffix_reading, ending, ending_reading, verb_class, verb_group, form_type)
             )
-            conjugations.append(conj)
-        
-        return conjugations
-    
-    def _generate_example(self, stem: str, suffix: str, form_type: str) -> str:
-        """生成例句"""
-        # 简化的例句生成
-        examples = {
-            'dictionary': f'{stem}のが好きです',
-            'masu': f'{stem}ます',
-            'te': f'{stem}てください',
-            'ta': f'昨日、{stem}た',
-            'nai': f'{stem}ないでください',
-            'potential': f'{stem}ることができます',
-            'passive': f'{stem}れました',
-            'causative': f'子供を{stem}せました',
-            'volitional': f'一緒に{stem}ましょう',
-        }
-        return examples.get(form_type, f'{stem}...')
-    
-    def _get_form_meaning(self, form_type: str) -> str:
-        """获取活用形式含义"""
-        meanings = {
-            'dictionary': '原型',
-            'masu': '礼貌体',
-            'te': '连接形',
-            'ta': '过去式',
-            'nai': '否定',
-            'potential': '能力',
-            'passive': '被动',
-            'causative': '使役',
-            'causative_passive': '使役被动',
-            'volitional': '意向',
-            'imperative': '命令',
-            'conditional': '假设'
-        }
-        return meanings.get(form_type, '')
+        
+        for ending, rules in VerbConjugator.GODAN_CONJUGATIONS.items():
+            for form_type, suffix, suffix_reading in cls._expand_forms(rules):
+                add(suffix, suffix_reading, ending, ending, '一类动词', 'godan', form_type)
+        
+        # 不规则五段动词按整词收录（「行って」→「行く」，不会被还原成「行う」）
+        for prototype, (reading, overrides) in cls.GODAN_EXCEPTIONS.items():
+            rules = dict(VerbConjugator.GODAN_CONJUGATIONS[prototype[-1]], **overrides)
+            for form_type, suffix, suffix_reading in cls._expand_forms(rules):
+                add(prototype[:-1] + suffix, reading[:-1] + suffix_reading, prototype, reading,
+                    '一类动词', 'godan', form_type)
+        
+        for form_type, suffix, suffix_reading in cls._expand_forms(VerbConjugator.ICHIDAN_CONJUGATIONS):
+            add(suffix, suffix_reading, 'る', 'る', '二类动词', 'ichidan', form_type)
+        
+        for form_type, written, yomi in cls._expand_forms(VerbConjugator.IRREGULAR_VERBS['する']):
+            add(written, yomi, 'する', 'する', '三类动词', 'suru', form_type)
+        
+        for form_type, written, yomi in cls._expand_forms(VerbConjugator.IRREGULAR_VERBS['来る']):
+            add(written, yomi, '来る', 'くる', '三类动词', 'kuru', form_type)
+            add(yomi, yomi, 'くる', 'くる', '三类动词', 'kuru', form_type)
+        
+        return root
+    
+    def deconjugate(self, word: str, hiragana: str = '',
+                    known_prototypes: Optional[Iterable[str]] = None) -> List[Dict[str, Any]]:
+        """
+        识别动词原型候选
+        
+        Args:
+            word: 活用后的动词（如「食べました」）
+            hiragana: 该词的读音，用于推算原型读音
+            known_prototypes: 已知的动词原型（如 verb_master 中的原型），命中的候选优先
+            
+        Returns:
+            候选列表，按可能性从高到低排序
+        """
+        known = set(known_prototypes or ())
+        ranked = []
+        node = self.index()
+        
+        for i in range(len(word) - 1, -1, -1):
+            node = node.get(word[i])
+            if node is None:
+                break
+            stem = word[:i]
+            for suffix, suffix_reading, ending, ending_reading, verb_class, verb_group, form_type in node.get(self._TERMINAL, ()):
+                prototype = stem + ending
+                # 一类/二类动词必须有词干（原型不能只有词尾）
+                if len(prototype) < 2:
+                    continue
+                
+                prototype_reading = None
+                if hiragana.endswith(suffix_reading):
+                    prototype_reading = hiragana[:len(hiragana) - len(suffix_reading)] + ending_reading
+                
+                candidate = {
+                    'prototype': prototype,
+                    'prototype_reading': prototype_reading,
+                    'verb_class': verb_class,
+                    'verb_group': verb_group,
+                    'form': form_type,
+                    'form_name': self.FORM_NAMES.get(form_type) or VerbConjugator.FORM_NAMES.get(form_type, form_type),
+                    'suffix': suffix
+                }
+                # 五段可能形（書ける）本身就是一段动词的辞书形，不按后缀长度占优
+                specificity = 1 if verb_group == 'godan' and form_type == 'potential' else len(suffix)
+                # 先看词干是否可能是动词词干，再比后缀长度：避免「読んでいます」按最长后缀「います」还原成「読んでう」
+                rank = (prototype not in known, not self._plausible_stem(verb_group, prototype[:-1]),
+                        -specificity, self._class_rank(verb_group, stem, ending))
+                ranked.append((rank, len(ranked), candidate))
+        
+        ranked.sort(key=lambda item: item[:2])
+        return [candidate for _, _, candidate in ranked]
+    
+    def _plausible_stem(self, verb_group: str, stem: str) -> bool:
+        """原型去掉词尾后的词干能否是该类动词的词干（以汉字、片假名结尾的都视为可能）"""
+        if not stem or _char_class(stem[-1]) != 'hiragana':
+            return True
+        if verb_group == 'godan':
+            return stem[-1] not in self.GODAN_IMPLAUSIBLE_STEM_KANA
+        if verb_group == 'ichidan':
+            return stem[-1] in self.ICHIDAN_STEM_KANA
+        return True
+    
+    def _class_rank(self, verb_group: str, stem: str, ending: str) -> int:
+        """后缀长度相同时的类别偏好，越小越优先"""
+        if verb_group == 'suru':
+            # 两个字以上的词干多为サ变复合动词（勉強する）
+            return 0 if len(stem) >= 2 else 3
+        if verb_group == 'kuru':
+            return 3 if stem and ending == 'くる' else 0
+        if verb_group == 'ichidan':
+            return 0 if stem and stem[-1] in self.ICHIDAN_STEM_KANA else 2
+        return 1 + self.GODAN_ENDING_ORDER.find(ending) / 10
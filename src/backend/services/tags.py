@@ -0,0 +1,68 @@
+from typing import List, Tuple
+
+# 投影到 entry_tags 的标签字段（见 JSON 录入模板的 tags 子字段）
+TAG_KEYS = ('grammar_points', 'scene', 'difficulty', 'lesson')
+
+# 查询参数 -> 标签字段
+TAG_FILTERS = {
+    'grammar_point': 'grammar_points',
+    'scene': 'scene',
+    'difficulty': 'difficulty',
+    'lesson': 'lesson'
+}
+
+
+def _tag_value(value):
+    """标签值统一存为文本；空值、布尔值和嵌套结构不索引"""
+    if isinstance(value, bool) or not isinstance(value, (str, int, float)):
+        return None
+    value = str(value)
+    return value or None
+
+
+def project_tags(entry_id: int, tags) -> List[Tuple[int, str, str]]:
+    """
+    把 tags JSON 投影成 entry_tags 行
+
+    数组字段（如 grammar_points）每个元素一行。
+
+    Returns:
+        [(entry_id, key, value), ...]
+    """
+    if not isinstance(tags, dict):
+        return []
+
+    rows = []
+    for key in TAG_KEYS:
+        values = tags.get(key)
+        for value in values if isinstance(values, list) else [values]:
+            value = _tag_value(value)
+            if value is not None:
+                rows.append((entry_id, key, value))
+    return list(dict.fromkeys(rows))
+
+
+def tag_conditions(args, entry_column: str = 'r.id', correlated: bool = False) -> Tuple[List[str], List[str]]:
+    """
+    由查询参数生成标签筛选条件（走 entry_tags 的 (key, value, entry_id) 主键）
+
+    Args:
+        correlated: 生成逐行检查的 EXISTS 条件（只查少量行时用，如随机探测）；
+            默认的 IN 子查询会先取出该标签的全部条目，适合由标签驱动的列表查询
+
+    Returns:
+        (条件列表, 参数列表)
+    """
+    conditions = []
+    params = []
+    for param, key in TAG_FILTERS.items():
+        value = args.get(param)
+        if value:
+            if correlated:
+                conditions.append(
+                    f'EXISTS (SELECT 1 FROM entry_tags WHERE key = ? AND value = ? AND entry_id = {entry_column})'
+                )
+            else:
+                conditions.append(f'{entry_column} IN (SELECT entry_id FROM entry_tags WHERE key = ? AND value = ?)')
+            params.extend([key, value])
+    return conditions, params
@@ -0,0 +1,143 @@
+import hashlib
+import threading
+from typing import Iterable, List, Tuple
+from ..models.database import Database
+from .segmenter import DictionaryTrie
+
+
+class UserDictionary:
+    """
+    用户词典
+
+    启动时由 segmented_words（AI分词结果）、verb_master 和 verb_conjugations 构建，
+    新数据入库后增量更新，供分词器做最长匹配。
+    """
+    
+    # 收录的词性（助词、助动词等功能词由内置词典负责）
+    WORD_TYPES = ('noun', 'verb', 'adjective_i', 'adjective_na', 'adverb', 'pronoun')
+    
+    # 单字词太容易误匹配，不收录
+    MIN_LENGTH = 2
+    
+    def __init__(self):
+        self.trie = DictionaryTrie()
+        self.prototypes = set()
+        # 内容摘要：每个词条（及原型）哈希值之和，与添加顺序无关
+        self._digest = 0
+        self._lock = threading.Lock()
+    
+    def __getstate__(self):
+        # 随分词器发送到批量分词的工作进程时不带锁
+        state = self.__dict__.copy()
+        del state['_lock']
+        return state
+    
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+    
+    @property
+    def revision(self) -> str:
+        """
+        词典版本（由词典内容计算）
+        
+        参与分词缓存和批量分词快照的键：内容相同的词典版本相同，
+        删除数据后重启、或已有词条的词性/优先级变化都会得到新的版本。
+        """
+        return f'{self._digest:016x}'
+    
+    @staticmethod
+    def _entry_hash(*parts) -> int:
+        data = '\0'.join(str(part) for part in parts).encode('utf-8')
+        return int.from_bytes(hashlib.blake2b(data, digest_size=8).digest(), 'big')
+    
+    def _add_entry(self, word: str, word_type: str):
+        """添加一个词条并更新内容摘要（调用方持有锁）"""
+        before = self.trie.get(word)
+        self.trie.add(word, word_type)
+        after = self.trie.get(word)
+        if after != before:
+            if before is not None:
+                self._digest -= self._entry_hash('word', word, *before)
+            self._digest = (self._digest + self._entry_hash('word', word, *after)) & 0xFFFFFFFFFFFFFFFF
+    
+    def locked(self):
+        """持有词典锁的上下文：需要词典的一致视图时使用（如序列化快照），期间 add_words 等待"""
+        return self._lock
+    
+    def load(self, db_path=None):
+        """从数据库构建词典"""
+        with Database.read_connection(db_path) as conn:
+            cursor = conn.cursor()
+            
+            # 1. AI分词结果，同一个词有多种词性时取出现次数最多的
+            placeholders = ','.join(['?' for _ in self.WORD_TYPES])
+            cursor.execute(f'''
+                SELECT word_jp, word_type, COUNT(*) AS freq
+                FROM segmented_words
+                WHERE (source IS NULL OR source != 'auto')
+                AND length(word_jp) >= ?
+                AND word_type IN ({placeholders})
+                GROUP BY word_jp, word_type
+                ORDER BY freq DESC
+            ''', (self.MIN_LENGTH, *self.WORD_TYPES))
+            words = [(row[0], row[1]) for row in cursor.fetchall()]
+            
+            # 2. 动词原型及其活用形式
+            cursor.execute('SELECT prototype FROM verb_master')
+            prototypes = [row[0] for row in cursor.fetchall()]
+            cursor.execute('SELECT form_value FROM verb_conjugations')
+            words.extend((row[0], 'verb') for row in cursor.fetchall())
+        
+        self.add_words(words, prototypes)
+    
+    def collect(self, cursor, entries: list) -> Tuple[List[Tuple[str, str]], List[str]]:
+        """
+        收集一批入库数据中的新词（在入库事务内调用，事务提交后再 add_words）
+        
+        Args:
+            entries: 确认入库的预览条目
+            
+        Returns:
+            ([(单词, 词性), ...], [动词原型, ...])
+        """
+        words = []
+        prototypes = set()
+        for entry_data in entries:
+            if entry_data.get('segmentation_source') == 'auto':
+                continue
+            for word_data in entry_data.get('segmented_words', []):
+                if word_data.get('word_type') in self.WORD_TYPES:
+                    words.append((word_data.get('word_jp', ''), word_data['word_type']))
+                prototype = (word_data.get('grammar_info') or {}).get('prototype')
+                if word_data.get('word_type') == 'verb' and prototype and prototype not in self.prototypes:
+                    prototypes.add(prototype)
+        
+        # 新动词的活用形式
+        if prototypes:
+            placeholders = ','.join(['?' for _ in prototypes])
+            cursor.execute(f'''
+                SELECT c.form_value FROM verb_conjugations c
+                JOIN verb_master v ON c.verb_id = v.id
+                WHERE v.prototype IN ({placeholders})
+            ''', list(prototypes))
+            words.extend((row[0], 'verb') for row in cursor.fetchall())
+        
+        return words, list(prototypes)
+    
+    def add_words(self, words: Iterable[Tuple[str, str]], prototypes: Iterable[str] = ()):
+        """增量添加词条；已有的词保留原词性"""
+        with self._lock:
+            for word, word_type in words:
+                if word and len(word) >= self.MIN_LENGTH:
+                    self._add_entry(word, word_type)
+            for prototype in prototypes:
+                if prototype not in self.prototypes:
+                    self.prototypes.add(prototype)
+                    self._digest = (self._digest + self._entry_hash('prototype', prototype)) & 0xFFFFFFFFFFFFFFFF
+                if len(prototype) >= self.MIN_LENGTH:
+                    self._add_entry(prototype, 'verb')
+
+
+# 进程内共享的用户词典
+user_dictionary = UserDictionary()
@@ -0,0 +1,54 @@
+"""
+测试公共工具：在临时数据库上创建应用、构造确认入库的数据
+"""
+import os
+import sys
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.app import create_app
+from src.backend.models.database import Database
+from src.backend.services.pagination import total_counts
+
+
+def create_test_app(db_path: str, **config):
+    """
+    在 db_path 上建表并创建应用（不启动后台入库线程，批量预览不开进程池）
+
+    Args:
+        config: 覆盖的配置项（如 DATABASE_WRITE_MODE）
+    """
+    app = create_app('testing')
+    app.config.update(DATABASE_PATH=db_path, SEGMENT_WORKERS=0, **config)
+    Database.configure(app.config)
+    Database.init_db(db_path)
+    total_counts.invalidate()
+    return app
+
+
+def make_entry(original_jp: str, hiragana: str, meaning: str = '例句', words: list = (),
+               content_type: str = 'sentence', tags: dict = None) -> dict:
+    """确认入库接口的一条数据（预览结果的格式）"""
+    return {
+        'original_data': {
+            'content_type': content_type,
+            'original_jp': original_jp,
+            'hiragana': hiragana,
+            'chinese_meaning': meaning,
+            'tags': tags or {}
+        },
+        'segmented_words': list(words),
+        'segmentation_source': 'ai'
+    }
+
+
+def make_word(word_jp: str, hiragana: str, word_type: str = 'noun', position: int = 0,
+              prototype: str = None, prototype_reading: str = None) -> dict:
+    """分词结果中的一个词；动词带上原型"""
+    grammar_info = {}
+    if prototype:
+        grammar_info = {'prototype': prototype, 'prototype_reading': prototype_reading or hiragana}
+    return {'word_jp': word_jp, 'hiragana': hiragana, 'word_type': word_type,
+            'position': position, 'grammar_info': grammar_info}
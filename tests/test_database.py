@@ -0,0 +1,153 @@
+"""
+models/database 的测试：单写线程的组提交与 SAVEPOINT 回滚、只读连接池、写入排队超时返回 503
+
+运行：python -m pytest tests
+"""
+import os
+import sqlite3
+import tempfile
+import threading
+import unittest
+
+from support import create_test_app, make_entry
+from src.backend.models.database import Database, WriteQueue, WriteTimeoutError
+
+
+class WriteQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'writer.db')
+        conn = sqlite3.connect(self.path)
+        conn.execute('CREATE TABLE t (v INTEGER UNIQUE)')
+        conn.commit()
+        conn.close()
+        self.writer = WriteQueue(self.path, max_size=16, timeout=5.0, batch_size=16)
+
+    def tearDown(self):
+        self.writer.close()
+        self.tmp.cleanup()
+
+    def values(self) -> list:
+        conn = sqlite3.connect(self.path)
+        try:
+            return [row[0] for row in conn.execute('SELECT v FROM t ORDER BY v')]
+        finally:
+            conn.close()
+
+    def block_writer(self):
+        """让写线程卡在一个写操作里，之后提交的写操作会积压成同一批"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocker(cursor):
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=self.writer.submit, args=(blocker,))
+        thread.start()
+        self.assertTrue(started.wait(5))
+        return release, thread
+
+    def test_failed_write_rolls_back_alone(self):
+        """同一批里一个写操作失败：只回滚它自己的修改，其他写操作照常提交"""
+        release, blocker = self.block_writer()
+
+        def good(value):
+            return lambda cursor: cursor.execute('INSERT INTO t (v) VALUES (?)', (value,)).lastrowid
+
+        def bad(cursor):
+            cursor.execute('INSERT INTO t (v) VALUES (99)')
+            cursor.execute('INSERT INTO t (v) VALUES (1)')  # 与第一个写操作冲突
+
+        results = {}
+
+        def run(name, fn):
+            try:
+                results[name] = self.writer.submit(fn)
+            except Exception as e:
+                results[name] = e
+
+        threads = [threading.Thread(target=run, args=args)
+                   for args in (('a', good(1)), ('bad', bad), ('b', good(2)))]
+        for thread in threads:
+            thread.start()
+        while self.writer.pending() < len(threads):
+            threading.Event().wait(0.01)
+
+        commits = self.writer.commits
+        release.set()
+        blocker.join(5)
+        for thread in threads:
+            thread.join(5)
+
+        # 积压的三个写操作在一个事务里提交
+        self.assertEqual(self.writer.commits, commits + 2)
+        self.assertIsInstance(results['bad'], sqlite3.IntegrityError)
+        self.assertIsInstance(results['a'], int)
+        self.assertIsInstance(results['b'], int)
+        self.assertEqual(self.values(), [1, 2])
+
+    def test_queue_timeout(self):
+        """排队超过 timeout：抛出 WriteTimeoutError，写操作不执行"""
+        release, blocker = self.block_writer()
+        try:
+            with self.assertRaises(WriteTimeoutError):
+                self.writer.submit(lambda cursor: cursor.execute('INSERT INTO t (v) VALUES (5)'), timeout=0.1)
+        finally:
+            release.set()
+            blocker.join(5)
+        self.writer.submit(lambda cursor: None)
+        self.assertEqual(self.values(), [])
+
+
+class SingleWriterDatabaseTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'app.db')
+        self.app = create_test_app(self.path, DATABASE_WRITE_MODE='single_writer', DATABASE_WRITE_TIMEOUT=0.2)
+        self.client = self.app.test_client()
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def test_read_connection_rejects_writes(self):
+        """只读连接池的连接设置了 query_only，写语句直接报错"""
+        with Database.read_connection() as conn:
+            self.assertEqual(conn.execute('PRAGMA query_only').fetchone()[0], 1)
+            with self.assertRaises(sqlite3.OperationalError):
+                conn.execute("INSERT INTO ingestion_jobs (id, total) VALUES ('x', 0)")
+
+        Database.write(lambda cursor: cursor.execute("INSERT INTO ingestion_jobs (id, total) VALUES ('x', 0)"))
+        with Database.read_connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM ingestion_jobs').fetchone()[0], 1)
+
+    def test_write_timeout_returns_503(self):
+        """写线程繁忙、排队超时：确认入库返回 503 SERVICE_BUSY，数据没有写入"""
+        started = threading.Event()
+        release = threading.Event()
+
+        def blocker(cursor):
+            started.set()
+            release.wait(5)
+
+        thread = threading.Thread(target=Database.write, args=(blocker,), kwargs={'timeout': 5})
+        thread.start()
+        self.assertTrue(started.wait(5))
+        try:
+            response = self.client.post('/api/entries/p1/confirm?async=0',
+                                        json={'entries': [make_entry('本です。', 'ほんです。')]})
+        finally:
+            release.set()
+            thread.join(5)
+
+        self.assertEqual(response.status_code, 503)
+        self.assertEqual(response.get_json()['error']['code'], 'SERVICE_BUSY')
+        with Database.read_connection() as conn:
+            self.assertEqual(conn.execute('SELECT COUNT(*) FROM raw_entries').fetchone()[0], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,66 @@
+"""
+services/segmenter.VerbDeconjugator 的测试：进行体、不规则五段动词、按词干可能性排序
+
+运行：python -m pytest tests
+"""
+import os
+import sys
+import unittest
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.services.segmenter import VerbDeconjugator
+
+
+class VerbDeconjugatorTest(unittest.TestCase):
+
+    def setUp(self):
+        self.deconjugator = VerbDeconjugator()
+
+    def best(self, word: str, hiragana: str = '') -> dict:
+        candidates = self.deconjugator.deconjugate(word, hiragana)
+        self.assertTrue(candidates, word)
+        return candidates[0]
+
+    def assertPrototype(self, word: str, hiragana: str, prototype: str, reading: str, form: str):
+        candidate = self.best(word, hiragana)
+        self.assertEqual((candidate['prototype'], candidate['prototype_reading'], candidate['form']),
+                         (prototype, reading, form))
+
+    def test_progressive_forms(self):
+        """词格模式切出的～ています：不能按最长后缀「います」还原成「～てう」"""
+        self.assertPrototype('読んでいます', 'よんでいます', '読む', 'よむ', 'te_imasu')
+        self.assertPrototype('勉強しています', 'べんきょうしています', '勉強する', 'べんきょうする', 'te_imasu')
+        self.assertPrototype('食べています', 'たべています', '食べる', 'たべる', 'te_imasu')
+        self.assertPrototype('書いていました', 'かいていました', '書く', 'かく', 'te_imashita')
+        self.assertPrototype('読んでいる', 'よんでいる', '読む', 'よむ', 'te_iru')
+        self.assertPrototype('見てください', 'みてください', '見る', 'みる', 'te_kudasai')
+
+    def test_iku_irregular_te_form(self):
+        """行く的て形/た形是「行って」「行った」，不是「行う」"""
+        self.assertPrototype('行って', 'いって', '行く', 'いく', 'te')
+        self.assertPrototype('行った', 'いった', '行く', 'いく', 'ta')
+        self.assertPrototype('行っています', 'いっています', '行く', 'いく', 'te_imasu')
+        self.assertPrototype('出て行った', 'でていった', '出て行く', 'でていく', 'ta')
+        self.assertPrototype('行きます', 'いきます', '行く', 'いく', 'masu')
+
+    def test_regular_forms_unchanged(self):
+        self.assertPrototype('買います', 'かいます', '買う', 'かう', 'masu')
+        self.assertPrototype('言って', 'いって', '言う', 'いう', 'te')
+        self.assertPrototype('食べます', 'たべます', '食べる', 'たべる', 'masu')
+        self.assertPrototype('勉強します', 'べんきょうします', '勉強する', 'べんきょうする', 'masu')
+
+    def test_implausible_stems_rank_last(self):
+        """词干以て形假名结尾的五段候选排在所有可能的候选之后"""
+        prototypes = [c['prototype'] for c in self.deconjugator.deconjugate('読んでいます', 'よんでいます')]
+        self.assertLess(prototypes.index('読む'), prototypes.index('読んでう'))
+
+    def test_known_prototypes_first(self):
+        candidate = self.deconjugator.deconjugate('待って', 'まって', known_prototypes={'待つ'})[0]
+        self.assertEqual(candidate['prototype'], '待つ')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,132 @@
+"""
+services/distractors 的测试：候选不足、排除正确答案和重复项、每日种子下结果可复现
+
+运行：python -m pytest tests
+"""
+import os
+import random
+import tempfile
+import unittest
+
+from support import create_test_app, make_entry, make_word
+from src.backend.models.database import Database
+from src.backend.routes.practice import _daily_seed
+from src.backend.services.distractors import DISTRACTOR_COUNT, build_options, find_distractors
+from src.backend.services.question_bank import CONJUGATION_TYPE
+
+
+class DistractorsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = create_test_app(os.path.join(self.tmp.name, 'options.db')).test_client()
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def confirm(self, entries: list):
+        response = self.client.post('/api/entries/p/confirm?async=0', json={'entries': entries})
+        self.assertEqual(response.status_code, 200)
+
+    def entry(self, entry_id: int) -> dict:
+        with Database.read_connection() as conn:
+            return dict(conn.execute('SELECT * FROM raw_entries WHERE id = ?', (entry_id,)).fetchone())
+
+    def question(self, entry: dict, q_type: str = 'translation_jp_to_cn') -> dict:
+        answer = entry['chinese_meaning'] if q_type == 'translation_jp_to_cn' else entry['original_jp']
+        return {'type': q_type, 'correct_answer': answer}
+
+    def distractors(self, entry: dict, question: dict, rng=None) -> list:
+        with Database.read_connection() as conn:
+            return find_distractors(conn.cursor(), entry, question, rng=rng)
+
+    def options(self, entry: dict, question: dict, rng=None) -> list:
+        with Database.read_connection() as conn:
+            return build_options(conn.cursor(), entry, question, rng=rng)
+
+    def test_fewer_candidates_than_needed(self):
+        """同类条目不足时干扰项少于 DISTRACTOR_COUNT；一个都没有时不出选择题"""
+        self.confirm([make_entry('雨です。', 'あめです。', '下雨。'),
+                      make_entry('雪です。', 'ゆきです。', '下雪。'),
+                      make_entry('はい', 'はい', '是', content_type='word')])
+        entry = self.entry(1)
+
+        self.assertEqual(self.distractors(entry, self.question(entry)), ['下雪。'])
+        options = self.options(entry, self.question(entry))
+        self.assertEqual(sorted(options), sorted(['下雨。', '下雪。']))
+
+        # 单词类只有一条：只在同类条目中找，没有干扰项
+        word = self.entry(3)
+        self.assertEqual(self.distractors(word, self.question(word)), [])
+        self.assertEqual(self.options(word, self.question(word)), [])
+
+    def test_excludes_answer_and_duplicates(self):
+        """与正确答案相同、彼此重复的候选被跳过，仍尽量凑满"""
+        self.confirm([make_entry(jp, hiragana, meaning) for jp, hiragana, meaning in [
+            ('あの本です。', 'あのほんです。', '那是书。'),
+            ('この本です。', 'このほんです。', '这是书。'),
+            ('その本です。', 'そのほんです。', '那是书。'),
+            ('本です。', 'ほんです。', '是书。'),
+            ('本でした。', 'ほんでした。', '是书。'),
+            ('本だ。', 'ほんだ。', '是书呢。'),
+            ('本かな。', 'ほんかな。', '是书吗。'),
+        ]])
+        entry = self.entry(2)
+        for q_type in ('translation_jp_to_cn', 'translation_cn_to_jp'):
+            with self.subTest(q_type=q_type):
+                question = self.question(entry, q_type)
+                distractors = self.distractors(entry, question)
+                self.assertEqual(len(distractors), DISTRACTOR_COUNT)
+                self.assertNotIn(question['correct_answer'], distractors)
+                self.assertEqual(len(set(distractors)), len(distractors))
+
+                options = self.options(entry, question)
+                self.assertEqual(len(options), DISTRACTOR_COUNT + 1)
+                self.assertEqual(options.count(question['correct_answer']), 1)
+
+        # 排序相邻的意思里有与答案相同的（「那是书。」出现两次）
+        entry = self.entry(1)
+        self.assertNotIn('那是书。', self.distractors(entry, self.question(entry)))
+
+    def test_conjugation_distractors(self):
+        """活用题的干扰项取同一动词的其他活用形"""
+        self.confirm([make_entry('本を読みます。', 'ほんをよみます。', '读书。', words=[
+            make_word('読みます', 'よみます', 'verb', 0, prototype='読む', prototype_reading='よむ')])])
+        with Database.read_connection() as conn:
+            rows = conn.execute('SELECT verb_id, correct_answer FROM question_bank WHERE question_type = ?',
+                                (CONJUGATION_TYPE,)).fetchall()
+        verb_id, answer = rows[0]
+        question = {'type': CONJUGATION_TYPE, 'verb_id': verb_id, 'correct_answer': answer}
+
+        distractors = self.distractors(self.entry(1), question, random.Random(0))
+        self.assertEqual(len(distractors), min(DISTRACTOR_COUNT, len({row[1] for row in rows}) - 1))
+        self.assertTrue(set(distractors) <= {row[1] for row in rows} - {answer})
+
+        self.assertEqual(self.distractors(self.entry(1), {'type': CONJUGATION_TYPE, 'correct_answer': answer}), [])
+
+    def test_deterministic_under_daily_seed(self):
+        """同一天同样参数的种子得到同样的选项和顺序"""
+        self.confirm([make_entry('本を読みます。', 'ほんをよみます。', '读书。', words=[
+            make_word('読みます', 'よみます', 'verb', 0, prototype='読む', prototype_reading='よむ')])]
+            + [make_entry(f'文{i}です。', f'ぶん{i}です。', f'句子{i}') for i in range(6)])
+        with Database.read_connection() as conn:
+            verb_id, answer = conn.execute('SELECT verb_id, correct_answer FROM question_bank WHERE question_type = ?',
+                                           (CONJUGATION_TYPE,)).fetchone()
+
+        entry = self.entry(1)
+        questions = [self.question(entry), self.question(entry, 'translation_cn_to_jp'),
+                     {'type': CONJUGATION_TYPE, 'verb_id': verb_id, 'correct_answer': answer}]
+        seed = _daily_seed('2026-01-01', 'count=20')
+
+        def draw(seed):
+            rng = random.Random(seed)
+            return [self.options(entry, question, rng) for question in questions]
+
+        first = draw(seed)
+        self.assertTrue(all(first))
+        self.assertEqual(draw(seed), first)
+
+
+if __name__ == '__main__':
+    unittest.main()
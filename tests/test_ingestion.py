@@ -0,0 +1,108 @@
+"""
+services/ingestion.bulk_ingest 的测试：预分配的 ID、新旧动词、例句数、50音索引和标签，以及中途失败的回滚
+
+运行：python -m pytest tests
+"""
+import os
+import tempfile
+import unittest
+
+from support import create_test_app, make_entry, make_word
+from src.backend.models.database import Database
+
+
+def eat_entry(original_jp: str, hiragana: str, **kwargs) -> dict:
+    """含「食べる」的句子"""
+    return make_entry(original_jp, hiragana, words=[
+        make_word('パン', 'ぱん', 'noun', 0),
+        make_word('食べます', 'たべます', 'verb', 1, prototype='食べる', prototype_reading='たべる')
+    ], **kwargs)
+
+
+class BulkIngestTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'ingest.db')
+        self.client = create_test_app(self.path).test_client()
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def confirm(self, entries: list):
+        return self.client.post('/api/entries/p/confirm?async=0', json={'entries': entries})
+
+    def query(self, sql: str, params=()) -> list:
+        with Database.read_connection() as conn:
+            return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+
+    def test_new_and_existing_verbs(self):
+        """第二批里既有已收录的动词，也有新动词：ID 紧接已用的 ID，已有动词只增加例句数"""
+        first = self.confirm([eat_entry('パンを食べます。', 'ぱんをたべます。')])
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual([e['entry_id'] for e in first.get_json()['data']['entries']], [1])
+        conjugations = self.query('SELECT COUNT(*) FROM verb_conjugations WHERE verb_id = 1')[0][0]
+        self.assertGreater(conjugations, 0)
+
+        second = self.confirm([
+            eat_entry('パンを食べます。', 'ぱんをたべます。', tags={'lesson': 'L2', 'grammar_points': ['ます形', 'を']}),
+            make_entry('本を読みます。', 'ほんをよみます。', words=[
+                make_word('本', 'ほん', 'noun', 0),
+                make_word('読みます', 'よみます', 'verb', 1, prototype='読む', prototype_reading='よむ'),
+                make_word('食べます', 'たべます', 'verb', 2, prototype='食べる', prototype_reading='たべる')
+            ])
+        ])
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual([e['entry_id'] for e in second.get_json()['data']['entries']], [2, 3])
+
+        # 分词 ID 连续，word_indices 与分词表一致
+        self.assertEqual(self.query('SELECT id, raw_entry_id, verb_id FROM segmented_words ORDER BY id'),
+                         [(1, 1, None), (2, 1, 1), (3, 2, None), (4, 2, 1), (5, 3, None), (6, 3, 2), (7, 3, 1)])
+        self.assertEqual(self.query('SELECT word_indices FROM raw_entries WHERE id = 3'), [('[5, 6, 7]',)])
+
+        # 动词：已有的不重复创建，例句数按用到它的条目计
+        self.assertEqual(self.query('SELECT id, prototype, reading, example_count FROM verb_master ORDER BY id'),
+                         [(1, '食べる', 'たべる', 3), (2, '読む', 'よむ', 1)])
+        self.assertEqual(self.query('SELECT COUNT(*) FROM verb_conjugations WHERE verb_id = 1')[0][0], conjugations)
+        self.assertGreater(self.query('SELECT COUNT(*) FROM verb_conjugations WHERE verb_id = 2')[0][0], 0)
+        self.assertEqual(self.query("SELECT form_value FROM verb_conjugations WHERE verb_id = 2 AND form_type = 'masu'"),
+                         [('読みます',)])
+
+        # 50音索引：原文读音和分词读音各自去重
+        self.assertEqual(
+            self.query("SELECT phonetic FROM phonetic_index WHERE entry_table = 'raw_entries' AND entry_id = 3 ORDER BY id"),
+            [('ほ',), ('ん',), ('を',), ('よ',), ('み',), ('ま',), ('す',)])
+        self.assertEqual(
+            self.query("SELECT phonetic FROM phonetic_index WHERE entry_table = 'segmented_words' AND entry_id = 6 ORDER BY id"),
+            [('よ',), ('み',), ('ま',), ('す',)])
+
+        # 标签投影：数组字段每个元素一行
+        self.assertEqual(self.query('SELECT key, value FROM entry_tags WHERE entry_id = 2 ORDER BY key, value'),
+                         [('grammar_points', 'ます形'), ('grammar_points', 'を'), ('lesson', 'L2')])
+
+    def test_failure_mid_batch_leaves_nothing(self):
+        """原始数据、新动词和活用已写入后，分词写入违反 NOT NULL：整批回滚，各表和自增序列都不变"""
+        self.confirm([eat_entry('パンを食べます。', 'ぱんをたべます。')])
+        tables = ('raw_entries', 'segmented_words', 'verb_master', 'verb_conjugations',
+                  'phonetic_index', 'entry_tags', 'question_bank')
+        before = {table: self.query(f'SELECT COUNT(*) FROM {table}')[0][0] for table in tables}
+        sequences = self.query('SELECT name, seq FROM sqlite_sequence ORDER BY name')
+
+        broken = make_entry('本を読みます。', 'ほんをよみます。', words=[make_word('本', 'ほん', 'noun', None)])
+        response = self.confirm([
+            make_entry('水を飲みます。', 'みずをのみます。', tags={'lesson': 'L3'}, words=[
+                make_word('飲みます', 'のみます', 'verb', 1, prototype='飲む', prototype_reading='のむ')
+            ]),
+            broken
+        ])
+
+        self.assertEqual(response.status_code, 500)
+        self.assertIn('segmented_words.position', response.get_json()['error']['message'])
+        self.assertEqual({table: self.query(f'SELECT COUNT(*) FROM {table}')[0][0] for table in tables}, before)
+        self.assertEqual(self.query('SELECT name, seq FROM sqlite_sequence ORDER BY name'), sequences)
+        self.assertEqual(self.query('SELECT example_count FROM verb_master WHERE id = 1'), [(1,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
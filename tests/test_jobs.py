@@ -0,0 +1,130 @@
+"""
+services/jobs.IngestionJobQueue 的测试：认领与租约、租约丢失、断点续传、逐条错误记录、暂时性错误重试
+
+运行：python -m pytest tests
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+from unittest import mock
+
+from support import make_entry, make_word
+from src.backend.models.database import Database
+from src.backend.services.jobs import IngestionJobQueue, JobLeaseLost
+
+
+def entries(count: int) -> list:
+    return [make_entry(f'文{i}です。', 'ぶんです。', f'句子{i}', words=[make_word(f'文{i}', 'ぶん', 'noun', 0)])
+            for i in range(count)]
+
+
+class IngestionJobQueueTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'jobs.db')
+        Database.configure({'DATABASE_PATH': self.path})
+        Database.init_db(self.path)
+        self.queue = IngestionJobQueue(workers=0, chunk_size=2, lease_seconds=60)
+
+    def tearDown(self):
+        Database.close_all()
+        Database.configure({})
+        self.tmp.cleanup()
+
+    def query(self, sql: str, params=()) -> list:
+        with Database.read_connection() as conn:
+            return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+
+    def job(self, job_id: str) -> tuple:
+        return self.query('SELECT status, next_index, processed, failed FROM ingestion_jobs WHERE id = ?', (job_id,))[0]
+
+    def test_claim_and_expired_lease(self):
+        """按提交顺序认领；租约有效的任务不会被再次认领，过期后可以"""
+        first = self.queue.submit(entries(1))
+        Database.write(lambda cursor: cursor.execute(
+            "UPDATE ingestion_jobs SET created_at = '2026-01-01 00:00:00' WHERE id = ?", (first,)))
+        second = self.queue.submit(entries(1))
+
+        self.assertEqual(self.queue._claim(), first)
+        self.assertEqual(self.queue._claim(), second)
+        self.assertIsNone(self.queue._claim())
+
+        Database.write(lambda cursor: cursor.execute(
+            'UPDATE ingestion_jobs SET lease_until = 0 WHERE id = ?', (first,)))
+        self.assertEqual(self.queue._claim(), first)
+        self.assertEqual(self.job(first)[0], 'running')
+
+    def test_resume_from_committed_chunk(self):
+        """已提交的块不会重复入库：从 next_index 继续"""
+        job_id = self.queue.submit(entries(5))
+        self.queue._claim()
+        payload = entries(5)
+        self.queue._commit_chunk(job_id, 0, payload[:2])
+        self.assertEqual(self.job(job_id), ('running', 2, 2, 0))
+
+        # 模拟重启：新的队列实例认领过期的任务后继续处理
+        Database.write(lambda cursor: cursor.execute('UPDATE ingestion_jobs SET lease_until = 0'))
+        restarted = IngestionJobQueue(workers=0, chunk_size=2)
+        self.assertEqual(restarted._claim(), job_id)
+        restarted._process(job_id)
+
+        self.assertEqual(self.job(job_id), ('completed', 5, 5, 0))
+        self.assertEqual(self.query('SELECT COUNT(*) FROM raw_entries'), [(5,)])
+        self.assertEqual(self.query('SELECT payload FROM ingestion_jobs'), [(None,)])
+
+    def test_lease_lost(self):
+        """另一个线程已提交同一块：整块回滚，抛出 JobLeaseLost"""
+        job_id = self.queue.submit(entries(2))
+        payload = entries(2)
+        self.queue._commit_chunk(job_id, 0, payload)
+
+        with self.assertRaises(JobLeaseLost):
+            IngestionJobQueue(workers=0)._commit_chunk(job_id, 0, payload)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM raw_entries'), [(2,)])
+        self.assertEqual(self.job(job_id)[1:], (2, 2, 0))
+
+    def test_bad_entry_recorded_and_skipped(self):
+        """块内有一条数据有问题：逐条重试，其余照常入库，问题条目记入错误表"""
+        payload = entries(4)
+        payload[1]['segmented_words'][0]['position'] = None
+        job_id = self.queue.submit(payload)
+        self.queue._claim()
+        self.queue._process(job_id)
+
+        self.assertEqual(self.job(job_id), ('completed', 4, 3, 1))
+        self.assertEqual(self.query('SELECT original_jp FROM raw_entries ORDER BY id'),
+                         [('文0です。',), ('文2です。',), ('文3です。',)])
+        errors = self.query('SELECT entry_index, original_jp, message FROM ingestion_job_errors WHERE job_id = ?', (job_id,))
+        self.assertEqual([row[:2] for row in errors], [(1, '文1です。')])
+        self.assertTrue(errors[0][2].startswith('IntegrityError'))
+
+        status = self.queue.get(job_id)
+        self.assertEqual((status['progress'], len(status['errors'])), (100.0, 1))
+
+    def test_transient_error_is_retried(self):
+        """数据库被锁等暂时性错误：不记为条目失败，进度不变，任务留给租约过期后重试"""
+        job_id = self.queue.submit(entries(3))
+        self.queue._claim()
+        with mock.patch('src.backend.services.jobs.bulk_ingest',
+                        side_effect=sqlite3.OperationalError('database is locked')):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.queue._process(job_id)
+
+        self.assertEqual(self.job(job_id), ('running', 0, 0, 0))
+        self.assertEqual(self.query('SELECT COUNT(*) FROM ingestion_job_errors'), [(0,)])
+
+        Database.write(lambda cursor: cursor.execute('UPDATE ingestion_jobs SET lease_until = 0'))
+        self.assertEqual(self.queue._claim(), job_id)
+        self.queue._process(job_id)
+        self.assertEqual(self.job(job_id), ('completed', 3, 3, 0))
+
+    def test_missing_job(self):
+        """认领后任务被删除：直接返回"""
+        self.queue._process('missing')
+        self.assertEqual(self.query('SELECT COUNT(*) FROM raw_entries'), [(0,)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,164 @@
+"""
+游标分页与总数缓存的测试：录入列表、分类、动词列表的游标往返，created_at 相同时不重不漏，
+无效游标返回 400，写入后总数立即更新
+
+运行：python -m pytest tests
+"""
+import os
+import tempfile
+import unittest
+
+from support import create_test_app, make_entry, make_word
+from src.backend.models.database import Database
+from src.backend.services.pagination import TotalCountCache, encode_cursor
+
+VERBS = [('読みます', 'よみます', '読む', 'よむ'), ('飲みます', 'のみます', '飲む', 'のむ'),
+         ('書きます', 'かきます', '書く', 'かく'), ('聞きます', 'ききます', '聞く', 'きく'),
+         ('行きます', 'いきます', '行く', 'いく'), ('見ます', 'みます', '見る', 'みる'),
+         ('来ます', 'きます', '来る', 'くる')]
+
+INVALID_CURSORS = ['!!!', 'bm90IGpzb24', encode_cursor([]), encode_cursor([1, 2, 3, 4]),
+                   encode_cursor([True, 1]), encode_cursor([None, 1])]
+
+
+class PaginationTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = create_test_app(os.path.join(self.tmp.name, 'pages.db')).test_client()
+        self.confirm([
+            make_entry(f'{word}。', f'{reading}。', f'句子{i}', words=[
+                make_word(word, reading, 'verb', 0, prototype=prototype, prototype_reading=prototype_reading),
+                make_word('。', '。', 'punctuation', 1)
+            ])
+            for i, (word, reading, prototype, prototype_reading) in enumerate(VERBS)
+        ])
+        # 同一秒录入：created_at / first_seen 全部相同，只能靠 id 区分先后
+        Database.write(lambda cursor: (
+            cursor.execute("UPDATE raw_entries SET created_at = '2026-01-01 00:00:00'"),
+            cursor.execute("UPDATE verb_master SET first_seen = '2026-01-01 00:00:00'")
+        ))
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def confirm(self, entries: list):
+        response = self.client.post('/api/entries/p/confirm?async=0', json={'entries': entries})
+        self.assertEqual(response.status_code, 200)
+
+    def get(self, url: str, **params) -> dict:
+        response = self.client.get(url, query_string=params)
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['data']
+
+    def walk(self, url: str, items_key, limit: int = 3, **params) -> list:
+        """沿 next_cursor 翻到最后一页，返回各页的 id 列表"""
+        pages = []
+        cursor = None
+        while True:
+            query = dict(params, limit=limit)
+            if cursor:
+                query['cursor'] = cursor
+            data = self.get(url, **query)
+            pages.append([item['id'] for item in items_key(data)])
+            cursor = data['pagination']['next_cursor'] if 'pagination' in data else data['next_cursor']
+            if cursor is None:
+                return pages
+
+    def test_entries_cursor_round_trip(self):
+        """created_at 相同的条目按 id 翻页，不重复不遗漏，与一次取出的顺序一致"""
+        pages = self.walk('/api/entries', lambda data: data['items'])
+        self.assertEqual(pages, [[7, 6, 5], [4, 3, 2], [1]])
+
+        ascending = self.walk('/api/entries', lambda data: data['items'], order='asc')
+        self.assertEqual(sum(ascending, []), [1, 2, 3, 4, 5, 6, 7])
+
+        by_id = self.walk('/api/entries', lambda data: data['items'], limit=4, order_by='id')
+        self.assertEqual(by_id, [[7, 6, 5, 4], [3, 2, 1]])
+
+        first = self.get('/api/entries', limit=3)['pagination']
+        self.assertEqual((first['page'], first['total'], first['total_pages'], first['has_more']), (1, 7, 3, True))
+
+    def test_categories_cursor_round_trip(self):
+        """分类列表按 (句子 created_at, 句子 id, 分词 id) 翻页"""
+        pages = self.walk('/api/entries/categories/verbs', lambda data: data['words'])
+        words = sum(pages, [])
+        self.assertEqual([len(page) for page in pages], [3, 3, 1])
+        self.assertEqual(len(set(words)), 7)
+
+        with Database.read_connection() as conn:
+            expected = [row[0] for row in conn.execute(
+                "SELECT id FROM segmented_words WHERE word_type = 'verb' ORDER BY raw_entry_id DESC, id DESC")]
+        self.assertEqual(words, expected)
+
+    def test_verbs_cursor_round_trip(self):
+        """first_seen 相同的动词按 id 翻页"""
+        pages = self.walk('/api/verbs', lambda data: data['verbs'])
+        self.assertEqual(pages, [[7, 6, 5], [4, 3, 2], [1]])
+        self.assertEqual(self.get('/api/verbs', limit=3)['total'], 7)
+
+    def test_invalid_cursor_returns_400(self):
+        """格式不对、列数不对、含布尔或 null 的游标都返回 400"""
+        for url in ('/api/entries', '/api/entries/categories/verbs', '/api/verbs'):
+            for cursor in INVALID_CURSORS:
+                with self.subTest(url=url, cursor=cursor):
+                    response = self.client.get(url, query_string={'cursor': cursor})
+                    self.assertEqual(response.status_code, 400)
+                    self.assertEqual(response.get_json()['error']['code'], 'VALIDATION_ERROR')
+
+        # 按相关度排序不支持游标
+        response = self.client.get('/api/entries', query_string={
+            'search': '読みます', 'order_by': 'relevance', 'cursor': encode_cursor(['2026-01-01 00:00:00', 1])})
+        self.assertEqual(response.status_code, 400)
+
+    def test_total_updates_after_writes(self):
+        """总数缓存在入库、删除后立即失效；其他途径的写入在缓存过期前不反映"""
+        self.assertEqual(self.get('/api/entries')['pagination']['total'], 7)
+        self.assertEqual(self.get('/api/verbs')['total'], 7)
+
+        self.confirm([make_entry('食べます。', 'たべます。', words=[
+            make_word('食べます', 'たべます', 'verb', 0, prototype='食べる', prototype_reading='たべる')])])
+        self.assertEqual(self.get('/api/entries')['pagination']['total'], 8)
+        self.assertEqual(self.get('/api/verbs')['total'], 8)
+
+        self.assertEqual(self.client.delete('/api/entries/1').status_code, 200)
+        self.assertEqual(self.get('/api/entries')['pagination']['total'], 7)
+
+        # 绕过接口直接写库：缓存未失效，仍返回旧的总数
+        Database.write(lambda cursor: cursor.execute('DELETE FROM raw_entries WHERE id = 2'))
+        self.assertEqual(self.get('/api/entries')['pagination']['total'], 7)
+        self.assertEqual(len(self.get('/api/entries')['items']), 6)
+        self.assertIsNone(self.get('/api/entries', with_total='false')['pagination']['total'])
+
+
+class TotalCountCacheTest(unittest.TestCase):
+
+    def test_cache_by_key_and_invalidate(self):
+        """按查询条件缓存，invalidate 或过期后重新计算"""
+        calls = []
+
+        def count(value):
+            calls.append(value)
+            return value
+
+        cache = TotalCountCache(ttl=60)
+        self.assertEqual(cache.get('a', lambda: count(1)), 1)
+        self.assertEqual(cache.get('a', lambda: count(2)), 1)
+        self.assertEqual(cache.get('b', lambda: count(3)), 3)
+        cache.invalidate()
+        self.assertEqual(cache.get('a', lambda: count(4)), 4)
+        self.assertEqual(calls, [1, 3, 4])
+
+        expired = TotalCountCache(ttl=0)
+        expired.get('a', lambda: 1)
+        self.assertEqual(expired.get('a', lambda: 2), 2)
+
+        bounded = TotalCountCache(max_size=2)
+        for key in 'abc':
+            bounded.get(key, lambda: 1)
+        self.assertEqual(list(bounded._entries), ['b', 'c'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,201 @@
+"""
+routes/practice 的测试：每日一练按 (日期, generation_key) 保存与 ETag、提交答案的幂等性、作答条目以保存的题目为准
+
+运行：python -m pytest tests
+"""
+import os
+import sqlite3
+import tempfile
+import unittest
+
+from support import create_test_app, make_entry, make_word
+from src.backend.models.database import Database
+
+SENTENCES = [
+    ('本を読みます。', 'ほんをよみます。', '读书。', '読みます', 'よみます', '読む', 'よむ'),
+    ('水を飲みます。', 'みずをのみます。', '喝水。', '飲みます', 'のみます', '飲む', 'のむ'),
+    ('パンを食べます。', 'ぱんをたべます。', '吃面包。', '食べます', 'たべます', '食べる', 'たべる'),
+    ('手紙を書きます。', 'てがみをかきます。', '写信。', '書きます', 'かきます', '書く', 'かく'),
+    ('音楽を聞きます。', 'おんがくをききます。', '听音乐。', '聞きます', 'ききます', '聞く', 'きく'),
+    ('学校へ行きます。', 'がっこうへいきます。', '去学校。', '行きます', 'いきます', '行く', 'いく'),
+]
+
+
+class PracticeTestCase(unittest.TestCase):
+    """在临时数据库里录入几条带动词的句子（lesson 交替为 L1/L2）"""
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'practice.db')
+        self.client = create_test_app(self.path).test_client()
+        entries = [
+            make_entry(jp, hiragana, meaning, tags={'lesson': f'L{i % 2 + 1}'}, words=[
+                make_word(word, word_reading, 'verb', 0, prototype=prototype, prototype_reading=reading)
+            ])
+            for i, (jp, hiragana, meaning, word, word_reading, prototype, reading) in enumerate(SENTENCES)
+        ]
+        response = self.client.post('/api/entries/p/confirm?async=0', json={'entries': entries})
+        self.assertEqual(response.status_code, 200)
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def query(self, sql: str, params=()) -> list:
+        with Database.read_connection() as conn:
+            return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+
+    def daily(self, query: str = '', headers=None):
+        return self.client.get(f'/api/practice/daily{query}', headers=headers or {})
+
+
+class DailyPracticeTest(PracticeTestCase):
+
+    def test_same_key_returns_stored_set(self):
+        """同样的参数返回同一套题和 ETag，带 If-None-Match 时返回 304"""
+        first = self.daily('?count=4&lesson=L1')
+        self.assertEqual(first.status_code, 200)
+        etag = first.headers['ETag']
+        questions = first.get_json()['data']['questions']
+        self.assertTrue(questions)
+
+        second = self.daily('?count=4&lesson=L1')
+        self.assertEqual(second.headers['ETag'], etag)
+        self.assertEqual(second.get_json()['data']['questions'], questions)
+
+        not_modified = self.daily('?count=4&lesson=L1', headers={'If-None-Match': etag})
+        self.assertEqual(not_modified.status_code, 304)
+        self.assertEqual(not_modified.data, b'')
+
+        # 种子由日期和参数决定：删掉保存的题目后重新生成，结果相同
+        Database.write(lambda cursor: cursor.execute('DELETE FROM daily_practice'))
+        regenerated = self.daily('?count=4&lesson=L1')
+        self.assertEqual(regenerated.headers['ETag'], etag)
+
+    def test_different_params_store_separate_sets(self):
+        """不同的 lesson / 题量各自保存一套题，互不覆盖"""
+        default = self.daily('?count=4').get_json()['data']
+        lesson = self.daily('?count=4&lesson=L2').get_json()['data']
+        fewer = self.daily('?count=2').get_json()['data']
+
+        keys = {default['generation_key'], lesson['generation_key'], fewer['generation_key']}
+        self.assertEqual(len(keys), 3)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM daily_practice'), [(3,)])
+
+        # 按 lesson 筛选的题目都来自该 lesson 的句子（L2 为第 2、4、6 条）
+        self.assertTrue({q['source_entry_id'] for q in lesson['questions']} <= {2, 4, 6})
+        self.assertEqual(fewer['total_questions'], 2)
+
+        # 之前保存的默认参数那一套不受影响
+        self.assertEqual(self.daily('?count=4').get_json()['data']['questions'], default['questions'])
+
+
+class RekeyDailyPracticeTest(unittest.TestCase):
+
+    def test_old_unique_date_table_is_rebuilt(self):
+        """旧库 daily_practice 按日期唯一：init_db 重建为 (日期, generation_key) 唯一，已有记录保留"""
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'old.db')
+            conn = sqlite3.connect(path)
+            conn.execute('''
+                CREATE TABLE daily_practice (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    practice_date DATE NOT NULL UNIQUE,
+                    questions JSON,
+                    answers JSON,
+                    completed BOOLEAN DEFAULT 0,
+                    score INTEGER,
+                    prompt_text TEXT,
+                    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+                )
+            ''')
+            conn.execute('''
+                INSERT INTO daily_practice (practice_date, questions, answers, completed, score)
+                VALUES ('2026-01-01', '[]', '[{"question_id": 1}]', 1, 80)
+            ''')
+            conn.commit()
+            conn.close()
+
+            try:
+                Database.init_db(path)
+                Database.write(lambda cursor: cursor.execute('''
+                    INSERT INTO daily_practice (practice_date, generation_key) VALUES ('2026-01-01', 'k')
+                '''), db_path=path)
+                with Database.read_connection(path) as conn:
+                    rows = [tuple(row) for row in conn.execute('''
+                        SELECT practice_date, generation_key, answers, score FROM daily_practice ORDER BY id
+                    ''')]
+            finally:
+                Database.close_all()
+
+        self.assertEqual(rows, [('2026-01-01', None, '[{"question_id": 1}]', 80), ('2026-01-01', 'k', None, None)])
+
+
+class SubmitPracticeTest(PracticeTestCase):
+
+    def submit(self, data: dict, answers: list) -> dict:
+        response = self.client.post('/api/practice/submit', json={
+            'generation_key': data['generation_key'],
+            'date': data['date'],
+            'answers': answers
+        })
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['data']
+
+    def test_repeated_submit_is_idempotent(self):
+        """同一套题重复提交：作答记录、复习次数和复习计划只按第一次提交更新"""
+        data = self.daily('?count=4').get_json()['data']
+        answers = [{'question_id': q['id'], 'question_type': q['type'], 'is_correct': True}
+                   for q in data['questions']]
+        self.assertEqual(len(answers), 4)
+
+        self.assertEqual(self.submit(data, answers)['scheduled_entries'], 4)
+        log = self.query('SELECT entry_id FROM review_log ORDER BY entry_id')
+        schedule = self.query('SELECT entry_id, due, interval_days, repetitions FROM review_schedule ORDER BY entry_id')
+
+        self.assertEqual(self.submit(data, answers)['scheduled_entries'], 0)
+        self.assertEqual(self.query('SELECT entry_id FROM review_log ORDER BY entry_id'), log)
+        self.assertEqual(self.query('SELECT entry_id, due, interval_days, repetitions FROM review_schedule ORDER BY entry_id'),
+                         schedule)
+        self.assertEqual(self.query('SELECT SUM(review_count) FROM raw_entries'), [(4,)])
+        self.assertTrue(all(row[3] == 1 for row in schedule))
+
+    def test_later_submit_records_only_new_answers(self):
+        """分两次提交不同的题：第二次只记录新作答的题，保存的作答记录合并两次提交"""
+        data = self.daily('?count=4').get_json()['data']
+        answers = [{'question_id': q['id'], 'question_type': q['type'], 'is_correct': True}
+                   for q in data['questions']]
+
+        self.submit(data, answers[:2])
+        self.assertEqual(self.submit(data, answers[1:])['scheduled_entries'], 2)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM review_log'), [(4,)])
+        self.assertEqual(self.query('SELECT COUNT(*), SUM(repetitions) FROM review_schedule'), [(4, 4)])
+
+        stored = self.query('SELECT json_array_length(answers) FROM daily_practice')
+        self.assertEqual(stored, [(4,)])
+
+    def test_stored_question_decides_entry(self):
+        """有保存的题目时按题目对应的条目记录，客户端给的 source_entry_id 不起作用"""
+        data = self.daily('?count=1').get_json()['data']
+        question = data['questions'][0]
+        other = next(i for i in range(1, len(SENTENCES) + 1) if i != question['source_entry_id'])
+
+        self.submit(data, [
+            {'question_id': question['id'], 'source_entry_id': other, 'is_correct': True},
+            {'question_id': 99, 'source_entry_id': other, 'question_type': 'translation_jp_to_cn', 'is_correct': True}
+        ])
+        self.assertEqual(self.query('SELECT entry_id, question_type FROM review_log'),
+                         [(question['source_entry_id'], question['type'])])
+        self.assertEqual(self.query('SELECT entry_id FROM review_schedule'), [(question['source_entry_id'],)])
+
+    def test_client_entry_without_stored_set(self):
+        """没有保存的题目（如离线练习）时才使用客户端给的条目"""
+        self.submit({'generation_key': 'offline', 'date': '2026-01-01'}, [
+            {'question_id': 1, 'source_entry_id': 2, 'question_type': 'translation_cn_to_jp', 'is_correct': False}
+        ])
+        self.assertEqual(self.query('SELECT entry_id, question_type, correct FROM review_log'),
+                         [(2, 'translation_cn_to_jp', 0)])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,140 @@
+"""
+services/question_bank 的测试：入库时生成题库、删除条目/动词后题目随之删除或不再被取到、
+从题库取出的题与按条目现场生成的题一致
+
+运行：python -m pytest tests
+"""
+import os
+import random
+import tempfile
+import unittest
+from datetime import datetime
+
+from support import create_test_app, make_entry, make_word
+from src.backend.models.database import Database
+from src.backend.routes.practice import _create_question
+from src.backend.services.question_bank import CONJUGATION_TYPE, entry_difficulty, load_questions
+
+NOW = datetime(2026, 1, 10)
+
+
+def translation_on_the_fly(entry: dict, q_type: str) -> dict:
+    """题库之前的出题方式：按条目字段现场生成翻译题"""
+    if q_type == 'translation_jp_to_cn':
+        question, answer, hint = entry['original_jp'], entry['chinese_meaning'], f"读音: {entry['hiragana']}"
+    else:
+        question, answer, hint = entry['chinese_meaning'], entry['original_jp'], f"读音: {entry['romaji'] or entry['hiragana']}"
+    return {'type': q_type, 'question': question, 'correct_answer': answer, 'hint': hint,
+            'source_entry_id': entry['id']}
+
+
+class QuestionBankTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.client = create_test_app(os.path.join(self.tmp.name, 'bank.db')).test_client()
+        response = self.client.post('/api/entries/p/confirm?async=0', json={'entries': [
+            make_entry('本を読みます。', 'ほんをよみます。', '读书。', tags={'difficulty': 3}, words=[
+                make_word('本', 'ほん', 'noun', 0),
+                make_word('読みます', 'よみます', 'verb', 2, prototype='読む', prototype_reading='よむ')
+            ]),
+            make_entry('新聞を読みました。', 'しんぶんをよみました。', '看了报纸。', words=[
+                make_word('読みました', 'よみました', 'verb', 2, prototype='読む', prototype_reading='よむ')
+            ]),
+            make_entry('こんにちは', 'こんにちは', '你好', content_type='word')
+        ]})
+        self.assertEqual(response.status_code, 200)
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def query(self, sql: str, params=()) -> list:
+        with Database.read_connection() as conn:
+            return [tuple(row) for row in conn.execute(sql, params).fetchall()]
+
+    def load(self, entry_ids: list) -> dict:
+        with Database.read_connection() as conn:
+            return load_questions(conn.cursor(), entry_ids)
+
+    def entry(self, entry_id: int) -> dict:
+        with Database.read_connection() as conn:
+            return dict(conn.execute('SELECT * FROM raw_entries WHERE id = ?', (entry_id,)).fetchone())
+
+    def test_rows_created_on_ingest(self):
+        """每个条目两道翻译题；新动词每个活用形（原形除外）一道活用题，同一动词只生成一次"""
+        translations = self.query('''
+            SELECT entry_id, question_type, difficulty FROM question_bank
+            WHERE entry_id IS NOT NULL ORDER BY entry_id, question_type
+        ''')
+        self.assertEqual(translations, [
+            (1, 'translation_cn_to_jp', 3), (1, 'translation_jp_to_cn', 3),
+            (2, 'translation_cn_to_jp', 1), (2, 'translation_jp_to_cn', 1),
+            (3, 'translation_cn_to_jp', 1), (3, 'translation_jp_to_cn', 1)
+        ])
+
+        conjugations = self.query('''
+            SELECT c.form_type, c.form_value, c.difficulty, q.correct_answer, q.difficulty
+            FROM verb_conjugations c
+            LEFT JOIN question_bank q ON q.verb_id = c.verb_id AND q.form_type = c.form_type
+            ORDER BY c.id
+        ''')
+        self.assertTrue(conjugations)
+        for form_type, form_value, difficulty, answer, question_difficulty in conjugations:
+            if form_type == 'dictionary':
+                self.assertIsNone(answer)
+            else:
+                self.assertEqual((answer, question_difficulty), (form_value, difficulty or 1))
+        self.assertEqual(self.query('SELECT COUNT(DISTINCT verb_id) FROM question_bank'), [(1,)])
+
+        # 句中有动词的条目还能取到该动词的活用题
+        bank = self.load([1, 2, 3])
+        self.assertEqual({q['question_type'] for q in bank[1]}, {'translation_jp_to_cn', 'translation_cn_to_jp',
+                                                                 CONJUGATION_TYPE})
+        self.assertEqual({q['question_type'] for q in bank[3]}, {'translation_jp_to_cn', 'translation_cn_to_jp'})
+
+    def test_backfill_matches_ingest(self):
+        """旧库回填生成的题与入库时生成的一致"""
+        columns = 'question_type, entry_id, verb_id, form_type, question, correct_answer, hint, difficulty'
+        ingested = sorted(self.query(f'SELECT {columns} FROM question_bank'), key=repr)
+        Database.write(Database.backfill_question_bank)
+        self.assertEqual(sorted(self.query(f'SELECT {columns} FROM question_bank'), key=repr), ingested)
+
+    def test_deleted_entry_and_verb(self):
+        """删除条目时级联删除翻译题；删除动词时级联删除活用题，其他条目不再取到"""
+        self.assertEqual(self.client.delete('/api/entries/1').status_code, 200)
+        self.assertEqual(self.query('SELECT COUNT(*) FROM question_bank WHERE entry_id = 1'), [(0,)])
+        self.assertEqual(self.load([1]), {})
+        # 动词仍被第 2 条使用，活用题保留
+        self.assertIn(CONJUGATION_TYPE, {q['question_type'] for q in self.load([2])[2]})
+
+        Database.write(lambda cursor: cursor.execute('DELETE FROM verb_master'))
+        self.assertEqual(self.query('SELECT COUNT(*) FROM question_bank WHERE verb_id IS NOT NULL'), [(0,)])
+        self.assertEqual({q['question_type'] for q in self.load([2])[2]},
+                         {'translation_jp_to_cn', 'translation_cn_to_jp'})
+
+    def test_create_question_matches_on_the_fly(self):
+        """从题库选出的翻译题与按条目现场生成的题内容一致"""
+        for entry_id in (1, 2, 3):
+            entry = self.entry(entry_id)
+            candidates = [q for q in self.load([entry_id])[entry_id] if q['question_type'] != CONJUGATION_TYPE]
+            for seed in range(8):
+                question = _create_question(entry, candidates, 1, NOW, random.Random(seed))
+                expected = translation_on_the_fly(entry, question['type'])
+                self.assertEqual({key: question[key] for key in expected}, expected)
+                self.assertEqual(question['difficulty'], entry_difficulty({'difficulty': 3} if entry_id == 1 else {}))
+                self.assertNotIn('verb_id', question)
+
+        # 活用题带上动词 id，记录仍归到出题的句子
+        entry = self.entry(2)
+        conjugation = [q for q in self.load([2])[2] if q['question_type'] == CONJUGATION_TYPE]
+        question = _create_question(entry, conjugation, 1, NOW, random.Random(0))
+        self.assertEqual((question['type'], question['source_entry_id']), (CONJUGATION_TYPE, 2))
+        self.assertEqual(question['verb_id'], conjugation[0]['verb_id'])
+        self.assertIn(question['correct_answer'], {q['correct_answer'] for q in conjugation})
+
+        self.assertIsNone(_create_question(entry, [], 1, NOW))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,102 @@
+"""
+services/sampling.sample_sentences 的测试：层内均匀抽样、稀疏标签下的查询次数
+
+运行：python -m pytest tests
+"""
+import os
+import sys
+import random
+import sqlite3
+import tempfile
+import unittest
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.models.database import Database
+from src.backend.services.sampling import sample_sentences, PROBES_PER_ROW
+from src.backend.services.tags import tag_conditions
+
+
+def create_corpus(path: str, size: int, tagged: list) -> sqlite3.Connection:
+    """size 条句子（id 1..size），tagged 中的 id 打上 lesson=T"""
+    Database.init_db(path)
+    conn = sqlite3.connect(path)
+    conn.row_factory = sqlite3.Row
+    conn.executemany('''
+        INSERT INTO raw_entries (id, content_type, original_jp, hiragana, chinese_meaning, processed, created_at)
+        VALUES (?, 'sentence', ?, 'あ', '例句', 1, '2026-01-01 00:00:00')
+    ''', [(i, f'文{i}') for i in range(1, size + 1)])
+    conn.executemany("INSERT INTO entry_tags (key, value, entry_id) VALUES ('lesson', 'T', ?)",
+                     [(entry_id,) for entry_id in tagged])
+    conn.commit()
+    return conn
+
+
+def tag_sample(cursor, k: int, rng: random.Random) -> list:
+    """按 lesson=T 抽样（与每日一练相同：探测用 EXISTS，整段扫描用 IN）"""
+    probe_conds, params = tag_conditions({'lesson': 'T'}, 'raw_entries.id', correlated=True)
+    scan_conds, _ = tag_conditions({'lesson': 'T'}, 'id')
+    return sample_sentences(cursor, k, filters=''.join(f' AND {c}' for c in probe_conds), filter_params=params,
+                            rng=rng, scan_filters=''.join(f' AND {c}' for c in scan_conds), scan_params=params)
+
+
+class SampleSentencesTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'sampling.db')
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def test_clustered_tag_is_sampled_uniformly(self):
+        """标签成段聚集、段间空档长短不一时，每条被抽中的频率仍然相同（走随机探测）"""
+        tagged = list(range(100, 300)) + list(range(1500, 1540)) + list(range(2000, 4000, 7))
+        conn = create_corpus(self.path, 5000, tagged)
+        k = 2
+        self.assertGreater(len(tagged), k * PROBES_PER_ROW)
+
+        rng = random.Random(7)
+        trials = 6000
+        counts = dict.fromkeys(tagged, 0)
+        cursor = conn.cursor()
+        for _ in range(trials):
+            for row in tag_sample(cursor, k, rng):
+                counts[row['id']] += 1
+        conn.close()
+
+        # 卡方检验：自由度 n-1，取均值 + 5 个标准差为上限（空档偏差会让段首的条目远超期望）
+        expected = trials * k / len(tagged)
+        chi2 = sum((c - expected) ** 2 / expected for c in counts.values())
+        df = len(tagged) - 1
+        self.assertLess(chi2, df + 5 * (2 * df) ** 0.5)
+
+    def test_sparse_tag_uses_few_queries(self):
+        """10 万条里只有 20 条聚集的标签：直接精确抽样，只执行少量语句"""
+        tagged = list(range(50000, 50020))
+        conn = create_corpus(self.path, 100000, tagged)
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        rows = tag_sample(conn.cursor(), 8, random.Random(1))
+        conn.close()
+
+        self.assertEqual(len(rows), 8)
+        self.assertTrue(all(row['id'] in tagged for row in rows))
+        self.assertLessEqual(len(statements), 5)
+
+    def test_missing_tag_returns_empty(self):
+        conn = create_corpus(self.path, 1000, [])
+        statements = []
+        conn.set_trace_callback(statements.append)
+
+        self.assertEqual(tag_sample(conn.cursor(), 8, random.Random(1)), [])
+        conn.close()
+        self.assertLessEqual(len(statements), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
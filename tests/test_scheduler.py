@@ -0,0 +1,101 @@
+"""
+services/scheduler.record_reviews 的测试：SM-2 间隔增长、难度系数下限、遗忘后重置
+
+运行：python -m pytest tests
+"""
+import os
+import sys
+import sqlite3
+import tempfile
+import unittest
+from datetime import datetime, timedelta
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.models.database import Database
+from src.backend.services.scheduler import record_reviews, format_timestamp, MIN_EASE, DEFAULT_EASE
+
+NOW = datetime(2026, 3, 1, 12, 0, 0)
+
+
+class RecordReviewsTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        path = os.path.join(self.tmp.name, 'scheduler.db')
+        Database.init_db(path)
+        Database.close_all()
+        self.conn = sqlite3.connect(path)
+        self.conn.executemany('''
+            INSERT INTO raw_entries (id, content_type, original_jp, hiragana, chinese_meaning)
+            VALUES (?, 'sentence', ?, 'あ', '例句')
+        ''', [(i, f'文{i}') for i in (1, 2)])
+        self.conn.commit()
+
+    def tearDown(self):
+        self.conn.close()
+        self.tmp.cleanup()
+
+    def review(self, entry_id: int, quality: int, days: int = 0):
+        record_reviews(self.conn.cursor(), [(entry_id, quality)], NOW + timedelta(days=days))
+
+    def state(self, entry_id: int) -> dict:
+        row = self.conn.execute('''
+            SELECT due, interval_days, ease, repetitions, lapses FROM review_schedule WHERE entry_id = ?
+        ''', (entry_id,)).fetchone()
+        return dict(zip(('due', 'interval_days', 'ease', 'repetitions', 'lapses'), row)) if row else None
+
+    def test_interval_growth(self):
+        """连续答对：间隔 1 天、6 天，之后乘以难度系数（质量 4 时系数不变）"""
+        intervals = []
+        day = 0
+        for _ in range(4):
+            self.review(1, 4, day)
+            state = self.state(1)
+            intervals.append(state['interval_days'])
+            day += state['interval_days']
+        self.assertEqual(intervals, [1, 6, 15, 38])
+        self.assertEqual(state['ease'], DEFAULT_EASE)
+        self.assertEqual(state['repetitions'], 4)
+        self.assertEqual(state['due'], format_timestamp(NOW + timedelta(days=day)))
+
+    def test_ease_floor(self):
+        """反复答错：难度系数降到下限为止"""
+        for day in range(10):
+            self.review(1, 0, day)
+        self.assertEqual(self.state(1)['ease'], MIN_EASE)
+
+        # 下限之后答对仍按下限计算间隔
+        for day in (10, 11, 17):
+            self.review(1, 3, day)
+        state = self.state(1)
+        self.assertEqual(state['interval_days'], 8)
+        self.assertEqual(state['ease'], MIN_EASE)
+
+    def test_lapse_resets_schedule(self):
+        """掌握后答错：重复次数清零、间隔回到 1 天、记一次遗忘"""
+        for day in (0, 1, 7):
+            self.review(1, 5, day)
+        self.assertEqual(self.state(1)['repetitions'], 3)
+
+        self.review(1, 1, 30)
+        state = self.state(1)
+        self.assertEqual((state['repetitions'], state['interval_days'], state['lapses']), (0, 1, 1))
+        self.assertEqual(state['due'], format_timestamp(NOW + timedelta(days=31)))
+
+        # 从未答对过的条目答错不算遗忘
+        self.review(2, 1)
+        self.assertEqual(self.state(2)['lapses'], 0)
+
+    def test_same_batch_applies_in_order(self):
+        """同一批里同一条目多次作答按顺序计算；已删除的条目忽略"""
+        updated = record_reviews(self.conn.cursor(), [(1, 4), (1, 4), (3, 4)], NOW)
+        self.assertEqual(updated, 2)
+        self.assertEqual(self.state(1)['interval_days'], 6)
+        self.assertIsNone(self.state(3))
+
+
+if __name__ == '__main__':
+    unittest.main()
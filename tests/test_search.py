@@ -0,0 +1,91 @@
+"""
+录入搜索的测试：FTS5 trigram 索引随插入/修改/删除同步，1-2 个字符的搜索退回 LIKE
+
+运行：python -m pytest tests
+"""
+import os
+import tempfile
+import unittest
+
+from support import create_test_app, make_entry
+from src.backend.models.database import Database
+
+
+class EntrySearchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'search.db')
+        self.client = create_test_app(self.path).test_client()
+        with Database.read_connection() as conn:
+            if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'raw_entries_fts'").fetchone() is None:
+                self.skipTest('SQLite 不支持 FTS5 trigram')
+        response = self.client.post('/api/entries/p/confirm?async=0', json={'entries': [
+            make_entry('毎日日本語を勉強します。', 'まいにちにほんごをべんきょうします。', '我每天学习日语。'),
+            make_entry('図書館で本を読みます。', 'としょかんでほんをよみます。', '在图书馆看书。'),
+            make_entry('日本へ行きます。', 'にほんへいきます。', '去日本。'),
+        ]})
+        self.assertEqual(response.status_code, 200)
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def search(self, keyword: str, **params) -> list:
+        response = self.client.get('/api/entries', query_string={'search': keyword, **params})
+        self.assertEqual(response.status_code, 200)
+        data = response.get_json()['data']
+        if data['pagination']['total'] is not None:
+            self.assertEqual(data['pagination']['total'], len(data['items']))
+        return sorted(item['id'] for item in data['items'])
+
+    def test_matches_after_insert(self):
+        """原文、读音、中文都能按子串命中"""
+        self.assertEqual(self.search('日本語'), [1])
+        self.assertEqual(self.search('としょかん'), [2])
+        self.assertEqual(self.search('图书馆'), [2])
+        self.assertEqual(self.search('ます。'), [1, 2, 3])
+        self.assertEqual(self.search('見つからない'), [])
+
+    def test_matches_after_update_and_delete(self):
+        """修改后按新内容命中、旧内容不再命中；删除后不再出现"""
+        Database.write(lambda cursor: cursor.execute(
+            "UPDATE raw_entries SET original_jp = '図書館で雑誌を読みます。' WHERE id = 2"))
+        self.assertEqual(self.search('雑誌を'), [2])
+        self.assertEqual(self.search('で本を'), [])
+
+        self.assertEqual(self.client.delete('/api/entries/3').status_code, 200)
+        self.assertEqual(self.search('日本へ'), [])
+        self.assertEqual(self.search('日本'), [1])
+
+    def test_short_keywords_use_like(self):
+        """不足 3 个字符的关键词（trigram 无法索引）仍能搜到"""
+        self.assertEqual(self.search('日本'), [1, 3])
+        self.assertEqual(self.search('本'), [1, 2, 3])
+        self.assertEqual(self.search('看书'), [2])
+
+    def test_fts_syntax_is_literal(self):
+        """关键词里的引号和 FTS 运算符按普通字符处理"""
+        self.assertEqual(self.search('"日本 OR'), [])
+        self.assertEqual(self.search('日本 OR 本'), [])
+
+    def test_relevance_order(self):
+        """按相关度排序时只返回命中的条目"""
+        response = self.client.get('/api/entries', query_string={'search': 'にほん', 'order_by': 'relevance'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(sorted(item['id'] for item in response.get_json()['data']['items']), [1, 3])
+
+    def test_rebuild_for_existing_data(self):
+        """旧库没有全文索引：init_db 创建索引时从已有数据重建"""
+        Database.write(lambda cursor: cursor.executescript('''
+            DROP TRIGGER raw_entries_fts_insert;
+            DROP TRIGGER raw_entries_fts_delete;
+            DROP TRIGGER raw_entries_fts_update;
+            DROP TABLE raw_entries_fts;
+        '''))
+        Database.init_db(self.path)
+        self.assertEqual(self.search('勉強します'), [1])
+
+
+if __name__ == '__main__':
+    unittest.main()
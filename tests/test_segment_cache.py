@@ -0,0 +1,89 @@
+"""
+services/segment_cache.SegmentationCache 的测试：用户词典变化后持久化缓存的保留与清理
+
+运行：python -m pytest tests
+"""
+import os
+import sys
+import tempfile
+import unittest
+
+# 添加项目根目录到路径
+project_root = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, project_root)
+
+from src.backend.models.database import Database
+from src.backend.services.segment_cache import SegmentationCache
+from src.backend.services.segmenter import JapaneseSegmenter, RULES_VERSION
+from src.backend.services.user_dictionary import UserDictionary
+
+SENTENCE = ('私は本を読みます。', 'わたしはほんをよみます。')
+
+
+class SegmentationCacheTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'cache.db')
+        Database.configure({'DATABASE_PATH': self.path})
+        Database.init_db(self.path)
+
+    def tearDown(self):
+        Database.close_all()
+        Database.configure({})
+        self.tmp.cleanup()
+
+    def versions(self) -> dict:
+        with Database.read_connection() as conn:
+            rows = conn.execute('''
+                SELECT segmenter_version, COUNT(*) FROM segmentation_cache GROUP BY segmenter_version
+            ''').fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def test_entries_survive_dictionary_change(self):
+        """入库新词改变了用户词典版本：之前的持久化结果保留，词典内容相同时（重启后）仍可命中"""
+        dictionary = UserDictionary()
+        dictionary.add_words([('日本語', 'noun')])
+        segmenter = JapaneseSegmenter(user_dictionary=dictionary)
+        cache = SegmentationCache()
+        expected = cache.segment_many(segmenter, [SENTENCE])
+        old_version = segmenter.version
+
+        # 与句子无关的新词：版本变化，写入新版本的结果时不清掉旧版本
+        dictionary.add_words([('学校', 'noun')])
+        self.assertNotEqual(segmenter.version, old_version)
+        cache.segment_many(segmenter, [('学校へ行きます。', 'がっこうへいきます。')])
+        self.assertEqual(self.versions(), {old_version: 1, segmenter.version: 1})
+
+        # 新进程里重新加载出相同内容的词典：版本相同，直接读到持久化的结果
+        restarted = UserDictionary()
+        restarted.add_words([('日本語', 'noun')])
+        fresh = SegmentationCache()
+        self.assertEqual(fresh.segment_many(JapaneseSegmenter(user_dictionary=restarted), [SENTENCE]), expected)
+        self.assertEqual((fresh.db_hits, fresh.misses), (1, 0))
+
+    def test_prunes_beyond_recent_versions(self):
+        """同一模式只保留最近 KEEP_VERSIONS 个版本；其他模式不受影响，旧规则版本全部清理"""
+        def insert(version, created_at):
+            Database.write(lambda cursor: cursor.execute('''
+                INSERT INTO segmentation_cache (content_hash, segmenter_version, result, created_at)
+                VALUES ('h', ?, '[]', ?)
+            ''', (version, created_at)))
+
+        keep = SegmentationCache.KEEP_VERSIONS
+        old = [f'{RULES_VERSION}-greedy-uold{i}' for i in range(keep)]
+        for i, version in enumerate(old):
+            insert(version, f'2026-01-0{i + 1} 00:00:00')
+        insert(f'{RULES_VERSION}-lattice-uother', '2025-01-01 00:00:00')
+        insert('0-greedy-u0', '2026-02-01 00:00:00')
+
+        segmenter = JapaneseSegmenter(user_dictionary=UserDictionary())
+        SegmentationCache().segment_many(segmenter, [SENTENCE])
+
+        # 当前版本 + 最近的 keep - 1 个旧版本
+        self.assertEqual(set(self.versions()),
+                         {segmenter.version, *old[1:], f'{RULES_VERSION}-lattice-uother'})
+
+
+if __name__ == '__main__':
+    unittest.main()
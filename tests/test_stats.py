@@ -0,0 +1,106 @@
+"""
+统计计数的测试：触发器维护的计数在入库、删除（含经 segmented_words 的级联删除）后与 COUNT(*) 一致，
+重算脚本修正偏差
+
+运行：python -m pytest tests
+"""
+import os
+import subprocess
+import sys
+import tempfile
+import unittest
+
+from support import create_test_app, make_entry, make_word, project_root
+from src.backend.models.database import Database
+
+
+class StatsCountersTest(unittest.TestCase):
+
+    def setUp(self):
+        self.tmp = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self.tmp.name, 'stats.db')
+        self.client = create_test_app(self.path).test_client()
+
+    def tearDown(self):
+        Database.close_all()
+        self.tmp.cleanup()
+
+    def confirm(self, entries: list):
+        response = self.client.post('/api/entries/p/confirm?async=0', json={'entries': entries})
+        self.assertEqual(response.status_code, 200)
+
+    def overview(self) -> dict:
+        response = self.client.get('/api/stats/overview')
+        self.assertEqual(response.status_code, 200)
+        return response.get_json()['data']
+
+    def recomputed(self) -> dict:
+        """按现有数据直接统计，与 overview 的字段对应"""
+        with Database.read_connection() as conn:
+            def scalar(sql):
+                return conn.execute(sql).fetchone()[0]
+            return {
+                'total_entries': scalar('SELECT COUNT(*) FROM raw_entries'),
+                'total_words': scalar('SELECT COUNT(*) FROM segmented_words'),
+                'total_verbs': scalar('SELECT COUNT(*) FROM verb_master'),
+                'today_new': scalar("SELECT COUNT(*) FROM raw_entries WHERE date(created_at) = date('now')"),
+                'type_stats': dict(conn.execute(
+                    'SELECT word_type, COUNT(*) FROM segmented_words GROUP BY word_type').fetchall())
+            }
+
+    def assertCountersMatch(self) -> dict:
+        overview = self.overview()
+        self.assertEqual({key: overview[key] for key in self.recomputed()}, self.recomputed())
+        return overview
+
+    def test_counters_follow_insert_and_delete(self):
+        """入库和删除后，计数与重新统计的结果一致"""
+        self.assertEqual(self.assertCountersMatch()['total_entries'], 0)
+
+        self.confirm([
+            make_entry('本を読みます。', 'ほんをよみます。', words=[
+                make_word('本', 'ほん', 'noun', 0),
+                make_word('を', 'を', 'particle', 1),
+                make_word('読みます', 'よみます', 'verb', 2, prototype='読む', prototype_reading='よむ')
+            ]),
+            make_entry('大きい本です。', 'おおきいほんです。', words=[
+                make_word('大きい', 'おおきい', 'adjective_i', 0),
+                make_word('本', 'ほん', 'noun', 1)
+            ]),
+            make_entry('こんにちは', 'こんにちは', content_type='word')
+        ])
+        overview = self.assertCountersMatch()
+        self.assertEqual((overview['total_entries'], overview['total_words'], overview['total_verbs']), (3, 5, 1))
+        self.assertEqual((overview['today_new'], overview['streak_days']), (3, 1))
+
+        # 删除句子：分词经外键级联删除，词性计数一起减少
+        self.assertEqual(self.client.delete('/api/entries/1').status_code, 200)
+        overview = self.assertCountersMatch()
+        self.assertEqual(overview['type_stats'], {'noun': 1, 'adjective_i': 1})
+
+        # 直接删除分词（不经过句子）
+        Database.write(lambda cursor: cursor.execute('DELETE FROM segmented_words WHERE raw_entry_id = 2'))
+        self.assertEqual(self.assertCountersMatch()['type_stats'], {})
+
+    def test_recompute_script_fixes_drift(self):
+        """计数出现偏差时，重算脚本按现有数据修正"""
+        self.confirm([make_entry('水を飲みます。', 'みずをのみます。', words=[
+            make_word('水', 'みず', 'noun', 0),
+            make_word('飲みます', 'のみます', 'verb', 1, prototype='飲む', prototype_reading='のむ')
+        ])])
+        Database.write(lambda cursor: cursor.executescript('''
+            UPDATE stats_counters SET value = value + 5;
+            DELETE FROM stats_word_types;
+            DELETE FROM stats_daily;
+        '''))
+        self.assertNotEqual(self.overview()['total_entries'], 1)
+
+        result = subprocess.run([sys.executable, os.path.join(project_root, 'scripts', 'recompute_stats.py'), self.path],
+                                capture_output=True, text=True)
+        self.assertEqual(result.returncode, 0, result.stdout + result.stderr)
+        overview = self.assertCountersMatch()
+        self.assertEqual((overview['total_entries'], overview['streak_days']), (1, 1))
+
+
+if __name__ == '__main__':
+    unittest.main()